@@ -0,0 +1,77 @@
+__author__ = 'susperius'
+
+"""
+Little benchmark for the bytemutation fuzzer, shows the mutants/sec for different seed sizes.
+The old string rebuilding approach is measured as a reference, the batch column needs NumPy.
+Usage: python bench_bytemutation.py (from the node directory)
+"""
+
+import os
+import random
+import tempfile
+import time
+
+from fuzzing.bytemutation import ByteMutation
+
+SEED_SIZES = [("1 KB", 1024), ("1 MB", 1024 * 1024), ("50 MB", 50 * 1024 * 1024)]
+MIN_CHANGE = 1
+MAX_CHANGE = 10
+MIN_DURATION = 2.0
+BATCH_SIZE = 100
+
+
+def legacy_fuzz(data):
+    data_length = len(data)
+    changes = min(random.randint(MIN_CHANGE, MAX_CHANGE), data_length)
+    for i in range(changes):
+        num = random.randint(0, data_length - 1)
+        data = data[:num] + chr(random.randint(0, 0xFF)) + data[num+1:]
+    return data
+
+
+def measure(func):
+    mutants = 0
+    start = time.time()
+    while time.time() - start < MIN_DURATION:
+        func()
+        mutants += 1
+    return mutants / (time.time() - start)
+
+
+def measure_batch(fuzzer):
+    rows = max(1, min(BATCH_SIZE, ByteMutation.BATCH_MEMORY / len(fuzzer._buffer)))
+    mutants = 0
+    start = time.time()
+    while time.time() - start < MIN_DURATION:
+        mutants += len(fuzzer.fuzz_batch(rows))
+    return mutants / (time.time() - start)
+
+
+def run(null_fd):
+    for label, size in SEED_SIZES:
+        fd, seed_file = tempfile.mkstemp(suffix=".bin")
+        os.write(fd, os.urandom(size))
+        os.close(fd)
+        try:
+            fuzzer = ByteMutation(seed_file, MIN_CHANGE, MAX_CHANGE, 31337, "bin")
+            mutate = fuzzer._ByteMutation__mutate
+            buf = fuzzer._buffer
+            with open(seed_file, "rb") as seed_fd:
+                legacy_data = [seed_fd.read()]
+
+            def legacy():
+                legacy_data[0] = legacy_fuzz(legacy_data[0])
+
+            def in_place():
+                mutate()
+                buf.write_to(null_fd)
+
+            print("%-6s legacy: %10.1f   fuzz(): %10.1f   in place: %10.1f   batch: %10.1f   (mutants/sec)" %
+                  (label, measure(legacy), measure(fuzzer.fuzz), measure(in_place), measure_batch(fuzzer)))
+        finally:
+            os.remove(seed_file)
+
+
+if __name__ == "__main__":
+    with open(os.devnull, "wb") as devnull:
+        run(devnull)
@@ -0,0 +1,77 @@
+__author__ = 'susperius'
+
+"""
+Throughput benchmark of the Linux executors against local stand-in targets, shows the execs/sec of the linux and
+forkserver executors and of a plain subprocess per testcase as reference. The crash and timeout detection is checked
+on the way, the forkserver column needs a C compiler for the LD_PRELOAD shim.
+Usage: python bench_executor.py [target program] (from the node directory, default: /bin/cat)
+"""
+
+import gevent.monkey
+gevent.monkey.patch_all()
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from executing.forkserver import ForkserverExecutor
+from executing.linux import LinuxExecutor
+
+MIN_DURATION = 3.0
+TIMEOUT = 5
+CRASHING_TARGET = "/bin/sh -c 'kill -SEGV $$' @@"
+HANGING_TARGET = "/bin/sh -c 'sleep 10' @@"
+
+
+def measure(func):
+    execs = 0
+    start = time.time()
+    while time.time() - start < MIN_DURATION:
+        func()
+        execs += 1
+    return execs / (time.time() - start)
+
+
+def run(target_program):
+    fd, testcase = tempfile.mkstemp(suffix=".bin")
+    os.write(fd, os.urandom(4096))
+    os.close(fd)
+    executor = LinuxExecutor({'name': "bench", 'path': target_program})
+    forkserver = ForkserverExecutor({'name': "bench", 'path': target_program})
+    devnull = open(os.devnull, "r+b")
+    try:
+        result = executor.execute(testcase, TIMEOUT)
+        print("stand-in: %s -> outcome: %s, code: %d, maxrss: %d KB" %
+              (target_program, result.outcome, result.code, result.rusage['maxrss']))
+
+        def spawn():
+            subprocess.call(executor.argv(testcase), stdin=devnull, stdout=devnull, stderr=devnull)
+
+        def execute():
+            executor.execute(testcase, TIMEOUT)
+
+        def fork():
+            forkserver.execute(testcase, TIMEOUT)
+
+        print("subprocess: %10.1f   linux: %10.1f   forkserver: %10.1f   (execs/sec)" %
+              (measure(spawn), measure(execute), measure(fork)))
+        for executor_class in (LinuxExecutor, ForkserverExecutor):
+            crashing = executor_class({'name': "crash", 'path': CRASHING_TARGET})
+            result = crashing.execute(testcase, TIMEOUT)
+            print("%s crash detection: %s %s" % (executor_class.NAME, result.outcome, result.description))
+            crashing.close()
+            hanging = executor_class({'name': "hang", 'path': HANGING_TARGET})
+            result = hanging.execute(testcase, 0.5)
+            print("%s timeout detection: %s after %.2f s" % (executor_class.NAME, result.outcome, result.duration))
+            hanging.close()
+    finally:
+        executor.close()
+        forkserver.close()
+        devnull.close()
+        os.remove(testcase)
+
+
+if __name__ == "__main__":
+    run(sys.argv[1] if len(sys.argv) > 1 else "/bin/cat")
@@ -0,0 +1,63 @@
+__author__ = 'susperius'
+
+"""
+Little benchmark for the html5 fuzzer, shows the tags/sec of the tag and attribute selection with the old lookups in
+HTML5_OBJECTS and TYPES_DICT as reference and with the compiled schema, and of the whole __build_tag.
+Usage: python bench_html5.py (from the node directory)
+"""
+
+import random
+import time
+
+from fuzzing.browser.html5 import Html5Fuzzer
+from fuzzing.browser.model.HtmlObjects import HTML5_OBJECTS
+
+MAX_ATTR = 5
+MIN_DURATION = 2.0
+
+
+def legacy_select(prng):
+    tags = [x for x in HTML5_OBJECTS.keys() if x not in Html5Fuzzer.NO_SINGLE_USE_TAGS]
+    tag = prng.choice(tags)
+    attribs_avail = HTML5_OBJECTS[tag]['attr']
+    max_tag_attr = len(attribs_avail.keys())
+    attr_count = prng.randint(1, MAX_ATTR) if MAX_ATTR < max_tag_attr else prng.randint(1, max_tag_attr)
+    attribs = set()
+    if HTML5_OBJECTS[tag]['req_attr'] is not None:
+        for attr in HTML5_OBJECTS[tag]['req_attr']:
+            attribs.add(attr)
+    while len(attribs) < attr_count:
+        attribs.add(prng.choice(attribs_avail.keys()))
+    return [Html5Fuzzer.TYPES_DICT[attribs_avail[attr]] for attr in attribs if attribs_avail[attr] is not None]
+
+
+def compiled_select(prng):
+    tag = prng.choice(Html5Fuzzer.SINGLE_USE_TAGS)
+    outer_tags, head_only, required, optional, attributes = Html5Fuzzer.SCHEMA[tag]
+    max_tag_attr = len(attributes)
+    attr_count = prng.randint(1, MAX_ATTR) if MAX_ATTR < max_tag_attr else prng.randint(1, max_tag_attr)
+    attribs = required
+    if attr_count > len(required):
+        attribs += tuple(prng.sample(optional, attr_count - len(required)))
+    return [attributes[attr][1] for attr in attribs if attributes[attr][0] is not None]
+
+
+def measure(func):
+    tags = 0
+    start = time.time()
+    while time.time() - start < MIN_DURATION:
+        func()
+        tags += 1
+    return tags / (time.time() - start)
+
+
+def run():
+    prng = random.Random(31337)
+    fuzzer = Html5Fuzzer(31337, 100, 5, MAX_ATTR, "html")
+    build_tag = fuzzer._Html5Fuzzer__build_tag
+    print("selection legacy: %10.1f   compiled: %10.1f   __build_tag: %10.1f   (tags/sec)" %
+          (measure(lambda: legacy_select(prng)), measure(lambda: compiled_select(prng)), measure(build_tag)))
+
+
+if __name__ == "__main__":
+    run()
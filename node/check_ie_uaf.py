@@ -10,7 +10,8 @@ __author__ = 'susperius'
 from optparse import OptionParser
 import os
 import subprocess
-from time import sleep
+import threading
+from debugging.report import read_report
 
 BREAKPOINT = "bp mshtml + 7418a 'ed esp ffffffff; g'"
 SLEEP_TIME = 10
@@ -25,10 +26,13 @@ if __name__ == "__main__":
                 print("[*] Test case: " + test_path)
                 process = subprocess.Popen("python debugging\\windbg.py -p \"" + PROGRAM_PATH + "\" -t \"" +
                                            test_path + "\" -c True -i \"" + BREAKPOINT + "\"", stdout=subprocess.PIPE)
-                sleep(10)
-                if os.path.isfile("tmp_crash_report"):
-                    with open("tmp_crash_report", "rb") as fd:
-                        report = fd.read()
+                #  windbg.py sends the report as soon as it has it, the timer only ends the cases which don't crash
+                timer = threading.Timer(SLEEP_TIME, process.kill)
+                timer.start()
+                crash = read_report(process.stdout)
+                timer.cancel()
+                if crash is not None:
+                    report = crash['report'].encode("utf-8")
                     if "NearNull" not in report:
                         print("[+] Possible UAF\r\n")
                         os.makedirs("results/interesting_ie") if not os.path.exists("results/interesting_ie") else None
@@ -42,5 +46,8 @@ if __name__ == "__main__":
                         print("[-] No UAF\r\n")
                 else:
                     print("[-] No Crash")
-                process.kill()
+                try:
+                    process.kill()
+                except OSError:
+                    pass
 
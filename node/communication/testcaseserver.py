@@ -0,0 +1,230 @@
+__author__ = 'susperius'
+
+import hashlib
+import logging
+import mimetypes
+import os
+import time
+
+import gevent
+from gevent.event import Event
+from gevent.pywsgi import WSGIServer
+from fuzzing.browser.model.JsWindow import COMPLETION_PATH
+
+"""
+In-process HTTP server for the testcases, replaces the SimpleHTTPServer subprocess per batch.
+The files are served from an in-memory store keyed by name, the server keeps the connections alive (HTTP/1.1) and
+shared media files are sent with caching headers, so the browser loads them only once.
+The fuzzed pages call COMPLETION_PATH?<testcase> when all their functions have run, so a test can end right then.
+In a browser session the driver page (SESSION_PATH) loads one testcase after another into an iframe, it asks for the
+next one at NEXT_PATH, which answers as soon as the active testcase completed.
+"""
+
+SHARED_MAX_AGE = 3600
+SESSION_PATH = "__session"
+NEXT_PATH = "__next"
+
+DRIVER_PAGE = """<!DOCTYPE html>
+<html>
+<body style="margin: 0">
+<iframe id="testcase" style="width: 100%; height: 100%; border: 0"></iframe>
+<script type="text/javascript">
+function next_testcase() {
+    var request = new XMLHttpRequest();
+    request.open("GET", "/""" + NEXT_PATH + """?" + new Date().getTime(), true);
+    request.onreadystatechange = function () {
+        if (request.readyState == 4) {
+            if (request.status == 200 && request.responseText != "") {
+                document.getElementById("testcase").src = request.responseText;
+                next_testcase();
+            } else {
+                window.close();
+            }
+        }
+    };
+    request.send();
+}
+next_testcase();
+</script>
+</body>
+</html>
+"""
+
+
+class TestcaseServer:
+    def __init__(self, port=8080):
+        self._port = port
+        self._logger = logging.getLogger(__name__)
+        self._serving = False
+        self._server = None
+        # Store layout: {'name': (data, content_type, etag, shared), ...}
+        self._store = {}
+        self._hits = 0
+        self._misses = 0
+        self._not_modified = 0
+        self._bytes_sent = 0
+        self._latency = 0.0
+        self._completions = {}
+        self._completed = 0
+        self._session = None
+
+    @property
+    def port(self):
+        return self._port
+
+    @property
+    def session(self):
+        return self._session
+
+    @property
+    def stats(self):
+        requests = self._hits + self._misses + self._not_modified + self._completed
+        return {'hits': self._hits, 'misses': self._misses, 'not_modified': self._not_modified,
+                'bytes_sent': self._bytes_sent, 'completed': self._completed,
+                'avg_latency_ms': (self._latency / requests * 1000.0) if requests else 0.0}
+
+    def add(self, name, data, shared=False):
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        etag = "\"" + hashlib.md5(data).hexdigest() + "\"" if shared else None
+        self._store[name.lstrip("/")] = (data, content_type, etag, shared)
+
+    def add_files(self, files, prefix=""):
+        for name, data in files:
+            self.add(prefix + name, data)
+
+    def load_directory(self, directory, prefix="", shared=False):
+        for file_name in os.listdir(directory):
+            path = os.path.join(directory, file_name)
+            if os.path.isfile(path):
+                with open(path, "rb") as fd:
+                    self.add(prefix + file_name, fd.read(), shared)
+
+    def remove(self, name):
+        self._store.pop(name.lstrip("/"), None)
+
+    def clear(self):
+        #  The shared media stays in the store
+        for name in [name for name, entry in self._store.items() if not entry[3]]:
+            del self._store[name]
+
+    def set_session(self, session):
+        #  The browser session the driver page belongs to, None if there is none
+        self._session = session
+
+    def expect_completion(self, testcase):
+        #  Has to be called before the program is started, testcase is the name without extension.
+        #  The returned event is set as soon as the page reports its completion.
+        self._completions[testcase] = Event()
+        return self._completions[testcase]
+
+    def __application(self, environ, start_response):
+        start = time.time()
+        name = environ['PATH_INFO'].lstrip("/")
+        if name == COMPLETION_PATH:
+            event = self._completions.get(environ.get('QUERY_STRING', ""))
+            if event is not None:
+                self._completed += 1
+                event.set()
+            start_response("204 No Content", [("Cache-Control", "no-store"), ("Content-Length", "0")])
+            self._latency += time.time() - start
+            return [""]
+        if name == SESSION_PATH:
+            start_response("200 OK", [("Cache-Control", "no-store"), ("Content-Type", "text/html"),
+                                      ("Content-Length", str(len(DRIVER_PAGE)))])
+            return [DRIVER_PAGE]
+        if name == NEXT_PATH:
+            next_testcase = self._session.next_testcase() if self._session is not None else ""
+            start_response("200 OK", [("Cache-Control", "no-store"), ("Content-Type", "text/plain"),
+                                      ("Content-Length", str(len(next_testcase)))])
+            return [next_testcase]
+        entry = self._store.get(name)
+        if entry is None or environ['REQUEST_METHOD'] not in ("GET", "HEAD"):
+            self._misses += 1
+            start_response("404 Not Found", [("Content-Type", "text/plain"), ("Content-Length", "0")])
+            self._latency += time.time() - start
+            return [""]
+        data, content_type, etag, shared = entry
+        if shared:
+            headers = [("Cache-Control", "public, max-age=" + str(SHARED_MAX_AGE)), ("ETag", etag)]
+            if environ.get('HTTP_IF_NONE_MATCH') == etag:
+                self._not_modified += 1
+                start_response("304 Not Modified", headers)
+                self._latency += time.time() - start
+                return [""]
+        else:
+            headers = [("Cache-Control", "no-store")]
+        headers += [("Content-Type", content_type), ("Content-Length", str(len(data)))]
+        start_response("200 OK", headers)
+        self._hits += 1
+        self._bytes_sent += len(data)
+        self._latency += time.time() - start
+        return [data] if environ['REQUEST_METHOD'] == "GET" else [""]
+
+    def serve(self):
+        if not self._serving:
+            self._server = WSGIServer(('127.0.0.1', self._port), self.__application, log=None)
+            self._server.start()
+            self._serving = True
+            self._logger.info("[TestcaseServer] initialized on port " + str(self._port) + " ...")
+            gevent.sleep(0)
+
+    def stop(self):
+        if self._serving:
+            self._server.stop()
+            self._serving = False
+
+
+class BrowserSession:
+    """
+    Runs many testcases in one browser instance. The driver page asks for the next testcase, the answer is held
+    back until the active testcase reported its completion or its time is over.
+    """
+    def __init__(self, server, testcases, timeout, grace=0.0):
+        self._server = server
+        self._pending = list(testcases)
+        self._timeout = timeout
+        self._grace = grace
+        self._active = None
+        self._previous = None
+        self._completion = None
+        self._started = 0.0
+        self._runs = []
+        self._finished = Event()
+
+    @property
+    def active(self):
+        return self._active
+
+    @property
+    def previous(self):
+        #  A crash shortly after a switch (e.g. while the old page is unloaded) can still belong to this one
+        return self._previous
+
+    @property
+    def pending(self):
+        return self._pending
+
+    @property
+    def finished(self):
+        return self._finished
+
+    @property
+    def runs(self):
+        #  [(completed, seconds), ...] of the testcases which are through
+        return self._runs
+
+    def next_testcase(self):
+        if self._completion is not None:
+            completed = self._completion.wait(self._timeout)
+            self._runs.append((completed, time.time() - self._started))
+            if completed:
+                gevent.sleep(self._grace)
+        self._previous = self._active
+        if not self._pending:
+            self._active = None
+            self._finished.set()
+            return ""
+        self._active = self._pending.pop(0)
+        self._started = time.time()
+        self._completion = self._server.expect_completion(os.path.basename(self._active).split(".")[0])
+        return "/" + self._active
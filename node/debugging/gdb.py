@@ -0,0 +1,251 @@
+import hashlib
+import os
+import re
+import shlex
+import signal
+import struct
+import subprocess
+import sys
+import threading
+from distutils.spawn import find_executable
+from multiprocessing.pool import ThreadPool
+from optparse import OptionParser
+from report import write_report
+
+__author__ = 'susperius'
+
+"""
+Linux triage: the crashing input is run again under gdb -batch (or gdb opens the core file) and the report is built
+from the signal, fault address, registers, disassembly at the pc and the backtrace. The hashes are made like the ones
+of !exploitable, the major hash from the top MAJOR_FRAMES frames, the minor hash from the whole backtrace, frames of
+the sanitizer runtime and of abort() are left out. gdb keeps its symbol index per build ID in SYMBOL_CACHE, so a
+crash in a binary which was triaged before doesn't pay for the symbol loading again.
+Started as a script the report is written to stdout (see report.py), several testcases are triaged side by side.
+"""
+
+GDB = find_executable("gdb")
+SYMBOL_CACHE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "symbol_cache")
+MAJOR_FRAMES = 5
+BACKTRACE_DEPTH = 32
+NEAR_NULL = 0x10000
+MARKER = "@@PYFUZZ2 "
+
+#  Frames which say nothing about the bug: the way from the sanitizer (or assert) to the signal
+SKIPPED_FRAMES = re.compile(r"^(\?\?$|raise$|abort$|__GI_|__pthread_kill|pthread_kill$|__libc_|__assert|__sanitizer|"
+                            r"__asan|__ubsan|__msan|__interceptor_)")
+SIGNAL_PATTERN = re.compile(r"Program (?:received|terminated with) signal (SIG\w+)")
+ADDRESS_PATTERN = re.compile(r"0x[0-9a-fA-F]+")
+#  "#1  0x00005555555551a9 in parse (data=0x0) at parse.c:12" or "#0  parse (...) at ..." or "... in ?? () from lib"
+FRAME_PATTERN = re.compile(r"^#(\d+)\s+(?:(0x[0-9a-fA-F]+) in )?(\S+) \(.*?\)(?: (?:at|from) (\S+))?")
+
+ENVIRONMENT = {'ASAN_OPTIONS': "abort_on_error=1:detect_leaks=0", 'UBSAN_OPTIONS': "abort_on_error=1",
+               'DEBUGINFOD_URLS': ""}
+
+_build_ids = {}
+_build_ids_lock = threading.Lock()
+
+
+def argv(path, testcase):
+    #  Same as the executors: @@ is replaced by the testcase, without @@ the testcase is appended
+    args = shlex.split(path)
+    if "@@" in args:
+        return [testcase if arg == "@@" else arg for arg in args]
+    return args + [testcase]
+
+
+def build_id(path):
+    #  GNU build ID of an ELF file as hex string, the file identity if it has none; parsed once per file version
+    path = find_executable(path) or path
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (path, stat.st_mtime, stat.st_size)
+    with _build_ids_lock:
+        if key not in _build_ids:
+            _build_ids[key] = _read_build_id(path) or "%s-%d-%d" % (os.path.basename(path), stat.st_mtime,
+                                                                     stat.st_size)
+        return _build_ids[key]
+
+
+def _read_build_id(path):
+    with open(path, 'rb') as fd:
+        header = fd.read(64)
+        if len(header) < 52 or header[:4] != "\x7fELF":
+            return None
+        endian = "<" if header[5] == "\x01" else ">"
+        if header[4] == "\x02":
+            phoff, = struct.unpack(endian + "Q", header[32:40])
+            phentsize, phnum = struct.unpack(endian + "HH", header[54:58])
+            segment = lambda data: struct.unpack(endian + "IIQQQQ", data[:40])[2::3]  # offset, filesz
+        else:
+            phoff, = struct.unpack(endian + "I", header[28:32])
+            phentsize, phnum = struct.unpack(endian + "HH", header[42:46])
+            segment = lambda data: struct.unpack(endian + "IIIIII", data[:24])[1::3]
+        for i in range(phnum):
+            fd.seek(phoff + i * phentsize)
+            program_header = fd.read(phentsize)
+            if struct.unpack(endian + "I", program_header[:4])[0] != 4:  # PT_NOTE
+                continue
+            offset, size = segment(program_header)
+            fd.seek(offset)
+            notes = fd.read(size)
+            position = 0
+            while position + 12 <= len(notes):
+                name_size, desc_size, note_type = struct.unpack(endian + "III", notes[position:position + 12])
+                name_start = position + 12
+                desc_start = name_start + ((name_size + 3) & ~3)
+                if note_type == 3 and notes[name_start:name_start + name_size].rstrip("\x00") == "GNU":
+                    return notes[desc_start:desc_start + desc_size].encode("hex")
+                position = desc_start + ((desc_size + 3) & ~3)
+    return None
+
+
+def gdb_commands(core=False):
+    commands = ["set pagination off", "set confirm off", "set width 0", "set startup-with-shell off",
+                "set debuginfod enabled off", "set index-cache directory " + SYMBOL_CACHE,
+                "set index-cache enabled on"]
+    if not core:
+        commands += ["set inferior-tty /dev/null", "run"]
+    for section, command in (("address", "p $_siginfo._sifields._sigfault.si_addr"),
+                             ("registers", "info registers"),
+                             ("disassembly", "x/8i $pc"),
+                             ("backtrace", "bt " + str(BACKTRACE_DEPTH))):
+        commands += ["echo \\n" + MARKER + section + "\\n", command]
+    return commands
+
+
+def parse_output(output):
+    #  {'signal': .., 'address': .., 'registers': .., 'disassembly': .., 'backtrace': ..} or None without a signal
+    match = SIGNAL_PATTERN.search(output)
+    if match is None:
+        return None
+    sections = {'signal': match.group(1)}
+    parts = output.split("\n" + MARKER)
+    for part in parts[1:]:
+        section, _, text = part.partition("\n")
+        sections[section] = text.strip("\n")
+    address = ADDRESS_PATTERN.search(sections.get('address', ""))
+    sections['address'] = int(address.group(0), 16) if address is not None else None
+    return sections
+
+
+def frames(backtrace):
+    #  [(function, module), ...] in the order of the backtrace
+    result = []
+    for line in backtrace.splitlines():
+        match = FRAME_PATTERN.match(line)
+        if match is not None:
+            function = match.group(3)
+            if function == "??" and match.group(2) is not None:
+                #  Without symbols only the page offset survives ASLR
+                function = "??+0x%03x" % (int(match.group(2), 16) & 0xFFF)
+            result.append((function, os.path.basename(match.group(4)) if match.group(4) else ""))
+    return result
+
+
+def hashes(signal_name, backtrace_frames):
+    keys = [function for function, module in backtrace_frames if not SKIPPED_FRAMES.match(function)]
+    if not keys:
+        keys = [function for function, module in backtrace_frames]
+    major_hash = hashlib.md5(signal_name + "".join(keys[:MAJOR_FRAMES])).hexdigest()[:8]
+    minor_hash = hashlib.md5(signal_name + "".join(keys)).hexdigest()[:8]
+    return major_hash, minor_hash
+
+
+def crash_report(path, testcase, sections, core=None):
+    backtrace_frames = frames(sections.get('backtrace', ""))
+    major_hash, minor_hash = hashes(sections['signal'], backtrace_frames)
+    description = sections['signal']
+    if sections['signal'] in ("SIGSEGV", "SIGBUS") and sections['address'] is not None and \
+            sections['address'] < NEAR_NULL:
+        description += "NearNull"
+    location = ([function for function, module in backtrace_frames if not SKIPPED_FRAMES.match(function)] +
+                ["unknown"])[0]
+    lines = ["Crash Report",
+             "Program: " + path,
+             "Testcase: " + testcase] + \
+            (["Core: " + core] if core is not None else []) + \
+            ["Build ID: " + str(build_id(argv(path, testcase)[0])),
+             "Signal: " + sections['signal'],
+             "Fault Address: " + ("0x%x" % sections['address'] if sections['address'] is not None else "unknown"),
+             "",
+             sections.get('registers', ""),
+             "",
+             sections.get('disassembly', ""),
+             "",
+             sections.get('backtrace', ""),
+             "",
+             "Exploitability Classification: " + ("PROBABLY_NOT_EXPLOITABLE" if description.endswith("NearNull")
+                                                  else "UNKNOWN"),
+             "Recommended Bug Title: " + description + " starting at " + location + " (Hash=0x" + major_hash +
+             ".0x" + minor_hash + ")",
+             "Short Description: " + description]
+    return "\r\n".join("\r\n".join(line.splitlines()) for line in lines) + "\r\n"
+
+
+def gdb_argv(path, testcase, core=None):
+    args = [GDB, "-batch", "-nx"]
+    for command in gdb_commands(core is not None):
+        args += ["-ex", command]
+    if core is not None:
+        return args + [argv(path, testcase)[0], core]
+    return args + ["--args"] + argv(path, testcase)
+
+
+def environment():
+    env = dict(os.environ)
+    for name, value in ENVIRONMENT.items():
+        env.setdefault(name, value)
+    return env
+
+
+def triage(path, testcase, timeout, core=None):
+    #  Returns the crash report, "" if the input didn't crash under gdb (or gdb is missing)
+    if GDB is None:
+        return ""
+    if not os.path.isdir(SYMBOL_CACHE):
+        try:
+            os.makedirs(SYMBOL_CACHE)
+        except OSError:
+            pass
+    #  Own process group, so the program goes down together with gdb after the timeout
+    proc = subprocess.Popen(gdb_argv(path, testcase, core), stdin=open(os.devnull, "rb"), stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, env=environment(), preexec_fn=os.setpgrp)
+    timer = threading.Timer(timeout, os.killpg, (proc.pid, signal.SIGKILL))
+    timer.start()
+    output = proc.communicate()[0]
+    timer.cancel()
+    sections = parse_output(output)
+    if sections is None:
+        return ""
+    return crash_report(path, testcase, sections, core)
+
+
+def option_parsing():
+    parser = OptionParser()
+    parser.add_option("-p", "--path", dest="path", help="The program, @@ is replaced by the testcase", metavar="PATH")
+    parser.add_option("-t", "--testcase", dest="testcases", action="append", default=[],
+                      help="The path of a testcase, can be given several times", metavar="TESTCASE")
+    parser.add_option("-C", "--core", dest="core", default=None, help="Triage this core file of the testcase")
+    parser.add_option("-T", "--timeout", dest="timeout", type="float", default=60.0,
+                      help="Seconds a triage may take")
+    parser.add_option("-j", "--jobs", dest="jobs", type="int", default=4, help="Triages running side by side")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    options, args = option_parsing()
+    if GDB is None:
+        sys.stderr.write("gdb not found\n")
+        sys.exit(1)
+    pool = ThreadPool(max(1, options.jobs))
+    lock = threading.Lock()
+
+    def run(testcase):
+        report = triage(options.path, testcase, options.timeout, options.core)
+        if report:
+            with lock:
+                write_report(sys.stdout, report, testcase=testcase)
+    pool.map(run, options.testcases)
+    pool.close()
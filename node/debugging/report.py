@@ -0,0 +1,31 @@
+import json
+
+__author__ = 'susperius'
+
+"""
+Report channel between a triage process (windbg.py, ...) and the one which started it.
+The triage process writes its report as one prefixed JSON line to its stdout as soon as it has it, the reader wakes up
+on that line instead of sleeping and polling for a report file. Every other output line is skipped, so debugger
+messages on stdout don't break the channel, and there is no shared file, so several triages can run side by side.
+"""
+
+REPORT_PREFIX = "PYFUZZ2_REPORT "
+
+
+def write_report(fd, crash_report, **info):
+    #  info: further structured fields, e.g. signal=..., exception=...
+    info['report'] = crash_report
+    for key, value in info.items():
+        if isinstance(value, str):
+            #  Debugger output can hold any bytes, JSON only takes text; the readers encode the report as UTF-8 again
+            info[key] = value.decode("utf-8", "replace")
+    fd.write(REPORT_PREFIX + json.dumps(info) + "\n")
+    fd.flush()
+
+
+def read_report(fd):
+    #  Blocks until the report line arrives, returns the fields as dict or None if the stream ended without a report
+    for line in iter(fd.readline, ""):
+        if line.startswith(REPORT_PREFIX):
+            return json.loads(line[len(REPORT_PREFIX):])
+    return None
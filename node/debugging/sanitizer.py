@@ -0,0 +1,148 @@
+import re
+from gdb import hashes, SKIPPED_FRAMES, NEAR_NULL
+
+__author__ = 'susperius'
+
+"""
+Crash reports of programs built with AddressSanitizer, UBSan & co. come from the runtime itself, so no debugger and
+no second run is needed. The parser is fed the stderr output of a run chunk by chunk, it keeps only the first report
+(bug type, access, frames of its first stack) and is finished as soon as the SUMMARY line went by.
+The report gets the same structure and (Hash=maj.min) hashes as the one of gdb.py, the bug type takes the place of
+the signal.
+"""
+
+MAX_FRAMES = 32
+MAX_LINES = 200
+
+#  Defaults for the runs, options set in the environment of the node win
+ENVIRONMENT = {'ASAN_OPTIONS': "detect_leaks=0:symbolize=1:verify_asan_link_order=0",
+               'UBSAN_OPTIONS': "print_stacktrace=1:halt_on_error=1",
+               'MSAN_OPTIONS': "print_stacktrace=1"}
+
+#  "==1234==ERROR: AddressSanitizer: heap-use-after-free on address 0x602000000010 at pc ..."
+HEADER_PATTERN = re.compile(r"==\d+==\s*(?:ERROR|WARNING): (\w+Sanitizer): (\S+)(?: on (?:unknown )?address "
+                            r"(0x[0-9a-fA-F]+))?")
+#  "file.c:12:5: runtime error: signed integer overflow: 2147483647 + 1 cannot be represented in type 'int'"
+UBSAN_PATTERN = re.compile(r"^(\S+): runtime error: ([^:]+)")
+#  Parts of a runtime error message which differ between runs of the same bug: quoted types, addresses and numbers
+UBSAN_VARIABLE_PATTERN = re.compile(r"'[^']*'|0x[0-9a-fA-F]+|\d+")
+ACCESS_PATTERN = re.compile(r"^(READ|WRITE) of size (\d+) at (0x[0-9a-fA-F]+)")
+#  "#0 0x4f2a10 in parse_chunk /src/a.c:12:3" or without symbols "#1 0x4f2b10  (/usr/bin/prog+0x2b10)"
+FRAME_PATTERN = re.compile(r"^\s*#(\d+) 0x[0-9a-fA-F]+ (?:in (\S+)(?: (\S+))?|\s*\((\S+)\))")
+SUMMARY_PATTERN = re.compile(r"^SUMMARY: (\w+Sanitizer): (.*)")
+
+
+class SanitizerParser:
+    def __init__(self):
+        self._partial = ""
+        self._lines = []
+        self._report = None
+        self._in_stack = False
+        self._stack_done = False
+        self._finished = False
+
+    @property
+    def finished(self):
+        return self._finished
+
+    @property
+    def report(self):
+        #  {'tool': .., 'bug_type': .., 'address': .., 'access': .., 'frames': [[function, location], ..],
+        #   'summary': .., 'text': [lines]} or None if no report was seen
+        return self._report
+
+    def feed(self, data):
+        if self._finished:
+            return
+        lines = (self._partial + data).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self.__line(line.rstrip("\r"))
+            if self._finished:
+                break
+
+    def close(self):
+        #  A report cut off by the end of the output is still a report
+        if self._partial:
+            self.__line(self._partial)
+            self._partial = ""
+        if self._report is not None:
+            self._finished = True
+        return self._report
+
+    def __line(self, line):
+        if self._report is None:
+            match = HEADER_PATTERN.search(line)
+            if match is not None:
+                bug_type = "memory-leak" if match.group(1) == "LeakSanitizer" else match.group(2)
+                self.__start(match.group(1), bug_type, match.group(3), line)
+                return
+            match = UBSAN_PATTERN.search(line)
+            if match is not None:
+                self.__start("UndefinedBehaviorSanitizer", ubsan_bug_type(match.group(2)), None, line)
+            return
+        if len(self._lines) < MAX_LINES:
+            self._lines.append(line)
+        match = ACCESS_PATTERN.search(line)
+        if match is not None and self._report['access'] is None:
+            self._report['access'] = match.group(1) + " of size " + match.group(2)
+            self._report['address'] = self._report['address'] or match.group(3)
+            return
+        match = FRAME_PATTERN.search(line)
+        if match is not None:
+            if not self._stack_done and len(self._report['frames']) < MAX_FRAMES:
+                self._in_stack = True
+                function = match.group(2) or match.group(4).rsplit("/", 1)[-1]
+                self._report['frames'].append([function, match.group(3) or ""])
+            return
+        if self._in_stack:
+            #  Only the first stack is the one of the bug, the others tell where the memory came from
+            self._in_stack = False
+            self._stack_done = True
+        match = SUMMARY_PATTERN.search(line)
+        if match is not None:
+            self._report['summary'] = match.group(2)
+            self._finished = True
+
+    def __start(self, tool, bug_type, address, line):
+        self._lines = [line]
+        self._report = {'tool': tool, 'bug_type': bug_type, 'address': address, 'access': None, 'frames': [],
+                        'summary': "", 'text': self._lines}
+
+
+def ubsan_bug_type(message):
+    #  "index 5 out of bounds for type 'int [4]'" -> "index-out-of-bounds-for-type", stable for the hashes and usable
+    #  as a directory name
+    words = re.findall(r"[a-zA-Z]+", UBSAN_VARIABLE_PATTERN.sub(" ", message))
+    return "-".join(words) if words else "undefined-behavior"
+
+
+def parse(output):
+    parser = SanitizerParser()
+    parser.feed(output)
+    return parser.close()
+
+
+def crash_report(path, testcase, report):
+    frames = [tuple(frame) for frame in report['frames']]
+    major_hash, minor_hash = hashes(report['bug_type'], frames)
+    description = report['bug_type']
+    if description == "SEGV" and report['address'] is not None and int(report['address'], 16) < NEAR_NULL:
+        description += "NearNull"
+    location = ([function for function, location in frames if not SKIPPED_FRAMES.match(function)] + ["unknown"])[0]
+    lines = ["Crash Report",
+             "Program: " + path,
+             "Testcase: " + testcase,
+             "Sanitizer: " + report['tool'],
+             "Bug Type: " + report['bug_type'],
+             "Access: " + (report['access'] or "unknown") + " at " + (report['address'] or "unknown"),
+             ""] + report['text'] + \
+            ["",
+             "Exploitability Classification: " + ("PROBABLY_NOT_EXPLOITABLE" if description.endswith("NearNull")
+                                                  else "UNKNOWN"),
+             "Recommended Bug Title: " + description + " starting at " + location + " (Hash=0x" + major_hash +
+             ".0x" + minor_hash + ")",
+             "Short Description: " + description]
+    crash_report = "\r\n".join(lines) + "\r\n"
+    #  The reports are written and sent as byte strings like the ones of the debuggers
+    return crash_report.encode("utf-8") if isinstance(crash_report, unicode) else crash_report
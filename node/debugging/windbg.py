@@ -3,8 +3,10 @@ import logging
 import subprocess
 import psutil
 import os
+import sys
 from optparse import OptionParser
 from time import sleep
+from report import write_report
 
 __author__ = 'susperius'
 
@@ -114,9 +116,7 @@ if __name__ == "__main__":
             crash_report += dbg.issue_dbg_command(u"kb")
             crash_report += "\r\n"
             crash_report += dbg.involve_msec()
-            with open("tmp_crash_report", 'a+') as fd:
-                fd.write(crash_report)
-            print crash_report
+            write_report(sys.stdout, crash_report)
     elif options.attach is not None:
         dbg = Debugger()
         dbg.attach_to_pid(int(options.attach))
@@ -130,7 +130,5 @@ if __name__ == "__main__":
             crash_report += dbg.issue_dbg_command(u"kb")
             crash_report += "\r\n"
             crash_report += dbg.involve_msec()
-            with open("tmp_crash_report", 'a+') as fd:
-                fd.write(crash_report)
-            print crash_report
+            write_report(sys.stdout, crash_report)
         pass
@@ -0,0 +1,3 @@
+__author__ = 'susperius'
+
+__all__ = ['executor', 'executors', 'forkserver', 'linux', 'pyfuzzdbg', 'signatures', 'timeout']
@@ -0,0 +1,107 @@
+__author__ = 'susperius'
+
+"""
+Abstract class used to implement own executors, an executor runs the program under test on one testcase.
+The workers only talk to executors, so a program can be tested by the Windows debugger extension as well as by a
+plain process on Linux.
+"""
+
+OUTCOME_OK = "ok"
+OUTCOME_CRASH = "crash"
+OUTCOME_TIMEOUT = "timeout"
+
+COMPLETION_GRACE = 0.5  # seconds a page may still crash (e.g. while reloading) after its completion beacon
+
+
+class ExecutionResult:
+    def __init__(self, outcome, code=0, description="", duration=0.0, rusage=None, completed=False,
+                 signature=None, report="", coverage=None):
+        self._outcome = outcome
+        self._code = code
+        self._description = description
+        self._duration = duration
+        self._rusage = rusage if rusage is not None else {}
+        self._completed = completed
+        self._signature = signature
+        self._report = report
+        self._coverage = coverage
+
+    @property
+    def outcome(self):
+        return self._outcome
+
+    @property
+    def crashed(self):
+        return self._outcome == OUTCOME_CRASH
+
+    @property
+    def code(self):
+        #  Exception code (Windows) or signal number (Linux) of a crash, else the exit code
+        return self._code
+
+    @property
+    def description(self):
+        return self._description
+
+    @property
+    def duration(self):
+        return self._duration
+
+    @property
+    def rusage(self):
+        #  {'utime': s, 'stime': s, 'maxrss': KB, 'minflt': n, 'majflt': n, 'nvcsw': n, 'nivcsw': n} if available
+        return self._rusage
+
+    @property
+    def completed(self):
+        #  True if the testcase reported its completion before the time was over
+        return self._completed
+
+    @property
+    def signature(self):
+        #  Cheap signature of a crash (see signatures.py), None if the executor can't give one
+        return self._signature
+
+    @property
+    def report(self):
+        #  Complete crash report of the run itself (e.g. from a sanitizer), "" if the crash needs to be verified
+        return self._report
+
+    @property
+    def coverage(self):
+        #  Edge map of the run (see fuzzing/corpus.py) if the executor collects coverage, else None
+        return self._coverage
+
+
+class Executor:
+    NAME = ""
+    COOL_DOWN = 0  # seconds to wait after a run which didn't report its completion
+
+    def __init__(self, program, working_directory=None):
+        self._program = program
+        #  The program runs in there, None: the working directory of the node
+        self._working_directory = working_directory
+
+    @property
+    def program(self):
+        return self._program
+
+    @property
+    def working_directory(self):
+        return self._working_directory
+
+    def execute(self, target, timeout, completion=None, grace=COMPLETION_GRACE):
+        #  Runs the program on target (file path or url) for at most timeout seconds (float) and returns an
+        #  ExecutionResult.
+        #  If a completion event is given, the run ends grace seconds after it was set.
+        raise NotImplementedError("ABSTRACT METHOD")
+
+    def verify(self, target, timeout):
+        #  Runs a crashing target again under full triage and returns the crash report, "" if it didn't crash again
+        raise NotImplementedError("ABSTRACT METHOD")
+
+    def kill(self):
+        raise NotImplementedError("ABSTRACT METHOD")
+
+    def close(self):
+        pass
@@ -0,0 +1,20 @@
+__author__ = 'susperius'
+
+import forkserver
+import linux
+
+"""
+If you want to implement a new executor just inherit from the Executor Class and implement the abstract methods.
+After this add a column for your executor, a program chooses its executor by the executor attribute in the node
+config (default: pyfuzzdbg). The PyFuzzDbg extension is only there on Windows nodes.
+"""
+#  EXECUTORS = {ExecutorName: CONSTRUCTOR()}
+EXECUTORS = {linux.LinuxExecutor.NAME: linux.LinuxExecutor,
+             forkserver.ForkserverExecutor.NAME: forkserver.ForkserverExecutor}
+try:
+    import pyfuzzdbg
+    EXECUTORS[pyfuzzdbg.PyFuzzDbgExecutor.NAME] = pyfuzzdbg.PyFuzzDbgExecutor
+except ImportError:
+    pass
+
+DEFAULT_EXECUTOR = "pyfuzzdbg"
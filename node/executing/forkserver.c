@@ -0,0 +1,196 @@
+/*
+ * Fork server for programs without AFL instrumentation, loaded with LD_PRELOAD by the ForkserverExecutor.
+ * The constructor runs after the dynamic linking, says hello on fd 199 and then forks a fresh child for every
+ * 4 bytes it reads from fd 198: the child pid and later its wait status go back on fd 199 (AFL protocol).
+ * Started by anyone else the hello fails and the program just runs.
+ * Programs built with -fsanitize-coverage=trace-pc-guard (clang) or trace-pc (gcc) get their callbacks from here,
+ * they count the edges into the AFL map in the shared memory segment __AFL_SHM_ID (if the executor wants coverage).
+ * A fatal signal writes the top frames of the faulting thread to stderr, in the frame format of the sanitizers
+ * ("#0 0x7f12... (/usr/lib/libfoo.so+0x1a2b)"), so the executors get a signature of the crash without a debugger.
+ * Programs which handle the signals themselves (sanitizers, crash reporters) keep their handlers.
+ * Build: cc -O2 -shared -fPIC -o libforkserver.so forkserver.c (done by the executor on first use)
+ */
+#define _GNU_SOURCE
+#include <dlfcn.h>
+#include <execinfo.h>
+#include <signal.h>
+#include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/shm.h>
+#include <sys/types.h>
+#include <sys/wait.h>
+#include <ucontext.h>
+#include <unistd.h>
+
+#define FORKSRV_FD 198
+#define MAP_SIZE (1 << 16)
+#define FAULT_FRAMES 16
+#define FAULT_STACK_SIZE 65536
+
+static unsigned char dummy_map[MAP_SIZE];  /* edges are counted somewhere until the real map is there */
+static unsigned char *coverage_map = dummy_map;
+static uintptr_t previous_location;
+static uint32_t guards;
+static const int fatal_signals[] = {SIGSEGV, SIGBUS, SIGILL, SIGABRT, SIGFPE};
+static char fault_stack[FAULT_STACK_SIZE];  /* the handler must run on a stack overflow, too */
+
+static void attach_coverage_map(void) {
+    char *shm_id = getenv("__AFL_SHM_ID");
+    void *map;
+
+    if (!shm_id)
+        return;
+    map = shmat(atoi(shm_id), NULL, 0);
+    if (map != (void *)-1)
+        coverage_map = map;
+}
+
+void __sanitizer_cov_trace_pc_guard_init(uint32_t *start, uint32_t *stop) {
+    if (start == stop || *start)
+        return;
+    for (; start < stop; start++)
+        *start = ++guards % (MAP_SIZE - 1) + 1;
+}
+
+void __sanitizer_cov_trace_pc_guard(uint32_t *guard) {
+    coverage_map[*guard]++;
+}
+
+void __sanitizer_cov_trace_pc(void) {
+    /* Edge of the previous and the actual location, like AFL */
+    uintptr_t location = (uintptr_t)__builtin_return_address(0);
+
+    coverage_map[(location ^ previous_location) % MAP_SIZE]++;
+    previous_location = location >> 1;
+}
+
+/* Only async signal safe calls below, so no stdio */
+static size_t append(char *line, size_t length, const char *text) {
+    while (*text && length < 255)
+        line[length++] = *text++;
+    return length;
+}
+
+static size_t append_hex(char *line, size_t length, uintptr_t value) {
+    char digits[2 * sizeof(value)];
+    int count = 0;
+
+    do {
+        digits[count++] = "0123456789abcdef"[value & 0xf];
+        value >>= 4;
+    } while (value);
+    length = append(line, length, "0x");
+    while (count && length < 255)
+        line[length++] = digits[--count];
+    return length;
+}
+
+static uintptr_t fault_pc(void *context) {
+    ucontext_t *uc = context;
+
+#if defined(__x86_64__)
+    return uc->uc_mcontext.gregs[REG_RIP];
+#elif defined(__i386__)
+    return uc->uc_mcontext.gregs[REG_EIP];
+#elif defined(__aarch64__)
+    return uc->uc_mcontext.pc;
+#else
+    (void)uc;
+    return 0;
+#endif
+}
+
+static void fault_handler(int sig, siginfo_t *info, void *context) {
+    void *frames[FAULT_FRAMES];
+    uintptr_t pc = fault_pc(context);
+    int count = backtrace(frames, FAULT_FRAMES);
+    int first = 0, i;
+    char line[256];
+    size_t length;
+    Dl_info module;
+
+    (void)info;
+    /* The frames of the handler and the signal trampoline come first, the stack of the program starts at the pc */
+    for (i = 0; i < count; i++) {
+        if ((uintptr_t)frames[i] == pc) {
+            first = i;
+            break;
+        }
+    }
+    if (i == count && pc) {
+        frames[0] = (void *)pc;
+        count = 1;
+    }
+    for (i = first; i < count; i++) {
+        char number[] = {'0' + (i - first) / 10, '0' + (i - first) % 10, ' ', 0};
+
+        length = append(line, 0, "    #");
+        length = append(line, length, number);
+        length = append_hex(line, length, (uintptr_t)frames[i]);
+        if (dladdr(frames[i], &module) && module.dli_fname && *module.dli_fname) {
+            length = append(line, length, " (");
+            length = append(line, length, module.dli_fname);
+            length = append(line, length, "+");
+            length = append_hex(line, length, (uintptr_t)frames[i] - (uintptr_t)module.dli_fbase);
+            length = append(line, length, ")");
+        }
+        line[length++] = '\n';
+        if (write(2, line, length) < 0)
+            break;
+    }
+    /* SA_RESETHAND restored the default action, the signal is blocked until the handler returns */
+    raise(sig);
+}
+
+static void install_fault_handler(void) {
+    struct sigaction action, previous;
+    stack_t stack;
+    void *warm_up[1];
+    size_t i;
+
+    backtrace(warm_up, 1);  /* loads the unwinder now, not in the handler */
+    stack.ss_sp = fault_stack;
+    stack.ss_size = sizeof(fault_stack);
+    stack.ss_flags = 0;
+    sigaltstack(&stack, NULL);
+    memset(&action, 0, sizeof(action));
+    action.sa_sigaction = fault_handler;
+    action.sa_flags = SA_SIGINFO | SA_RESETHAND | SA_ONSTACK;
+    sigemptyset(&action.sa_mask);
+    for (i = 0; i < sizeof(fatal_signals) / sizeof(*fatal_signals); i++) {
+        if (sigaction(fatal_signals[i], NULL, &previous) == 0 && previous.sa_handler == SIG_DFL)
+            sigaction(fatal_signals[i], &action, NULL);
+    }
+}
+
+__attribute__((constructor)) static void forkserver(void) {
+    int status = 0;
+    pid_t child;
+
+    unsetenv("LD_PRELOAD");  /* no fork servers in the processes the program starts itself */
+    install_fault_handler();
+    attach_coverage_map();
+    if (write(FORKSRV_FD + 1, &status, 4) != 4)
+        return;
+    for (;;) {
+        if (read(FORKSRV_FD, &status, 4) != 4)
+            _exit(0);
+        child = fork();
+        if (child < 0)
+            _exit(1);
+        if (!child) {
+            setpgid(0, 0);  /* a timeout kills the child together with whatever it started */
+            close(FORKSRV_FD);
+            close(FORKSRV_FD + 1);
+            previous_location = 0;
+            return;
+        }
+        if (write(FORKSRV_FD + 1, &child, 4) != 4)
+            _exit(1);
+        if (waitpid(child, &status, 0) < 0)
+            _exit(1);
+        if (write(FORKSRV_FD + 1, &status, 4) != 4)
+            _exit(1);
+    }
+}
@@ -0,0 +1,231 @@
+import ctypes
+import ctypes.util
+import gevent
+import gevent.os
+import gevent.subprocess
+import os
+import shutil
+import signal
+import struct
+import tempfile
+import time
+from debugging.sanitizer import SanitizerParser, ENVIRONMENT
+from fuzzing.corpus import MAP_SIZE
+from executor import Executor, ExecutionResult, OUTCOME_OK, OUTCOME_CRASH, OUTCOME_TIMEOUT, COMPLETION_GRACE
+from linux import LinuxExecutor, FATAL_SIGNALS
+from shim import build_shim
+from signatures import stack_signature
+
+__author__ = 'susperius'
+
+"""
+Fork server executor for file format programs on Linux: the program is started once, stopped right after its
+dynamic linking and forks a fresh child per testcase (AFL fork server protocol over the fds 198/199). Programs
+without AFL instrumentation get the protocol from the libforkserver.so shim (LD_PRELOAD, see shim.py).
+The testcase is copied into a fixed input file (on /dev/shm if there), which is the argument of every child.
+The stderr output of the children goes into a file next to the input file, a sanitizer report in there is a crash
+with a complete report. Every other crash is verified by the LinuxExecutor in a fresh process, its signature are the
+top frames the fault handler of the shim wrote to stderr.
+With the coverage attribute the children count their edges into a shared memory map (AFL layout, __AFL_SHM_ID), the
+map is part of the result of every run. The program runs without address randomization then, so the edges of the
+gcc trace-pc callback stay the same after a restart of the fork server.
+"""
+
+FORKSRV_FD = 198
+SHM_DIRECTORY = "/dev/shm"
+CHUNK_SIZE = 65536
+STDERR_TAIL = 8192
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_EXCL = 0o2000
+IPC_RMID = 0
+ADDR_NO_RANDOMIZE = 0x0040000
+START_TIMEOUT = 10  # seconds the program may need until the fork server says hello
+
+
+class CoverageMap:
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._libc.shmat.restype = ctypes.c_void_p
+        self._libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        self._libc.shmdt.argtypes = [ctypes.c_void_p]
+        self._id = self._libc.shmget(IPC_PRIVATE, MAP_SIZE, IPC_CREAT | IPC_EXCL | 0o600)
+        if self._id < 0:
+            raise OSError(ctypes.get_errno(), "Can't create the coverage map")
+        self._address = self._libc.shmat(self._id, None, 0)
+        #  Marked for removal right away, it goes with the last process which has it attached; Linux still lets the
+        #  fork server attach it
+        self._libc.shmctl(self._id, IPC_RMID, None)
+        if self._address == ctypes.c_void_p(-1).value:
+            raise OSError(ctypes.get_errno(), "Can't attach the coverage map")
+
+    @property
+    def shm_id(self):
+        return self._id
+
+    def clear(self):
+        ctypes.memset(self._address, 0, MAP_SIZE)
+
+    def read(self):
+        return ctypes.string_at(self._address, MAP_SIZE)
+
+    def close(self):
+        self._libc.shmdt(self._address)
+
+
+class ForkserverExecutor(Executor):
+    NAME = "forkserver"
+
+    def __init__(self, program, working_directory=None):
+        Executor.__init__(self, program, working_directory)
+        self._linux_executor = LinuxExecutor(program, working_directory)
+        self._server = None
+        self._control_fd = None
+        self._status_fd = None
+        self._child = None
+        self._input_file = None
+        self._stderr = None
+        self._coverage = CoverageMap() if program.get('coverage') in (True, "True") else None
+
+    def execute(self, target, timeout, completion=None, grace=COMPLETION_GRACE):
+        #  File format programs have no completion, the run ends with the child
+        if self._server is None or self._server.poll() is not None:
+            self.__start_server(os.path.splitext(target)[1])
+        shutil.copyfile(target, self._input_file)
+        os.ftruncate(self._stderr.fileno(), 0)
+        if self._coverage is not None:
+            self._coverage.clear()
+        start = time.time()
+        try:
+            os.write(self._control_fd, struct.pack("I", 0))
+            self._child = self.__read_int(START_TIMEOUT)
+        except (OSError, gevent.Timeout):
+            self.__stop_server()
+            raise OSError("The fork server of " + self._program['path'] + " died")
+        timed_out = False
+        try:
+            status = self.__read_int(timeout)
+        except gevent.Timeout:
+            timed_out = True
+            self.kill()
+            status = self.__read_int(START_TIMEOUT)
+        duration = time.time() - start
+        self._child = None
+        sanitizer = self.__parse_stderr()
+        if sanitizer is not None:
+            code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else os.WTERMSIG(status)
+            return self._linux_executor.sanitizer_result(target, sanitizer, code, duration)
+        if os.WIFSIGNALED(status) and os.WTERMSIG(status) in FATAL_SIGNALS.keys() and not timed_out:
+            description = FATAL_SIGNALS[os.WTERMSIG(status)]
+            return ExecutionResult(OUTCOME_CRASH, os.WTERMSIG(status), description, duration,
+                                   signature=stack_signature(description, self.__stderr_tail()))
+        if timed_out:
+            return ExecutionResult(OUTCOME_TIMEOUT, signal.SIGKILL, duration=duration)
+        code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else os.WTERMSIG(status)
+        return ExecutionResult(OUTCOME_OK, code, duration=duration,
+                               coverage=self._coverage.read() if self._coverage is not None else None)
+
+    def verify(self, target, timeout):
+        return self._linux_executor.verify(target, timeout)
+
+    def kill(self):
+        if self._child is not None:
+            try:
+                os.killpg(self._child, signal.SIGKILL)
+            except OSError:  # instrumented programs don't put their children into an own group
+                try:
+                    os.kill(self._child, signal.SIGKILL)
+                except OSError:
+                    pass
+
+    def close(self):
+        self.__stop_server()
+        self._linux_executor.close()
+        if self._coverage is not None:
+            self._coverage.close()
+            self._coverage = None
+
+    def __start_server(self, extension):
+        self.__stop_server()
+        shim = build_shim()
+        directory = SHM_DIRECTORY if os.path.isdir(SHM_DIRECTORY) else self._working_directory
+        fd, self._input_file = tempfile.mkstemp(prefix="pyfuzz2_input_", suffix=extension, dir=directory)
+        os.close(fd)
+        control_read, self._control_fd = os.pipe()
+        self._status_fd, status_write = os.pipe()
+
+        def forkserver_fds():
+            os.dup2(control_read, FORKSRV_FD)
+            os.dup2(status_write, FORKSRV_FD + 1)
+            os.setpgrp()
+            if self._coverage is not None:
+                ctypes.CDLL(None).personality(ADDR_NO_RANDOMIZE)
+
+        env = dict(os.environ)
+        for name, value in ENVIRONMENT.items():
+            env.setdefault(name, value)
+        env['LD_PRELOAD'] = shim
+        if self._coverage is not None:
+            env['__AFL_SHM_ID'] = str(self._coverage.shm_id)
+        #  Append mode, so the children write at the start again after the file was truncated
+        self._stderr = open(self._input_file + ".stderr", "a+b")
+        with open(os.devnull, "r+b") as devnull:
+            self._server = gevent.subprocess.Popen(self._linux_executor.argv(self._input_file), stdin=devnull,
+                                                   stdout=devnull, stderr=self._stderr, cwd=self._working_directory,
+                                                   env=env, preexec_fn=forkserver_fds)
+        os.close(control_read)
+        os.close(status_write)
+        gevent.os.make_nonblocking(self._status_fd)
+        try:
+            self.__read_int(START_TIMEOUT)
+        except (OSError, gevent.Timeout):
+            self.__stop_server()
+            raise OSError("No fork server hello from " + self._program['path'])
+
+    def __stop_server(self):
+        if self._server is not None:
+            try:
+                os.killpg(self._server.pid, signal.SIGKILL)
+            except OSError:
+                pass
+            self._server.wait()
+            self._server = None
+        for fd in (self._control_fd, self._status_fd):
+            if fd is not None:
+                os.close(fd)
+        self._control_fd = None
+        self._status_fd = None
+        if self._input_file is not None and os.path.exists(self._input_file):
+            os.remove(self._input_file)
+        if self._stderr is not None:
+            self._stderr.close()
+            os.remove(self._stderr.name)
+        self._input_file = None
+        self._stderr = None
+
+    def __parse_stderr(self):
+        if os.fstat(self._stderr.fileno()).st_size == 0:
+            return None
+        parser = SanitizerParser()
+        with open(self._stderr.name, "rb") as fd:
+            for chunk in iter(lambda: fd.read(CHUNK_SIZE), ""):
+                parser.feed(chunk.decode("utf-8", "replace"))
+                if parser.finished:
+                    break
+        return parser.close()
+
+    def __stderr_tail(self):
+        with open(self._stderr.name, "rb") as fd:
+            fd.seek(0, os.SEEK_END)
+            fd.seek(max(0, fd.tell() - STDERR_TAIL))
+            return fd.read().decode("utf-8", "replace")
+
+    def __read_int(self, timeout):
+        data = ""
+        with gevent.Timeout(timeout):
+            while len(data) < 4:
+                chunk = gevent.os.nb_read(self._status_fd, 4 - len(data))
+                if not chunk:
+                    raise OSError("Fork server pipe closed")
+                data += chunk
+        return struct.unpack("I", data)[0]
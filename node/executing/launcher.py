@@ -0,0 +1,110 @@
+import errno
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from debugging.sanitizer import SanitizerParser, ENVIRONMENT
+
+__author__ = 'susperius'
+
+"""
+Process launcher of the LinuxExecutor, it runs as a plain process without gevent: the event loop of the node reaps
+every child on SIGCHLD, so only a process which waits for its children itself gets their rusage (os.wait4).
+Protocol, one JSON object per line:
+    request  {"argv": [...], "timeout": seconds, "cwd": working directory or null, "preload": library or null}
+    answer   {"pid": pid} as soon as the program runs (or {"error": message}), then
+             {"status": .., "timed_out": .., "duration": .., "rusage": {..}, "stderr": tail of stderr,
+              "sanitizer": first sanitizer report in stderr (see debugging/sanitizer.py) or null}
+Every program runs in its own process group, so a timeout or the node can kill it together with its children.
+The whole stderr output goes through the sanitizer parser here, so a long report doesn't have to fit into the tail.
+"""
+
+STDERR_TAIL = 8192
+CHUNK_SIZE = 65536
+
+
+class Launcher:
+    def __init__(self, out):
+        self._out = out
+        self._pid = None
+        self._timed_out = False
+        self._stderr = tempfile.TemporaryFile()
+        self._devnull = open(os.devnull, "r+b")
+        signal.signal(signal.SIGALRM, self.__timeout)
+
+    def __timeout(self, signum, frame):
+        if self._pid is not None:
+            self._timed_out = True
+            self.__kill_group(self._pid)
+
+    @staticmethod
+    def __kill_group(pid):
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    def __answer(self, answer):
+        self._out.write(json.dumps(answer) + "\n")
+        self._out.flush()
+
+    def run(self, argv, timeout, cwd=None, preload=None):
+        self._stderr.seek(0)
+        self._stderr.truncate()
+        self._timed_out = False
+        env = None
+        if preload is not None:
+            env = dict(os.environ)
+            env['LD_PRELOAD'] = preload
+        start = time.time()
+        try:
+            proc = subprocess.Popen(argv, stdin=self._devnull, stdout=self._devnull, stderr=self._stderr,
+                                    cwd=cwd, env=env, preexec_fn=os.setpgrp)
+        except OSError as ex:
+            self.__answer({'error': str(ex)})
+            return
+        self._pid = proc.pid
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+        self.__answer({'pid': proc.pid})
+        while True:
+            try:
+                pid, status, rusage = os.wait4(proc.pid, 0)
+                break
+            except OSError as ex:
+                if ex.errno != errno.EINTR:
+                    raise
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        duration = time.time() - start
+        self._pid = None
+        proc.returncode = status
+        self.__kill_group(pid)  # whatever the program left behind
+        sanitizer = self.__parse_stderr()
+        self._stderr.seek(0, os.SEEK_END)
+        self._stderr.seek(max(0, self._stderr.tell() - STDERR_TAIL))
+        self.__answer({'status': status, 'timed_out': self._timed_out, 'duration': duration,
+                       'rusage': {'utime': rusage.ru_utime, 'stime': rusage.ru_stime, 'maxrss': rusage.ru_maxrss,
+                                  'minflt': rusage.ru_minflt, 'majflt': rusage.ru_majflt,
+                                  'nvcsw': rusage.ru_nvcsw, 'nivcsw': rusage.ru_nivcsw},
+                       'stderr': self._stderr.read().decode("utf-8", "replace"), 'sanitizer': sanitizer})
+
+    def __parse_stderr(self):
+        parser = SanitizerParser()
+        self._stderr.seek(0)
+        for chunk in iter(lambda: self._stderr.read(CHUNK_SIZE), ""):
+            parser.feed(chunk.decode("utf-8", "replace"))
+            if parser.finished:
+                break
+        return parser.close()
+
+
+if __name__ == "__main__":
+    for name, value in ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+    launcher = Launcher(sys.stdout)
+    for line in iter(sys.stdin.readline, ""):
+        request = json.loads(line)
+        launcher.run(request['argv'], request['timeout'], request.get('cwd'), request.get('preload'))
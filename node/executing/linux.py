@@ -0,0 +1,173 @@
+import gevent
+import gevent.subprocess
+import hashlib
+import json
+import logging
+import os
+import re
+import shlex
+import signal
+import sys
+from debugging.gdb import GDB
+from debugging.report import read_report
+from debugging.sanitizer import crash_report as sanitizer_report
+from shim import build_shim
+from signatures import stack_signature, FRAMES
+from executor import Executor, ExecutionResult, OUTCOME_OK, OUTCOME_CRASH, OUTCOME_TIMEOUT, COMPLETION_GRACE
+
+__author__ = 'susperius'
+
+"""
+Linux executor: the program is a plain process, a fatal signal is a crash and every run comes with its rusage.
+The processes are started by launcher.py, which waits for them with os.wait4 and enforces the timeout. They get the
+fault handler of libforkserver.so (shim.py) preloaded, the top frames it writes to stderr are the signature of a crash.
+The program path may contain arguments, @@ is replaced by the testcase, without @@ the testcase is appended.
+A sanitizer report in the stderr output is a crash, its report is complete right away, there is no second run.
+Another crash is triaged under gdb (debugging/gdb.py) if it is installed, else the report only knows signal and stderr.
+"""
+
+#  Built from the names, so the registry can still import this module on Windows nodes
+FATAL_SIGNALS = dict((getattr(signal, name), name) for name in ("SIGSEGV", "SIGBUS", "SIGILL", "SIGABRT", "SIGFPE")
+                     if hasattr(signal, name))
+
+LAUNCHER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "launcher.py")
+GDB_TRIAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "debugging", "gdb.py")
+TRIAGE_FACTOR = 3  # gdb loads the symbols first, so the triage may take longer than a run
+TRIAGE_GRACE = 5
+
+
+class LinuxExecutor(Executor):
+    NAME = "linux"
+
+    def __init__(self, program, working_directory=None):
+        Executor.__init__(self, program, working_directory)
+        self._logger = logging.getLogger(__name__)
+        self._argv = shlex.split(program['path'])
+        self._launcher = None
+        self._pid = None
+        try:
+            self._preload = build_shim()
+        except (OSError, gevent.subprocess.CalledProcessError) as ex:
+            self._logger.warning("Can't build the fault handler shim, crashes without sanitizer have no signature -> " +
+                                 str(ex))
+            self._preload = None
+
+    def argv(self, target):
+        if "@@" in self._argv:
+            return [target if arg == "@@" else arg for arg in self._argv]
+        return self._argv + [target]
+
+    def execute(self, target, timeout, completion=None, grace=COMPLETION_GRACE):
+        return self.__run(target, timeout, completion, grace)[0]
+
+    def verify(self, target, timeout):
+        result, stderr = self.__run(target, timeout, None, 0)
+        if not result.crashed:
+            return ""
+        if result.report:
+            return result.report
+        if GDB is not None:
+            crash_report = self.__triage(target, timeout * TRIAGE_FACTOR)
+            if crash_report:
+                return crash_report
+        #  No gdb or the crash didn't show up under gdb
+        return self.__crash_report(target, result, stderr)
+
+    def kill(self):
+        if self._pid is not None:
+            try:
+                os.killpg(self._pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+    def close(self):
+        if self._launcher is not None:
+            self._launcher.stdin.close()
+            self._launcher.wait()
+            self._launcher = None
+
+    def __run(self, target, timeout, completion, grace):
+        if self._launcher is None or self._launcher.poll() is not None:
+            self._launcher = gevent.subprocess.Popen([sys.executable, LAUNCHER], stdin=gevent.subprocess.PIPE,
+                                                     stdout=gevent.subprocess.PIPE)
+        self._launcher.stdin.write(json.dumps({'argv': self.argv(target), 'timeout': float(timeout),
+                                              'cwd': self._working_directory, 'preload': self._preload}) + "\n")
+        self._launcher.stdin.flush()
+        started = self.__read_answer()
+        if 'error' in started:
+            raise OSError("Can't start " + self._program['path'] + " -> " + started['error'])
+        self._pid = started['pid']
+        if completion is None:
+            answer = self.__read_answer()
+        else:
+            reader = gevent.spawn(self.__read_answer)
+            gevent.wait([reader, completion], count=1)
+            if not reader.ready():
+                gevent.sleep(grace)
+                if not reader.ready():
+                    self.kill()
+            answer = reader.get()
+        self._pid = None
+        status = answer['status']
+        completed = completion is not None and completion.is_set()
+        if answer['sanitizer'] is not None:
+            code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else os.WTERMSIG(status)
+            return self.sanitizer_result(target, answer['sanitizer'], code, answer['duration'], answer['rusage'],
+                                         completed), answer['stderr']
+        if os.WIFSIGNALED(status) and os.WTERMSIG(status) in FATAL_SIGNALS.keys() and not answer['timed_out']:
+            outcome, code, description = OUTCOME_CRASH, os.WTERMSIG(status), FATAL_SIGNALS[os.WTERMSIG(status)]
+        elif answer['timed_out']:
+            outcome, code, description = OUTCOME_TIMEOUT, signal.SIGKILL, ""
+        else:
+            code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else os.WTERMSIG(status)
+            outcome, description = OUTCOME_OK, ""
+        signature = stack_signature(description, answer['stderr']) if outcome == OUTCOME_CRASH else None
+        return ExecutionResult(outcome, code, description, answer['duration'], answer['rusage'], completed,
+                               signature), answer['stderr']
+
+    def sanitizer_result(self, target, sanitizer, code, duration, rusage=None, completed=False):
+        #  A run with a sanitizer report (see debugging/sanitizer.py) is a crash whatever its exit status was
+        frames = [function for function, location in sanitizer['frames'][:FRAMES]]
+        signature = " ".join([sanitizer['bug_type']] + frames) if frames else None
+        return ExecutionResult(OUTCOME_CRASH, code, sanitizer['bug_type'], duration, rusage, completed, signature,
+                               sanitizer_report(self._program['path'], target, sanitizer))
+
+    def __triage(self, target, timeout):
+        proc = gevent.subprocess.Popen([sys.executable, GDB_TRIAGE, "-p", self._program['path'], "-t", target,
+                                        "-T", str(timeout)], stdout=gevent.subprocess.PIPE,
+                                       cwd=self._working_directory)
+        report = None
+        #  gdb.py ends the triage after timeout by itself, the kill is only the last resort
+        with gevent.Timeout(timeout + TRIAGE_GRACE, False):
+            report = read_report(proc.stdout)
+        try:
+            proc.kill()
+        except OSError:
+            pass
+        proc.wait()
+        return report['report'].encode("utf-8") if report is not None else ""
+
+    def __read_answer(self):
+        line = self._launcher.stdout.readline()
+        if not line:
+            self._launcher = None
+            raise OSError("The launcher of " + self._program['path'] + " died")
+        return json.loads(line)
+
+    def __crash_report(self, target, result, stderr):
+        #  Without a stack the major hash only knows the signal, the minor one the stderr output without addresses
+        major_hash = hashlib.md5(os.path.basename(self._argv[0]) + result.description).hexdigest()[:8]
+        minor_hash = hashlib.md5(re.sub(r"0x[0-9a-fA-F]+|\d+", "", stderr.encode("utf-8"))).hexdigest()[:8]
+        lines = ["Crash Report",
+                 "Program: " + self._program['path'],
+                 "Testcase: " + target,
+                 "Signal: %s (%d)" % (result.description, result.code),
+                 "Duration: %.3f s" % result.duration,
+                 "Max RSS: %d KB" % result.rusage.get('maxrss', 0),
+                 ""] + stderr.encode("utf-8").splitlines() + \
+                ["",
+                 "Exploitability Classification: UNKNOWN",
+                 "Recommended Bug Title: Fatal signal " + result.description + " in " +
+                 os.path.basename(self._argv[0]) + " (Hash=0x" + major_hash + ".0x" + minor_hash + ")",
+                 "Short Description: " + result.description]
+        return "\r\n".join(lines) + "\r\n"
@@ -0,0 +1,104 @@
+import gevent
+import gevent.subprocess
+import math
+import os
+import psutil
+import time
+import debugging.PyFuzzDbg as PyFuzzDbg
+from debugging.report import read_report
+from executor import Executor, ExecutionResult, OUTCOME_OK, OUTCOME_CRASH, OUTCOME_TIMEOUT, COMPLETION_GRACE
+
+__author__ = 'susperius'
+
+"""
+Windows executor: the program is started by the PyFuzzDbg extension with DEBUG_PROCESS, which returns 0 if nothing
+happens else the exception code. Only a crash is run again under the whole Windows Debug Engine (windbg.py), which
+sends its report back over its stdout, so the verification ends as soon as the report is there.
+The debugger always waits in the gevent threadpool, so the executors of several slots run side by side.
+"""
+
+WINDBG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "debugging", "windbg.py")
+
+INTERESTING_EXCEPTIONS = {0x80000001: "GUARD_PAGE_VIOLATION",
+                          0x80000005: "BUFFER_OVERFLOW",
+                          0xC0000005: "ACCESS_VIOLATION",
+                          0xC000001D: "ILLEGAL_INSTRUCTION",
+                          0xC0000144: "UNHANDLED_EXCEPTION",
+                          0xC0000409: "STACK_BUFFER_OVERRUN",
+                          0xC0000602: "UNKNOWN_EXCEPTION",
+                          0xC00000FD: "STACK_OVERFLOW",
+                          0XC000009D: "PRIVILEGED_INSTRUCTION"}
+
+
+class PyFuzzDbgExecutor(Executor):
+    NAME = "pyfuzzdbg"
+    COOL_DOWN = 1
+
+    def __init__(self, program, working_directory=None):
+        Executor.__init__(self, program, working_directory)
+        self._target = None
+        self._processes = []
+        self._DEVNULL = os.open(os.devnull, os.O_RDWR)
+
+    def execute(self, target, timeout, completion=None, grace=COMPLETION_GRACE):
+        seconds = max(1, int(math.ceil(timeout)))  # the extension only knows whole seconds
+        pyfuzzdbg = PyFuzzDbg.Debugger(seconds)
+        pyfuzzdbg.set_app_name(unicode(self._program['path'] + " \"" + target + "\"\x00\x00"))
+        start = time.time()
+        self._target = target
+        result = gevent.get_hub().threadpool.spawn(pyfuzzdbg.start_test)
+        if completion is not None:
+            #  The completion can end the test before the timeout: the program is killed and the debugger returns
+            gevent.wait([result, completion], count=1)
+            if not result.ready():
+                gevent.sleep(grace)
+                if not result.ready():
+                    self.kill()
+        return_code = result.get()
+        self._target = None
+        duration = time.time() - start
+        completed = completion is not None and completion.is_set()
+        if return_code in INTERESTING_EXCEPTIONS.keys():
+            #  The extension only returns the exception code, too little for a signature
+            return ExecutionResult(OUTCOME_CRASH, return_code, INTERESTING_EXCEPTIONS[return_code], duration,
+                                   completed=completed)
+        outcome = OUTCOME_OK if completed or duration < seconds else OUTCOME_TIMEOUT
+        return ExecutionResult(outcome, return_code, duration=duration, completed=completed)
+
+    def verify(self, target, timeout):
+        #  Just involve the whole Windows Debug Engine if a crash appeared else just save the resources.
+        proc = gevent.subprocess.Popen(
+            "python \"" + WINDBG + "\" -p \"" + self._program['path'] + "\" -t \"" + target + "\" -c True -X",
+            stdout=gevent.subprocess.PIPE, stderr=self._DEVNULL, cwd=self._working_directory)
+        self._processes.append(proc)
+        report = None
+        with gevent.Timeout(timeout, False):
+            report = read_report(proc.stdout)
+        self.__kill_processes()
+        return report['report'].encode("utf-8") if report is not None else ""
+
+    def kill(self):
+        #  Only the instance started for the actual target (and its children), the other slots run the same program
+        if self._target is None:
+            return
+        executable = os.path.basename(self._program['path']).lower()
+        for proc in psutil.Process(os.getpid()).children(recursive=True):
+            try:
+                if proc.name().lower() == executable and self._target in " ".join(proc.cmdline()):
+                    for child in proc.children(recursive=True):
+                        child.kill()
+                    proc.kill()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+
+    def close(self):
+        self.__kill_processes()
+        os.close(self._DEVNULL)
+
+    def __kill_processes(self):
+        for proc in self._processes:
+            try:
+                proc.kill()
+            except (psutil.NoSuchProcess, OSError):
+                pass
+        self._processes = []
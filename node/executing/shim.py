@@ -0,0 +1,20 @@
+import os
+import gevent.subprocess
+
+__author__ = 'susperius'
+
+"""
+libforkserver.so (see forkserver.c) is the fork server of the ForkserverExecutor and the fault handler which writes
+the top frames of a crash to stderr. The LinuxExecutor preloads it for the latter, outside of a fork server it does
+nothing else. It is built on first use and again whenever the source is newer.
+"""
+
+SHIM_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "forkserver.c")
+SHIM = os.path.join(os.path.dirname(os.path.abspath(__file__)), "libforkserver.so")
+
+
+def build_shim():
+    #  Returns the path of the shim, raises OSError or CalledProcessError if there is no working C compiler
+    if not os.path.isfile(SHIM) or os.path.getmtime(SHIM) < os.path.getmtime(SHIM_SOURCE):
+        gevent.subprocess.check_call(["cc", "-O2", "-shared", "-fPIC", "-o", SHIM, SHIM_SOURCE])
+    return SHIM
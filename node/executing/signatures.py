@@ -0,0 +1,93 @@
+import os
+import pickle
+import random
+import re
+
+__author__ = 'susperius'
+
+"""
+Node-local cache of known crashes: the cheap signature an executor gives a crash (exception code or signal plus the
+top frames) is mapped to the major hash the full triage found for it. The frames come from a sanitizer or from the
+fault handler of the Linux shim (module+offset), frames in the C runtime (abort, raise, ...) are skipped. A code or
+signal alone says nothing about the bug, so crashes without frames have no signature and are always triaged.
+A crash with a known signature is still counted as a duplicate of its major hash, only its triage is saved.
+A crash with a known signature is only triaged again at SAMPLE_RATE. If a sampled triage finds another major hash
+the signature isn't good enough to tell the crashes apart, it is marked ambiguous and always triaged from then on.
+"""
+
+SAMPLE_RATE = 0.05
+FRAMES = 3
+CACHE_FILE = "signature_cache.pickle"
+
+AMBIGUOUS = None
+
+#  Sanitizer frames: "#0 0x4f2a10 in function file.c:12" or without symbols "#0 0x4f2a10 (/path/program+0x2a10)"
+FRAME_PATTERN = re.compile(r"#\d+ 0x[0-9a-fA-F]+ (?:in (\S+)|\((\S+)\))")
+#  Modules of the C and C++ runtimes, e.g. an abort() shows up as libc.so.6+0x8aeec (pthread_kill) first
+SKIPPED_MODULES = re.compile(r"^(libc|libpthread|libstdc\+\+|libgcc_s|ld-linux[^.]*)[.-]")
+
+
+def stack_signature(description, output, frames=FRAMES):
+    #  description plus the top frames found in the output of the program, None if there are no frames
+    top = []
+    for match in FRAME_PATTERN.finditer(output):
+        frame = match.group(1) or os.path.basename(match.group(2))
+        if match.group(1) is None and SKIPPED_MODULES.match(frame):
+            continue
+        top.append(frame)
+        if len(top) == frames:
+            break
+    return " ".join([description] + top) if top else None
+
+
+class SignatureCache:
+    def __init__(self, filename=CACHE_FILE, sample_rate=SAMPLE_RATE):
+        self._filename = filename
+        self._sample_rate = sample_rate
+        #  Own prng, the sampling mustn't touch the state of the fuzzer
+        self._prng = random.Random()
+        #  Cache layout: {(program name, signature): major hash or AMBIGUOUS, ...}
+        self._cache = {}
+        self._skipped = 0
+        #  {(program name, major hash): crashes whose triage was skipped, ...}
+        self._duplicates = {}
+        if filename is not None and os.path.isfile(filename):
+            with open(filename, 'rb') as fd:
+                self._cache = pickle.load(fd)
+
+    @property
+    def skipped(self):
+        #  Number of triages saved since the start
+        return self._skipped
+
+    @property
+    def duplicates(self):
+        return self._duplicates
+
+    def __len__(self):
+        return len(self._cache)
+
+    def lookup(self, program, signature):
+        #  The major hash of a known, unambiguous signature else None
+        return self._cache.get((program, signature)) if signature is not None else None
+
+    def needs_triage(self, program, signature):
+        #  A skipped triage is counted as a duplicate of the known major hash
+        major_hash = self.lookup(program, signature)
+        if major_hash is None or self._prng.random() < self._sample_rate:
+            return True
+        self._skipped += 1
+        key = (program, major_hash)
+        self._duplicates[key] = self._duplicates.get(key, 0) + 1
+        return False
+
+    def learn(self, program, signature, major_hash):
+        if signature is None:
+            return
+        key = (program, signature)
+        if key in self._cache and self._cache[key] in (major_hash, AMBIGUOUS):
+            return
+        self._cache[key] = major_hash if key not in self._cache else AMBIGUOUS
+        if self._filename is not None:
+            with open(self._filename, 'wb+') as fd:
+                pickle.dump(self._cache, fd, -1)
@@ -0,0 +1,52 @@
+from collections import deque
+from executor import OUTCOME_OK, OUTCOME_CRASH, OUTCOME_TIMEOUT
+
+__author__ = 'susperius'
+
+"""
+Timeout of a program learned from its observed run (or page completion) times.
+The timeout is a high percentile of the last WINDOW runs times MARGIN_FACTOR plus MARGIN, never more than the
+configured sleep_time, which is used as long as there are less than MIN_SAMPLES runs.
+A timeout counts as a run of the full sleep_time, so a program which got slower pushes the value up again by itself.
+"""
+
+WINDOW = 200
+MIN_SAMPLES = 20
+PERCENTILE = 0.95
+MARGIN_FACTOR = 1.5
+MARGIN = 0.5  # seconds
+
+
+class AdaptiveTimeout:
+    def __init__(self, maximum, window=WINDOW, percentile=PERCENTILE):
+        self._maximum = float(maximum)
+        self._samples = deque(maxlen=window)
+        self._percentile = percentile
+        self._timeout = self._maximum
+        self._outcomes = {OUTCOME_OK: 0, OUTCOME_CRASH: 0, OUTCOME_TIMEOUT: 0}
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @property
+    def maximum(self):
+        return self._maximum
+
+    @property
+    def outcomes(self):
+        #  {'ok': runs, 'crash': runs, 'timeout': runs} since the start
+        return self._outcomes
+
+    def record(self, outcome, duration):
+        self._outcomes[outcome] += 1
+        self._samples.append(self._maximum if outcome == OUTCOME_TIMEOUT else duration)
+        if len(self._samples) >= MIN_SAMPLES:
+            samples = sorted(self._samples)
+            high = samples[min(len(samples) - 1, int(len(samples) * self._percentile))]
+            self._timeout = min(self._maximum, high * MARGIN_FACTOR + MARGIN)
+
+    def __str__(self):
+        return "timeout: %.2f s (max %.2f s) ok: %d crash: %d timeout: %d" % (
+            self._timeout, self._maximum, self._outcomes[OUTCOME_OK], self._outcomes[OUTCOME_CRASH],
+            self._outcomes[OUTCOME_TIMEOUT])
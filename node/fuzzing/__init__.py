@@ -1,3 +1,3 @@
 __author__ = 'susperius'
 
-__all__ = ['bytemutation', 'javascript']
\ No newline at end of file
+__all__ = ['bytemutation', 'deterministic', 'javascript']
\ No newline at end of file
@@ -3,21 +3,22 @@ __author__ = 'susperius'
 import random
 
 from ..fuzzer import Fuzzer
+from ..helper import campaign_seed
 from model.values import FuzzValues
 from model.CssProperties import CSS_STYLES
+from emitter import CodeEmitter
+from ..choices import Choices, FIRST
 
 
 class CssFuzzer(Fuzzer):
     NAME = "CssFuzzer"
     CONFIG_PARAMS = ["seed"]
 
-    def __init__(self, seed="0"):
+    def __init__(self, seed="0", prng=None, choices=None):
         self._tags = []
         self._class_names = []
-        if int(seed) == 0:
-            random.seed()
-        else:
-            random.seed(int(seed))
+        self._prng = prng if prng is not None else random.Random(campaign_seed(seed))
+        self._choices = choices if choices is not None else Choices()
 
     def set_tags(self, tags):
         self._tags = tags
@@ -30,10 +31,10 @@ class CssFuzzer(Fuzzer):
         self._class_names = class_names
 
     def prng_state(self):
-        return random.getstate()
+        return self._prng.getstate()
 
     def set_state(self, state):
-        random.setstate(state)
+        self._prng.setstate(state)
 
     @classmethod
     def from_list(cls, params):
@@ -43,27 +44,26 @@ class CssFuzzer(Fuzzer):
         pass
 
     def fuzz(self):
-        style = ""
+        style = CodeEmitter()
         for tag in self._tags:
-            style += self.__create_style(tag)
+            self.__create_style(style, tag)
         for class_name in self._class_names:
-            style += self.__create_style("." + class_name)
-        return style
+            self.__create_style(style, "." + class_name)
+        return style.getvalue()
 
-    def __create_style(self, css_selector):
-        style = css_selector + "{\n"
-        for i in range(random.randint(5,100)):
-            style += "\t" + self.__create_style_statement() + "\n"
-        style += "}\n"
-        return style
+    def __create_style(self, style, css_selector):
+        style.emit(css_selector + "{\n")
+        for i in range(self._prng.randint(5,100)):
+            style.emit("\t" + self.__create_style_statement() + "\n")
+        style.emit("}\n")
 
     def __create_style_statement(self):
-        prop = random.choice(CSS_STYLES)
-        val = random.choice(prop[1:])
+        prop = self._choices.choice(self._prng, 'css_style', CSS_STYLES, FIRST)
+        val = self._prng.choice(prop[1:])
         return prop[0] + " : " + val + ";"
 
     def set_seed(self, seed):
-        random.seed(int(seed))
+        self._prng.seed(int(seed))
 
     def file_type(self):
         return "css"
@@ -0,0 +1,55 @@
+__author__ = 'susperius'
+
+"""
+Output buffer of the browser fuzzers: the code is appended as fragments and joined once at the end. Other emitters can
+be appended as fragments, they are joined in place. Placeholders like SCRIPT_BODY or TESTCASE are named slots, filling
+a slot sets its fragment for this emitter and all the emitters appended to it, the nearest fill wins.
+Until it is filled a slot renders as its name, so an unfilled page looks like the old placeholder pages.
+The text fragments stay in one flat list, only nested emitters and slots are marked by their position, so getvalue
+copies the text between two marks with a single extend and resolves the marks on the way.
+"""
+
+
+class CodeEmitter:
+    def __init__(self):
+        self._fragments = []
+        self._marks = []  # (position in _fragments, emitter or slot name), in the order of the positions
+        self._filled = {}
+
+    def emit(self, fragment):
+        if isinstance(fragment, CodeEmitter):
+            self._marks.append((len(self._fragments), fragment))
+        else:
+            self._fragments.append(fragment)
+
+    def slot(self, name):
+        self._marks.append((len(self._fragments), name))
+
+    def fill(self, name, fragment):
+        self._filled[name] = fragment
+
+    def getvalue(self):
+        parts = []
+        self.__flatten(parts, ())
+        return "".join(parts)
+
+    def __flatten(self, parts, outer_fills):
+        fills = (self._filled,) + outer_fills if self._filled else outer_fills
+        start = 0
+        for position, mark in self._marks:
+            parts.extend(self._fragments[start:position])
+            start = position
+            if not isinstance(mark, CodeEmitter):
+                mark = self.__lookup(mark, fills)
+            if isinstance(mark, CodeEmitter):
+                mark.__flatten(parts, fills)
+            else:
+                parts.append(mark)
+        parts.extend(self._fragments[start:])
+
+    @staticmethod
+    def __lookup(name, fills):
+        for filled in fills:
+            if name in filled:
+                return filled[name]
+        return name
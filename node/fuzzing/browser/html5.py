@@ -5,11 +5,29 @@ from model.HtmlObjects import *
 from model.values import FuzzValues
 from model.CssProperties import CSS_STYLES
 from ..fuzzer import Fuzzer
+from ..helper import campaign_seed
 from model.FuzzedHtmlPage import HtmlPage
+from emitter import CodeEmitter
+from ..choices import Choices, FIRST
 
 __author__ = 'susperius'
 
 
+def compile_html5_objects(html5_objects, types_dict):
+    #  tag -> (outer tags or None, head only, required attributes, optional attributes, {attribute: (type, values)})
+    #  values is None for attributes without value and for values from runtime sources
+    schema = {}
+    for tag, tag_info in html5_objects.items():
+        outer_tags = tuple(tag_info['outer_tag']) if tag_info['outer_tag'] is not None else None
+        required = tuple(tag_info['req_attr']) if tag_info['req_attr'] is not None else ()
+        optional = tuple(x for x in tag_info['attr'].keys() if x not in required)
+        attributes = {}
+        for attr, attr_type in tag_info['attr'].items():
+            attributes[attr] = (attr_type, types_dict[attr_type] if attr_type is not None else None)
+        schema[tag] = (outer_tags, outer_tags is not None and 'head' in outer_tags, required, optional, attributes)
+    return schema
+
+
 class Html5Fuzzer(Fuzzer):
     TYPES_DICT = {'APP_DATA': None, 'BOOL': FuzzValues.BOOL, 'BUTTON_TYPE': FuzzValues.BUTTON_TYPE,
                   'CHAR': FuzzValues.CHARS, 'CHARACTER_SET': FuzzValues.CHARACTER_SET,
@@ -38,12 +56,16 @@ class Html5Fuzzer(Fuzzer):
     NO_SINGLE_USE_TAGS = ['head', 'body', 'th', 'tr', 'td', 'tfoot', 'tbody', 'thead', 'title', 'dt', 'dd']
     NO_CHILD_LIST = ['select', 'time', 'iframe', 'style', 'canvas']
 
-    def __init__(self, seed, elements, max_depth, max_attr, file_type):
+    #  Compiled once at import, the tag building only does lookups in these
+    SCHEMA = compile_html5_objects(HTML5_OBJECTS, TYPES_DICT)
+    TAGS = tuple(HTML5_OBJECTS.keys())
+    SINGLE_USE_TAGS = tuple([x for x in TAGS if x not in NO_SINGLE_USE_TAGS])
+    INNER_TAGS = tuple([x for x in TAGS if HTML5_OBJECTS[x]['outer_tag'] is None])
+
+    def __init__(self, seed, elements, max_depth, max_attr, file_type, prng=None, choices=None):
         self._logger = logging.getLogger(__name__)
-        if int(seed) == 0:
-            random.seed()
-        else:
-            random.seed(int(seed))
+        self._prng = prng if prng is not None else random.Random(campaign_seed(seed))
+        self._choices = choices if choices is not None else Choices()
         self._css_classes = []
         self._elem_ids = []
         self._form_ids = []
@@ -55,8 +77,8 @@ class Html5Fuzzer(Fuzzer):
         self._max_attr = int(max_attr)
         self._max_depth = int(max_depth)
         self._elements = int(elements)
-        self._head = ""
-        self._body = ""
+        self._head = CodeEmitter()
+        self._body = CodeEmitter()
         self._used_tags = set()
         self._html_page = HtmlPage()
 
@@ -79,13 +101,13 @@ class Html5Fuzzer(Fuzzer):
         return self._file_type
 
     def set_seed(self, seed):
-        random.seed(int(seed))
+        self._prng.seed(int(seed))
 
     def prng_state(self):
-        return random.getstate()
+        return self._prng.getstate()
 
     def set_state(self, state):
-        random.setstate(state)
+        self._prng.setstate(state)
 
     def create_testcases(self, count, directory):
         pass
@@ -103,48 +125,55 @@ class Html5Fuzzer(Fuzzer):
     def fuzz(self):
         self.__reinit()
         count = 0
-        tag, self._head, close_head = self.__build_tag("head")
+        self._head = CodeEmitter()
+        self._body = CodeEmitter()
+        tag, open_head, close_head = self.__build_tag("head")
+        self._head.emit(open_head)
         tag, title_open, title_close = self.__build_tag("title", ignore_outer_tag=True)
-        self._head += title_open + random.choice(FuzzValues.STRINGS) + title_close + "\r\n"
-        self._head += "<link rel=\"stylesheet\" href=\"TESTCASE.css\">\r\n"
-        self._head += "<script type='text/javascript'>\r\nSCRIPT_BODY\r\n</script>\r\n"
-        tag, self._body, close_body = self.__build_tag("body")
-        self._body = self._body[:-2] + " onload=\"eval(setTimeout(function () { startup(); }, 200))\">\r\n"
-        self._body += "HELLO WORLD!\r\n<br>"
+        self._head.emit(title_open + self._prng.choice(FuzzValues.STRINGS) + title_close + "\r\n")
+        self._head.emit("<link rel=\"stylesheet\" href=\"")
+        self._head.slot("TESTCASE")
+        self._head.emit(".css\">\r\n<script type='text/javascript'>\r\n")
+        self._head.slot("SCRIPT_BODY")
+        self._head.emit("\r\n</script>\r\n")
+        tag, open_body, close_body = self.__build_tag("body")
+        self._body.emit(open_body[:-2] + " onload=\"eval(setTimeout(function () { startup(); }, 200))\">\r\n")
+        self._body.emit("HELLO WORLD!\r\n<br>")
         while self._elements >= count:
             closing_list = []
-            for i in range(random.randint(1, self._max_depth)):
+            for i in range(self._prng.randint(1, self._max_depth)):
                 tag, open_tag, close_tag = self.__build_tag()
                 count += 1
-                if HTML5_OBJECTS[tag]['outer_tag'] is not None\
-                   and HTML5_OBJECTS[tag]['outer_tag'] == "head":  # Tags only allowed in head
-                    self._head += open_tag + random.choice(FuzzValues.STRINGS) + close_tag + "\r\n"
+                if self.SCHEMA[tag][1]:  # Tags only allowed in head
+                    self._head.emit(open_tag + self._prng.choice(FuzzValues.STRINGS) + close_tag + "\r\n")
                 else:  # default body tags
-                    self._body += open_tag + random.choice(FuzzValues.STRINGS) + "\r\n"
+                    self._body.emit(open_tag + self._prng.choice(FuzzValues.STRINGS) + "\r\n")
                     closing_list.append(close_tag if tag != "br" else "")
                 if tag in self.NO_CHILD_LIST:  # don't go deeper if tag is in no child list
                     break
             closing_list.reverse()
             for close_tag in closing_list:
-                self._body += close_tag + "\r\n"
+                self._body.emit(close_tag + "\r\n")
         if len(self._canvas_ids) == 0:
             tag, open_tag, close_tag = self.__build_tag('canvas')
-            self._body += open_tag + close_tag + "\r\n"
+            self._body.emit(open_tag + close_tag + "\r\n")
         for source in self.embed_sources_list:
-            self._body += "<embed src=\"" + source + "\">\r\n"
-        html = "<!DOCTYPE html>\r\n<html>\r\n" + self._head + close_head + "\r\n" + self._body + close_body + "\r\n" + \
-               "</html>\r\n"
-        self._html_page.set_raw_html(html)
+            self._body.emit("<embed src=\"" + source + "\">\r\n")
+        document = CodeEmitter()
+        document.emit("<!DOCTYPE html>\r\n<html>\r\n")
+        document.emit(self._head)
+        document.emit(close_head + "\r\n")
+        document.emit(self._body)
+        document.emit(close_body + "\r\n" + "</html>\r\n")
+        self._html_page.set_document(document)
         return self._html_page
 
     def get_some_html_code(self, length):
         code = ""
         for i in range(length):
-            tag = random.choice(HTML5_OBJECTS.keys())
-            while HTML5_OBJECTS[tag]['outer_tag'] is not None:
-                tag = random.choice(HTML5_OBJECTS.keys())
+            tag = self._prng.choice(self.INNER_TAGS)
             tag, open_tag, close_tag = self.__build_tag(tag)
-            code += open_tag + random.choice(FuzzValues.INTERESTING_VALUES) + close_tag + "\n"
+            code += open_tag + self._prng.choice(FuzzValues.INTERESTING_VALUES) + close_tag + "\n"
         return code
 
     def __build_tag(self, tag=None, ignore_outer_tag=False):
@@ -153,8 +182,7 @@ class Html5Fuzzer(Fuzzer):
         elem_id = "id" + str(len(self._elem_ids))
         self._elem_ids.append(elem_id)
         if tag is None:
-            tags = [x for x in HTML5_OBJECTS.keys() if x not in self.NO_SINGLE_USE_TAGS]
-            tag = random.choice(tags)
+            tag = self._prng.choice(self.SINGLE_USE_TAGS)
             self._used_tags.add(tag)
             if tag == "table":
                 self._html_page.add_element(elem_id, tag)
@@ -166,39 +194,37 @@ class Html5Fuzzer(Fuzzer):
         if tag == "canvas":
             self._canvas_ids.append(elem_id)
         close_tag += "</" + tag + ">"
-        if HTML5_OBJECTS[tag]['outer_tag'] is not None and not ignore_outer_tag:
-            if "head" not in HTML5_OBJECTS[tag]['outer_tag']:
-                ignore, open_tag, close_tag_out = self.__build_tag(random.choice(HTML5_OBJECTS[tag]['outer_tag']))
+        outer_tags, head_only, required, optional, attributes = self.SCHEMA[tag]
+        if outer_tags is not None and not ignore_outer_tag:
+            if not head_only:
+                ignore, open_tag, close_tag_out = self.__build_tag(self._prng.choice(outer_tags))
                 close_tag += close_tag_out
         open_tag += "<" + tag + " id=\"" + elem_id + "\""
         if tag == "form":
             self._form_ids.append(elem_id)
         elif tag == "th":
             self._header_ids.append(elem_id)
-        attribs_avail = HTML5_OBJECTS[tag]['attr']
-        max_tag_attr = len(attribs_avail.keys())
-        attr_count = random.randint(1, self._max_attr) if self._max_attr < max_tag_attr else \
-            random.randint(1, max_tag_attr)
-        attribs = set()
-        if HTML5_OBJECTS[tag]['req_attr'] is not None:
-            for attr in HTML5_OBJECTS[tag]['req_attr']:
-                attribs.add(attr)
-        while len(attribs) < attr_count:
-            attribs.add(random.choice(attribs_avail.keys()))
+        max_tag_attr = len(attributes)
+        attr_count = self._prng.randint(1, self._max_attr) if self._max_attr < max_tag_attr else \
+            self._prng.randint(1, max_tag_attr)
+        attribs = required
+        if attr_count > len(required):
+            attribs += tuple(self._prng.sample(optional, attr_count - len(required)))
         for attr in attribs:
-            if attribs_avail[attr] is None:  # Attributes without value
+            attr_type, values = attributes[attr]
+            if attr_type is None:  # Attributes without value
                 open_tag += " " + attr
             else:
                 open_tag += " " + attr + "=\""
-                if self.TYPES_DICT[attribs_avail[attr]] is not None:  # attributes with value from lists
+                if values is not None:  # attributes with value from lists
                     if tag == 'map' and attr == 'name':
                         name = "map" + str(len(self._map_names))
                         self._map_names.append(name)
                         open_tag += name
                     else:
-                        open_tag += random.choice(self.TYPES_DICT[attribs_avail[attr]])
+                        open_tag += self._prng.choice(values)
                 else:  # attributes with value from runtime sources
-                    open_tag += self.__get_value(attribs_avail[attr])
+                    open_tag += self.__get_value(attr_type)
                 open_tag += "\""
         open_tag += "> "
         return tag, open_tag, close_tag
@@ -212,28 +238,28 @@ class Html5Fuzzer(Fuzzer):
         table += open_thead + "\r\n"
         tag, open_tr, close_tr = self.__build_tag("tr", ignore_outer_tag=True)
         table += open_tr + "\r\n"
-        for i in range(random.randint(1, self._max_depth)):
+        for i in range(self._prng.randint(1, self._max_depth)):
             tag, open_th, close_th = self.__build_tag("th", ignore_outer_tag=True)
-            table += open_th +random.choice(FuzzValues.STRINGS) + close_th + "\r\n"
+            table += open_th +self._prng.choice(FuzzValues.STRINGS) + close_th + "\r\n"
         table += close_tr + "\r\n" + close_thead + "\r\n"
         #  Table foot
         tag, open_tfoot, close_tfoot = self.__build_tag("tfoot", ignore_outer_tag=True)
         table += open_tfoot + "\r\n"
         tag, open_tr, close_tr = self.__build_tag("tr", ignore_outer_tag=True)
         table += open_tr + "\r\n"
-        for i in range(random.randint(1, self._max_depth)):
+        for i in range(self._prng.randint(1, self._max_depth)):
             tag, open_td, close_td = self.__build_tag("td", ignore_outer_tag=True)
-            table += open_td + random.choice(FuzzValues.STRINGS) + close_td + "\r\n"
+            table += open_td + self._prng.choice(FuzzValues.STRINGS) + close_td + "\r\n"
         table += close_tr + "\r\n" + close_tfoot + "\r\n"
         #  Table body
         tag, open_tbody, close_tbody = self.__build_tag("tbody", ignore_outer_tag=True)
         table += open_tbody + "\r\n"
-        for i in range(random.randint(1, self._max_depth)):
+        for i in range(self._prng.randint(1, self._max_depth)):
             tag, open_tr, close_tr = self.__build_tag("tr", ignore_outer_tag=True)
             table += open_tr + "\r\n"
-            for i in range(random.randint(1, self._max_depth)):
+            for i in range(self._prng.randint(1, self._max_depth)):
                 tag, open_td, close_td = self.__build_tag("td", ignore_outer_tag=True)
-                table += open_td + random.choice(FuzzValues.STRINGS) + close_td + "\r\n"
+                table += open_td + self._prng.choice(FuzzValues.STRINGS) + close_td + "\r\n"
             table += close_tr + "\r\n"
         table += close_tbody + "\r\n"
         table += close_table
@@ -251,7 +277,7 @@ class Html5Fuzzer(Fuzzer):
             return self.__get_style()
         elif attr_type == "CSS_CLASS":
             self.__add_css_class()
-            return random.choice(self._html_page.get_css_class_names())
+            return self._prng.choice(self._html_page.get_css_class_names())
         elif attr_type == "DATETIME":
             return self.__get_datetime()
         elif attr_type == "ELEM_ID":
@@ -259,28 +285,28 @@ class Html5Fuzzer(Fuzzer):
         elif attr_type == "FORM_ID":
             return self.__get_form_id() if len(self._form_ids) > 0 else "none"
         elif attr_type == "URL":
-            return "http://127.0.0.1:8080"
+            #  Root of the server the page comes from, each execution slot serves on its own port
+            return "/"
         elif attr_type == "SRC":
             return self._embed_sources_list.pop() if self._embed_sources_list is not None and self._embed_sources_list else ""
         return ""
 
     def __get_app_data(self):
-        return "data-" + random.choice(FuzzValues.STRINGS)
+        return "data-" + self._prng.choice(FuzzValues.STRINGS)
 
     def __get_coords(self):
-        if random.choice([1, 2]) == 1:
-            return random.choice(FuzzValues.INTS) + "," + random.choice(FuzzValues.INTS) + "," + \
-                   random.choice(FuzzValues.INTS)
-        else:
-            return random.choice(FuzzValues.INTS) + "," + random.choice(FuzzValues.INTS) + "," + \
-                   random.choice(FuzzValues.INTS) + "," + random.choice(FuzzValues.INTS)
+        count = 3 if self._prng.choice([1, 2]) == 1 else 4
+        return ",".join([self.__get_int() for i in range(count)])
+
+    def __get_int(self):
+        return self._choices.choice(self._prng, 'int', FuzzValues.INTS)
 
     def __get_style(self):
-        count = random.randint(2, 10)
+        count = self._prng.randint(2, 10)
         ret_val = ""
         for i in range(count):
-            style_pick = random.choice(CSS_STYLES)
-            value = random.choice(style_pick[1:])
+            style_pick = self._choices.choice(self._prng, 'css_style', CSS_STYLES, FIRST)
+            value = self._prng.choice(style_pick[1:])
             ret_val += style_pick[0] + ":" + value + ";"
         return ret_val
 
@@ -290,23 +316,23 @@ class Html5Fuzzer(Fuzzer):
         return class_name
 
     def __get_datetime(self):
-        return str(random.randint(0, 9999)) + "-" + str(random.randint(0, 99)) + "-" + str(random.randint(0, 99)) + \
-               " " + str(random.randint(0, 99)) + ":" + str(random.randint(0, 99))
+        return str(self._prng.randint(0, 9999)) + "-" + str(self._prng.randint(0, 99)) + "-" + str(self._prng.randint(0, 99)) + \
+               " " + str(self._prng.randint(0, 99)) + ":" + str(self._prng.randint(0, 99))
 
     def __get_elem_id(self):
-        return random.choice(self._elem_ids)
+        return self._prng.choice(self._elem_ids)
 
     def __get_form_id(self):
-        return random.choice(self._form_ids)
+        return self._prng.choice(self._form_ids)
 
     def __get_header_id(self):
-        return random.choice(self._header_ids)
+        return self._prng.choice(self._header_ids)
 
     def __gen_html_code(self):  # TODO: Implement
         pass
 
     def __get_map_name(self):
-        return random.choice(self._map_names)
+        return self._prng.choice(self._map_names)
 
     def __get_url(self, mediatype):
         pass
\ No newline at end of file
@@ -9,9 +9,13 @@ from model.JsWindow import *
 from html5 import Html5Fuzzer
 from css import CssFuzzer
 from canvas import CanvasFuzzer
+from emitter import CodeEmitter
+from ..choices import Choices, FIRST
 from model.values import FuzzValues
 from model.CssProperties import CSS_STYLES
 from ..fuzzer import Fuzzer
+from ..helper import derive_seed, campaign_seed
+from ..testcase import Testcase
 
 __author__ = 'susperius'
 
@@ -22,21 +26,22 @@ class JsDomFuzzer(Fuzzer):
     NAME = "js_dom_fuzzer"
     CONFIG_PARAMS = ["starting_elements", "total_operations", "browser", "seed", "canvas_size", "file_type"]
     CALLING_COMMENT = "//FUNCTION_CALLING"
+    COMPLETION_COMMENT = "//COMPLETION"
     TIMEOUT = 20
 
     def __init__(self, starting_elements, total_operations, browser, seed, canvas_size, file_type='html'):
         self._starting_elements = int(starting_elements)
         self._total_operations = int(total_operations)
         self._browser = browser
-        seed = int(seed)
+        self._seed = campaign_seed(seed)
+        self._batch = 0
+        self._prng = random.Random(self._seed)
+        self._choices = Choices()
         #  self._html_fuzzer = HtmlFuzzer(self._starting_elements, 3, seed)
-        self._html_fuzzer = Html5Fuzzer(int(seed), self._starting_elements, 10, 5, file_type)
-        self._css_fuzzer = CssFuzzer(seed)
-        self._canvas_fuzzer = CanvasFuzzer(int(canvas_size))
-        if seed == 0:
-            random.seed()
-        else:
-            random.seed(seed)
+        self._html_fuzzer = Html5Fuzzer(self._seed, self._starting_elements, 10, 5, file_type, self._prng,
+                                        self._choices)
+        self._css_fuzzer = CssFuzzer(self._seed, self._prng, self._choices)
+        self._canvas_fuzzer = CanvasFuzzer(int(canvas_size), prng=self._prng)
         self._file_type = file_type
         self._function_count = 0
         self._operations_count = 0
@@ -47,6 +52,7 @@ class JsDomFuzzer(Fuzzer):
             self._occurring_events[event] = 0
         self._html_page = None
         self._calls_in_startup = []
+        self._deferred_calls = 0
         # arrays dictionary layout: {'array_id': [JsObject, .... JsObject], ...}
         self._arrays = {}
 
@@ -56,14 +62,19 @@ class JsDomFuzzer(Fuzzer):
 
     @property
     def prng_state(self):
-        return random.getstate()
+        return self._seed, self._batch
 
     @property
     def file_type(self):
         return self._file_type
 
+    @property
+    def choices(self):
+        return self._choices
+
     def set_seed(self, seed=0):
-        random.seed(seed)
+        self._seed = campaign_seed(seed)
+        self._batch = 0
 
     def __re_init(self):
         self._function_count = 0
@@ -72,80 +83,94 @@ class JsDomFuzzer(Fuzzer):
         self._operations_count = 0
         self._js_elements = {}
         self._calls_in_startup = []
+        self._deferred_calls = 0
         self._arrays = []
         self._occurring_events = {}
         for event in DomObjectTypes.DOM_EVENTS:
             self._occurring_events[event] = 0
 
     def create_testcases(self, count, directory):
+        for testcase in self.testcases(count):
+            testcase.write_to(directory)
+
+    def testcases(self, count):
+        batch = self._batch
+        self._batch += 1
         for i in range(count):
-            test_name = "/test" + str(i) if i > 9 else "/test0" + str(i)
-            with open(directory + test_name + "." + self._file_type, "wb+") as html_fd, open(directory + test_name + ".css", "wb+") as css_fd:
-                html, css = self.fuzz()
-                html = html.replace("TESTCASE", test_name)
-                html_fd.write(html)
-                css_fd.write(css)
+            yield self.__testcase(batch, i)
 
-    def fuzz(self):
+    def regenerate(self, batch, index, directory):
+        self.__testcase(batch, index).write_to(directory)
+
+    def __testcase(self, batch, index):
+        self._prng.seed(derive_seed(self._seed, batch, index))
+        test_name = "test" + str(index) if index > 9 else "test0" + str(index)
+        html, css = self.fuzz(test_name)
+        return Testcase(test_name + "." + self._file_type, html, [(test_name + ".css", css)],
+                        (self._seed, batch, index))
+
+    def fuzz(self, test_name="TESTCASE"):
         self._html_page = self._html_fuzzer.fuzz()
-        html = self._html_page.get_raw_html()
         self._css_fuzzer.set_tags(self._html_page.get_elements_by_html_tag().keys())
         css = self._css_fuzzer.fuzz()
-        js_code = ""
-        js_code += self.__create_canvas_functions()
-        js_code += self.__create_startup()
+        js_code = CodeEmitter()
+        self.__create_canvas_functions(js_code)
+        self.__create_startup(js_code, test_name)
         while self._total_operations > self._operations_count:
-            js_code += self.__add_function()
-        js_code += self.__add_event_dispatcher()
-        js_code += self.__create_event_handlers()
-        js_code = js_code.replace(self.CALLING_COMMENT, self.__concate_startup_list())
-        doc = html.replace("SCRIPT_BODY", js_code)
+            self.__add_function(js_code)
+        js_code.emit(self.__add_event_dispatcher())
+        self.__create_event_handlers(js_code)
+        js_code.fill(self.CALLING_COMMENT, self.__concate_startup_list())
+        #  Functions called by timeout can call the next one by timeout, the chain is at most as long as all of them
+        js_code.fill(self.COMPLETION_COMMENT,
+                     JsWindow.completionBeacon(test_name, self.TIMEOUT * self._deferred_calls))
+        doc = self._html_page.get_document()
+        doc.fill("SCRIPT_BODY", js_code)
+        doc.fill("TESTCASE", test_name)
         self.__re_init()
-        return doc, css
+        return doc.getvalue(), css
 
     def set_state(self, state):
-        random.setstate(state)
+        self._seed, self._batch = state
 
-    def __create_startup(self):
-        code = "function startup() {\n"
+    def __create_startup(self, code, test_name):
+        code.emit("function startup() {\n")
         i = 0
         for elem_id in self._html_page.get_element_ids():
-            code += "\t" + "elem" + str(i) + " = " + JsDocument.getElementById(elem_id) + "\n"
+            code.emit("\t" + "elem" + str(i) + " = " + JsDocument.getElementById(elem_id) + "\n")
             self._js_elements["elem"+str(i)] = JsDomElement("elem" + str(i), self._html_page.get_element_by_id(elem_id))
             i += 1
-        code += "\t" + self.CALLING_COMMENT + \
-                "\n\tevent_firing();\n}\n"
-        return code
+        code.emit("\t")
+        code.slot(self.CALLING_COMMENT)
+        code.emit("\n\tevent_firing();\n\t")
+        code.slot(self.COMPLETION_COMMENT)
+        code.emit("\n}\n")
 
-    def __create_canvas_functions(self):
-        code = ""
+    def __create_canvas_functions(self, code):
         for canvas_id in (self._html_page.get_elements_by_html_tag())['canvas']:
             self._calls_in_startup.append("\tfunc_" + canvas_id + "();")
             self._canvas_fuzzer.set_canvas_id(canvas_id)
-            code += self._canvas_fuzzer.fuzz()
-        return code
+            code.emit(self._canvas_fuzzer.fuzz())
 
-    def __add_function(self, func_name=None, event=False):
+    def __add_function(self, code, func_name=None, event=False):
         if not func_name:
             func_name = "func_" + str(self._function_count) + "()"
-        code = "function " + func_name + " {\n"
-        func_count = random.randint(10, 50)
+        code.emit("function " + func_name + " {\n")
+        func_count = self._prng.randint(10, 50)
         for i in range(func_count):
-            code += "\t" + JsGlobal.try_catch_block(self.__add_element_method())
+            code.emit("\t" + JsGlobal.try_catch_block(self.__add_element_method()))
         if not event:
             self._function_count += 1
-            if random.randint(0, 10) <= 3:
-                code += "\t" + JsWindow.setTimeout("func_" + str(self._function_count) + "()", self.TIMEOUT) + "\n"
+            if self._prng.randint(0, 10) <= 3:
+                self._deferred_calls += 1
+                code.emit("\t" + JsWindow.setTimeout("func_" + str(self._function_count) + "()", self.TIMEOUT) + "\n")
             else:
                 self._calls_in_startup.append("\tfunc_" + str(self._function_count) + "();")
-        code += "}\n"
-        return code
+        code.emit("}\n")
 
-    def __create_event_handlers(self):
-        code = ""
+    def __create_event_handlers(self, code):
         for event in self._occurring_events:
-            code += self.__add_function(event + "_handler" + "(event)", True)
-        return code
+            self.__add_function(code, event + "_handler" + "(event)", True)
 
     def __add_event_dispatcher(self):
         code = "function event_firing() {\n"
@@ -174,7 +199,7 @@ class JsDomFuzzer(Fuzzer):
 
     def __add__new_element(self):
         elem_name = "elem_cr" + str(len(self._js_elements))
-        html_type = random.choice(HTML_OBJECTS)
+        html_type = self._prng.choice(HTML_OBJECTS)
         code = elem_name + " = " + JsDocument.createElement(html_type) + "\n"
         self._js_elements[elem_name] = JsDomElement(elem_name, html_type)
         return elem_name, code, html_type
@@ -182,15 +207,15 @@ class JsDomFuzzer(Fuzzer):
     def __add_element_method(self, key=None):
         code = ""
         if not key:
-            key = random.choice(self._js_elements.keys())
-        method = random.choice(DomObjectTypes.DOM_ELEMENT_FUZZ_STUFF)
+            key = self._prng.choice(self._js_elements.keys())
+        method = self._choices.choice(self._prng, 'dom_method', DomObjectTypes.DOM_ELEMENT_FUZZ_STUFF)
         if method == 'addEventListener':
-            event = random.choice(DomObjectTypes.DOM_EVENTS)
+            event = self._prng.choice(DomObjectTypes.DOM_EVENTS)
             self._occurring_events[event] += 1
             code += self._js_elements[key].addEventListener(event, event + "_handler")
         elif method == 'appendChild':
-            if random.randint(1, 100) < 80:
-                child = random.choice(self._js_elements.keys())
+            if self._prng.randint(1, 100) < 80:
+                child = self._prng.choice(self._js_elements.keys())
                 if child == key:
                     elem_name, add_code, html_type = self.__add__new_element()
                     code += add_code
@@ -209,7 +234,7 @@ class JsDomFuzzer(Fuzzer):
             self._js_elements[elem_name] = JsDomElement(elem_name, self._js_elements[key].html_type)
             self._js_elements[elem_name].set_children(self._js_elements[key].get_children())
         elif method == 'hasAttribute':
-            code += self._js_elements[key].hasAttribute(random.choice(HTML_ATTR_GENERIC))
+            code += self._js_elements[key].hasAttribute(self._prng.choice(HTML_ATTR_GENERIC))
         elif method == 'hasChildNode':
             code += self._js_elements[key].hasChildNodes()
         elif method == 'insertBefore':
@@ -219,22 +244,22 @@ class JsDomFuzzer(Fuzzer):
                 code += "\t" + self._js_elements[key].appendChild(elem_name) + "\n"
             elem_name, add_code, html_type = self.__add__new_element()
             code += add_code
-            code += self._js_elements[key].insertBefore(elem_name, random.choice(self._js_elements[key].get_children()))
+            code += self._js_elements[key].insertBefore(elem_name, self._prng.choice(self._js_elements[key].get_children()))
         elif method == 'normalize':
             code += self._js_elements[key].normalize()
         elif method == 'removeAttribute':
             if not self._js_elements[key].attributes:
-                code += self._js_elements[key].setAttribute(random.choice(HTML_ATTR_GENERIC),
-                                                            random.choice(FuzzValues.INTERESTING_VALUES))
+                code += self._js_elements[key].setAttribute(self._prng.choice(HTML_ATTR_GENERIC),
+                                                            self._prng.choice(FuzzValues.INTERESTING_VALUES))
             else:
-                code += self._js_elements[key].removeAttribute(random.choice(self._js_elements[key].attributes.keys()))
+                code += self._js_elements[key].removeAttribute(self._prng.choice(self._js_elements[key].attributes.keys()))
         elif method == 'removeChild':
             if not self._js_elements[key].get_children():
                 elem_name, add_code, html_type = self.__add__new_element()
                 code += add_code
                 code += self._js_elements[key].appendChild(elem_name)
             else:
-                code += self._js_elements[key].removeChild(random.choice(self._js_elements[key].get_children()))
+                code += self._js_elements[key].removeChild(self._prng.choice(self._js_elements[key].get_children()))
         elif method == 'replaceChild':
             if not self._js_elements[key].get_children():
                 elem_name, add_code, html_type = self.__add__new_element()
@@ -244,27 +269,27 @@ class JsDomFuzzer(Fuzzer):
                 elem_name, add_code, html_type = self.__add__new_element()
                 code += add_code
                 code += self._js_elements[key].replaceChild(elem_name,
-                                                            random.choice(self._js_elements[key].get_children()))
+                                                            self._prng.choice(self._js_elements[key].get_children()))
         elif method == 'removeEventListener':
             if not self._js_elements[key].registered_events:
-                event = random.choice(DomObjectTypes.DOM_EVENTS)
+                event = self._prng.choice(DomObjectTypes.DOM_EVENTS)
                 self._occurring_events[event] += 1
                 code += self._js_elements[key].addEventListener(event, event + "_handler")
             else:
-                event = random.choice(self._js_elements[key].registered_events.keys())
+                event = self._prng.choice(self._js_elements[key].registered_events.keys())
                 self._occurring_events[event] -= 1
-                event = random.choice(self._js_elements[key].registered_events.keys())
+                event = self._prng.choice(self._js_elements[key].registered_events.keys())
                 code += self._js_elements[key].removeEventListener(event,
                                                                    self._js_elements[key].registered_events[event])
         elif method == 'setAttribute':
-            attr = random.choice(HTML_ATTR_GENERIC)
+            attr = self._prng.choice(HTML_ATTR_GENERIC)
             if attr == 'style':
                 val = ""
                 for i in range(1, 50):
-                    css = random.choice(CSS_STYLES)
-                    val += css[0] + ": " + random.choice(css[1:]) + "; "
+                    css = self._choices.choice(self._prng, 'css_style', CSS_STYLES, FIRST)
+                    val += css[0] + ": " + self._prng.choice(css[1:]) + "; "
             else:
-                val = random.choice(FuzzValues.INTERESTING_VALUES)
+                val = self._prng.choice(FuzzValues.INTERESTING_VALUES)
             code += self._js_elements[key].setAttribute(attr, val)
         elif method == 'REPLACE_EXIST_ELEMENT':
             elem_name, add_code, html_type = self.__add__new_element()
@@ -274,36 +299,39 @@ class JsDomFuzzer(Fuzzer):
         elif method == 'MIX_REFERENCES':
             code += self._js_elements[key]
         elif method == 'className':
-            code += self._js_elements[key].className() + " = \"" + random.choice(FuzzValues.STRINGS) + "\";"
+            code += self._js_elements[key].className() + " = \"" + self._prng.choice(FuzzValues.STRINGS) + "\";"
         elif method == 'contentEditable':
-            code += self._js_elements[key].contentEditable() + " = " + random.choice(FuzzValues.BOOL) + ";"
+            code += self._js_elements[key].contentEditable() + " = " + self._prng.choice(FuzzValues.BOOL) + ";"
         elif method == 'dir':
-            code += self._js_elements[key].dir() + " = \"" + random.choice(FuzzValues.TEXT_DIRECTION) + "\";"
+            code += self._js_elements[key].dir() + " = \"" + self._prng.choice(FuzzValues.TEXT_DIRECTION) + "\";"
         elif method == 'id':
-            code += self._js_elements[key].id() + " = \"" + random.choice(FuzzValues.STRINGS) + "\";"
+            code += self._js_elements[key].id() + " = \"" + self._prng.choice(FuzzValues.STRINGS) + "\";"
         elif method == 'innerHTML':
-            code += self._js_elements[key].innerHtml() + " = \"" + random.choice(FuzzValues.STRINGS) + "\";"
+            code += self._js_elements[key].innerHtml() + " = \"" + self._prng.choice(FuzzValues.STRINGS) + "\";"
         elif method == 'lang':
-            code += self._js_elements[key].lang() + " = \"" + random.choice(FuzzValues.LANG_CODES) + "\";"
+            code += self._js_elements[key].lang() + " = \"" + self._prng.choice(FuzzValues.LANG_CODES) + "\";"
         elif method == 'scrollLeft':
-            code += self._js_elements[key].scrollLeft() + " = \"" + random.choice(FuzzValues.INTS) + "\";"
+            code += self._js_elements[key].scrollLeft() + " = \"" + \
+                    self._choices.choice(self._prng, 'int', FuzzValues.INTS) + "\";"
         elif method == 'scrollTop':
-            code += self._js_elements[key].scrollTop() + " = \"" + random.choice(FuzzValues.INTS) + "\";"
+            code += self._js_elements[key].scrollTop() + " = \"" + \
+                    self._choices.choice(self._prng, 'int', FuzzValues.INTS) + "\";"
         elif method == 'style':
-            value = random.choice(CSS_STYLES)
-            if "-" in value[0]:
-                pos = value[0].find("-")
-                value[0] = value[0].replace("-", "")
-                value[0] = value[0][0:pos-1] + value[0][pos].upper() + value[0][pos+1:]
-            code += self._js_elements[key].style() + "." + value[0] + " = \"" + random.choice(value[1:]) + "\";"
+            value = self._choices.choice(self._prng, 'css_style', CSS_STYLES, FIRST)
+            prop = value[0]  # CSS_STYLES is shared, never change it in place
+            if "-" in prop:
+                pos = prop.find("-")
+                prop = prop.replace("-", "")
+                prop = prop[0:pos-1] + prop[pos].upper() + prop[pos+1:]
+            code += self._js_elements[key].style() + "." + prop + " = \"" + self._prng.choice(value[1:]) + "\";"
         elif method == 'tabIndex':
-            code += self._js_elements[key].tabIndex() + " = " + str(random.randint(-20, 20)) + ";"
+            code += self._js_elements[key].tabIndex() + " = " + str(self._prng.randint(-20, 20)) + ";"
         elif method == 'textContent':
-            code += self._js_elements[key].textContent() + " = \"" + random.choice(FuzzValues.STRINGS) + "\";"
+            code += self._js_elements[key].textContent() + " = \"" + self._prng.choice(FuzzValues.STRINGS) + "\";"
         elif method == 'title':
-            code += self._js_elements[key].title() + " = \"" + random.choice(FuzzValues.STRINGS) + "\";"
+            code += self._js_elements[key].title() + " = \"" + self._prng.choice(FuzzValues.STRINGS) + "\";"
         self._operations_count += 1
-        if random.randint(1, 10000) < 50:
+        if self._prng.randint(1, 10000) < 50:
             code += "CollectGarbage();"
         return code
 
@@ -311,9 +339,9 @@ class JsDomFuzzer(Fuzzer):
         array_id = "array_" + str(len(self._arrays.keys()))
         self._arrays[array_id] = []
         code = array_id + " = ["
-        array_length = length if length != 0 else random.randint(1, len(self._js_elements.keys()) / 2)
+        array_length = length if length != 0 else self._prng.randint(1, len(self._js_elements.keys()) / 2)
         for i in range(array_length):
-            element_to_add = random.choice(self._js_elements.keys())
+            element_to_add = self._prng.choice(self._js_elements.keys())
             self._arrays[array_id].append(self._js_elements[element_to_add])
             code += element_to_add + ","
         code = code[:-1] + "];\n"
@@ -328,8 +356,9 @@ class JsDomFuzzer(Fuzzer):
     def __concate_startup_list(self):
         code = ""
         for item in self._calls_in_startup[:-1]:
-            if random.randint(0,10) < 5:
+            if self._prng.randint(0,10) < 5:
                 code += item + "\n"
             else:
+                self._deferred_calls += 1
                 code += "\t" + JsWindow.setTimeout(item, self.TIMEOUT)
         return code
\ No newline at end of file
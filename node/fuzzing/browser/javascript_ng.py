@@ -1,11 +1,14 @@
 import random
-import os
 import logging
 
 from html5 import Html5Fuzzer
 from canvas import CanvasFuzzer
 from css import CssFuzzer
+from emitter import CodeEmitter
+from ..choices import Choices, FIRST
 from ..fuzzer import Fuzzer
+from ..helper import derive_seed, campaign_seed
+from ..testcase import Testcase
 from model.JsDocument import JsDocument
 from model.JsObject import *
 from model.JsDomElement import *
@@ -16,7 +19,9 @@ from model.CssProperties import CSS_STYLES
 from model.DomObjectTypes import DomObjectTypes
 from model.FuzzedHtmlPage import HtmlPage
 from model.JsWindow import JsWindow
+from model.JsVariables import JsVariables
 from ..bytemutation import ByteMutation
+from ..corpus import Corpus
 
 """
 1) Create a html page
@@ -52,19 +57,32 @@ class JsFuzzer(Fuzzer):
     FIRST_ARRAY_LENGTH = 5
     FUNCTION_TYPES = ['default', 'event', 'array']
     SPECIAL_PARAMETERS = ['JS_ARRAY', 'JS_DOM_CHILD_ELEMENT']
+    #  Statement kinds of a function and ways to call the default functions with their default weights, the former
+    #  thresholds on randint(1, 20)
+    STATEMENTS = ('assignment', 'if', 'none', 'for')
+    STATEMENT_WEIGHTS = (10, 4, 1, 5)
+    CALLS = ('direct', 'timeout')
+    CALL_WEIGHTS = (14, 6)
+    CALL_DELAY = 100  # ms of the calls by timeout
 
     def __init__(self, seed, starting_elements, html_depth, html_max_attr, canvas_size, js_block_size, function_count, file_type, media_folder="NONE"):
         self._logger = logging.getLogger(__name__)
-        self._html_fuzzer = Html5Fuzzer(int(seed), int(starting_elements), int(html_depth), int(html_max_attr), file_type)
-        self._canvas_fuzzer = CanvasFuzzer(int(canvas_size))
-        self._css_fuzzer = CssFuzzer(int(seed))
-        random.seed(int(seed)) if int(seed) != 0 else random.seed()
+        self._seed = campaign_seed(seed)
+        self._batch = 0
+        self._prng = random.Random(self._seed)
+        self._choices = Choices()
+        self._html_fuzzer = Html5Fuzzer(self._seed, int(starting_elements), int(html_depth), int(html_max_attr), file_type,
+                                        self._prng, self._choices)
+        self._canvas_fuzzer = CanvasFuzzer(int(canvas_size), prng=self._prng)
+        self._css_fuzzer = CssFuzzer(self._seed, self._prng, self._choices)
         self._size = int(js_block_size)
         self._function_count = int(function_count)
         self._file_type = file_type
-        self._js_objects = {}
+        self._js_objects = JsVariables()
         self._media_folder = media_folder
-        self.__init_js_object_dict()
+        #  The media files are read once, every file gets one ByteMutation instance for the whole run
+        self._media_corpus = Corpus.load(media_folder) if media_folder != "NONE" else None
+        self._media_mutations = {}
         self._js_default_functions = []
         self._js_event_listener = []
         self._js_array_functions = []
@@ -74,96 +92,122 @@ class JsFuzzer(Fuzzer):
             self._js_event_listener.append("event_handler_" + str(i))
         self._html_page = HtmlPage()
 
-    def __init_js_object_dict(self):
-        for js_obj_type in JS_OBJECTS:
-            self._js_objects[js_obj_type] = []
-
     @property
     def file_type(self):
         return self._file_type
 
+    @property
+    def choices(self):
+        return self._choices
+
     @classmethod
     def from_list(cls, params):
         return cls(params[0], params[1], params[2], params[3], params[4], params[5], params[6], params[7], params[8])
 
     @property
     def prng_state(self):
-        return random.getstate
+        return self._seed, self._batch
 
     def set_state(self, state):
-        random.setstate(state)
+        self._seed, self._batch = state
 
     def create_testcases(self, count, directory):
         self.clear_folder(directory)
-        media_file_names = []
+        for testcase in self.testcases(count):
+            testcase.write_to(directory)
+
+    def testcases(self, count):
+        batch = self._batch
+        self._batch += 1
+        byte_mutation_fuzzers = self.__media_fuzzers(batch)
+        for i in range(count):
+            yield self.__testcase(batch, i, byte_mutation_fuzzers)
+
+    def regenerate(self, batch, index, directory):
+        self.__testcase(batch, index, self.__media_fuzzers(batch)).write_to(directory)
+
+    def __media_fuzzers(self, batch):
+        #  The media files are chosen once per batch, index -1 is reserved for that choice
+        #  The choice stays uniform, a testcase has to be regenerable from (seed, batch, index) alone
         byte_mutation_fuzzers = []
-        if self._media_folder is not "NONE":
-            media_folder_listing = os.listdir(self._media_folder)
+        if self._media_corpus is not None:
+            self._prng.seed(derive_seed(self._seed, batch, -1))
             for i in range(8):
-                file_name = random.choice(media_folder_listing)
-                media_file_names.append(file_name)
-                byte_mutation_fuzzers.append(ByteMutation(self._media_folder + "/" + file_name, 5, 50, 0, file_name.split(".")[1]))
-        for i in range(count):
-            test_name = "/test" + str(i) if i > 9 else "/test0" + str(i)
-            fuzzer_number = 0
-            for byte_mutation_fuzzer in byte_mutation_fuzzers:
-                fuzz_data_file_name = test_name + "_" + str(fuzzer_number) + "." + byte_mutation_fuzzer.file_type
-                fuzz_data = byte_mutation_fuzzer.fuzz()
-                with open(directory + fuzz_data_file_name, 'wb+') as data_fd:
-                    data_fd.write(fuzz_data)
-                self._html_fuzzer.add_embed_source(fuzz_data_file_name.replace("/", ""))
-                fuzzer_number += 1
-            with open(directory + test_name + "." + self._file_type, "wb+") as html_fd, open(directory + test_name + ".css", "wb+") as css_fd:
-                html, css = self.fuzz()
-                html = html.replace("TESTCASE", test_name)
-                html_fd.write(html)
-                css_fd.write(css)
-            self._html_fuzzer.embed_sources_list = []
-
-    def set_seed(self, seed):
-        pass
+                entry = self._prng.choice(self._media_corpus.entries)
+                entry.mark_fuzzed()
+                byte_mutation_fuzzers.append(self.__media_mutation(entry))
+        return byte_mutation_fuzzers
+
+    def __media_mutation(self, entry):
+        if entry.digest not in self._media_mutations:
+            self._media_mutations[entry.digest] = ByteMutation(self._media_folder + "/" + entry.name, 5, 50,
+                                                               self._seed, entry.name.split(".")[1], self._prng,
+                                                               Corpus([entry]))
+        return self._media_mutations[entry.digest]
+
+    def __testcase(self, batch, index, byte_mutation_fuzzers):
+        self._prng.seed(derive_seed(self._seed, batch, index))
+        test_name = "test" + str(index) if index > 9 else "test0" + str(index)
+        media = []
+        fuzzer_number = 0
+        for byte_mutation_fuzzer in byte_mutation_fuzzers:
+            fuzz_data_file_name = test_name + "_" + str(fuzzer_number) + "." + byte_mutation_fuzzer.file_type
+            media.append((fuzz_data_file_name, byte_mutation_fuzzer.fuzz()))
+            self._html_fuzzer.add_embed_source(fuzz_data_file_name)
+            fuzzer_number += 1
+        html, css = self.fuzz(test_name)
+        self._html_fuzzer.embed_sources_list = []
+        return Testcase(test_name + "." + self._file_type, html, [(test_name + ".css", css)] + media,
+                        (self._seed, batch, index))
+
+    def set_seed(self, seed=0):
+        self._seed = campaign_seed(seed)
+        self._batch = 0
 
     def __reinit(self):
-        self._js_objects = {}
-        self.__init_js_object_dict()
+        self._js_objects = JsVariables()
         self._js_default_functions = []
 
-    def fuzz(self):
+    def fuzz(self, test_name="TESTCASE"):
         self._html_page = self._html_fuzzer.fuzz()
         tags = self._html_page.get_elements_by_html_tag().keys()
         css_class_names = self._html_page.get_css_class_names()
         self._css_fuzzer.set_options(tags, css_class_names)
         css = self._css_fuzzer.fuzz()
-        code = ""
-        code += self.__init_js_objects(self._html_page)
+        code = CodeEmitter()
+        self.__init_js_objects(code, self._html_page)
         i = 0
         func_size = self._size / self._function_count
         while i < self._size:
-            code += self.__build_function("default", func_size)
+            self.__build_function(code, "default", func_size)
             i += func_size
         for func_name in self._js_event_listener:
-            code += self.__build_function("event", func_size, func_name)
+            self.__build_function(code, "event", func_size, func_name)
         for func_name in self._js_array_functions:
-            code += self.__build_function("array", func_size, func_name)
-        code += self.__add_event_dispatcher()
+            self.__build_function(code, "array", func_size, func_name)
+        code.emit(self.__add_event_dispatcher())
         for canvas_id in self._html_page.get_elements_by_html_tag()['canvas']:
             self._canvas_fuzzer.set_canvas_id(canvas_id)
             self._js_default_functions.append("func_" + canvas_id)
-            code += self._canvas_fuzzer.fuzz()
-        call_block = ""
+            code.emit(self._canvas_fuzzer.fuzz())
+        call_block = CodeEmitter()
+        delay = 0
         for func_name in self._js_default_functions:
-            choice = random.randint(1, 20)
-            if choice < 15:
-                call_block += "\t" + func_name + "();\n"
+            call = self._choices.choice(self._prng, 'js_call', self.CALLS, defaults=self.CALL_WEIGHTS)
+            if call == 'direct':
+                call_block.emit("\t" + func_name + "();\n")
             else:
-                call_block += "\t" + JsWindow.setTimeout(func_name + "();", 100) + "\n"
-        call_block += "\t" + "event_firing();\n"
-        call_block += "\t" + "location.reload();\n"
-        code = code.replace(self.CALLING_COMMENT, call_block)
-        html = self._html_page.get_raw_html()
-        html = html.replace("SCRIPT_BODY", code)
+                call_block.emit("\t" + JsWindow.setTimeout(func_name + "();", self.CALL_DELAY) + "\n")
+                delay = self.CALL_DELAY
+        call_block.emit("\t" + "event_firing();\n")
+        #  The page is complete (and reloaded) only after the functions called by timeout ran
+        call_block.emit("\t" + JsWindow.completionBeacon(test_name, delay, "location.reload();") + "\n")
+        code.fill(self.CALLING_COMMENT, call_block)
+        document = self._html_page.get_document()
+        document.fill("SCRIPT_BODY", code)
+        document.fill("TESTCASE", test_name)
         self.__reinit()
-        return html, css
+        return document.getvalue(), css
 
     def test(self):
         self._html_page = self._html_fuzzer.fuzz()
@@ -171,28 +215,27 @@ class JsFuzzer(Fuzzer):
         css_class_names = self._html_page.get_css_class_names()
         self._css_fuzzer.set_options(tags, css_class_names)
         css = self._css_fuzzer.fuzz()
-        code = ""
-        code += self.__init_js_objects(self._html_page)
+        code = CodeEmitter()
+        self.__init_js_objects(code, self._html_page)
         for i in range(30):
-            code += self.__build_assignment2() + "\n"
-        return code
+            code.emit(self.__build_assignment2() + "\n")
+        return code.getvalue()
 
-    def __init_js_objects(self, html_page):
+    def __init_js_objects(self, code, html_page):
         available_dom_elements = html_page.get_elements_by_id()
-        code = "function startup() {\n"
+        code.emit("function startup() {\n")
         for element_id in available_dom_elements.keys():
-            code += "\telem_" + element_id + " = " + JsDocument.getElementById(element_id) + ";\n"
-            self._js_objects['JS_DOM_ELEMENT'].append(JsDomElement("elem_" + element_id,
-                                                                   available_dom_elements[element_id]))
+            code.emit("\telem_" + element_id + " = " + JsDocument.getElementById(element_id) + ";\n")
+            self._js_objects.add('JS_DOM_ELEMENT', JsDomElement("elem_" + element_id,
+                                                                available_dom_elements[element_id]))
         #  Init a Object of each type
         for i in range(0, 5):
-            code += "\t" + self.__build_js_array(self.FIRST_ARRAY_LENGTH)
-            code += "\t" + self.__add_js_string()
-            code += "\t" + self.__add_js_number()
-            code += "\t" + self.__add_js_object()
-        code += self.CALLING_COMMENT + "\n"
-        code += "}\n"
-        return code
+            code.emit("\t" + self.__build_js_array(self.FIRST_ARRAY_LENGTH))
+            code.emit("\t" + self.__add_js_string())
+            code.emit("\t" + self.__add_js_number())
+            code.emit("\t" + self.__add_js_object())
+        code.slot(self.CALLING_COMMENT)
+        code.emit("\n}\n")
 
     # region Little Helper
     def __build_js_array(self, length):
@@ -201,33 +244,31 @@ class JsFuzzer(Fuzzer):
             js_obj = self.__get_an_js_object()
             array_obj_list.append(js_obj)
         js_array = JsArray(self.__get_js_array_name(), array_obj_list)
-        self._js_objects['JS_ARRAY'].append(js_array)
+        self._js_objects.add('JS_ARRAY', js_array)
         return js_array.newArray() + ";\n"
 
     def __add_js_string(self):
         js_str = JsString(self.__get_js_string_name())
-        self._js_objects['JS_STRING'].append(js_str)
-        return js_str.newString(random.choice(FuzzValues.STRINGS)) + ";\n"
+        self._js_objects.add('JS_STRING', js_str)
+        return js_str.newString(self._prng.choice(FuzzValues.STRINGS)) + ";\n"
 
     def __add_js_number(self):
         js_number = JsNumber(self.__get_js_number_name())
-        self._js_objects['JS_NUMBER'].append(js_number)
-        return js_number.newNumber(random.choice(FuzzValues.INTS)) + ";\n"
+        self._js_objects.add('JS_NUMBER', js_number)
+        return js_number.newNumber(self._choices.choice(self._prng, 'int', FuzzValues.INTS)) + ";\n"
 
     def __add_js_dom_element(self):
         var_name = "elem_" + str(len(self._js_objects['JS_DOM_ELEMENT']))
-        html_type = random.choice(HTML5_OBJECTS.keys())
+        html_type = self._prng.choice(Html5Fuzzer.TAGS)
         js_dom_element = JsDomElement(var_name, html_type)
-        self._js_objects['JS_DOM_ELEMENT'].append(js_dom_element)
+        self._js_objects.add('JS_DOM_ELEMENT', js_dom_element)
         return var_name + " = " + JsDocument.createElement(html_type) + ";\n"
 
     def __add_js_object(self):
         var_name = self.__get_js_object_name()
-        self._js_objects['JS_OBJECT'].append(JsObject(var_name))
-        available_types = self._js_objects.keys()
-        available_types.remove('JS_OBJECT')
-        js_obj_type = random.choice(available_types)
-        return var_name + " = " + (random.choice(self._js_objects[js_obj_type])).name + ";\n"
+        self._js_objects.add('JS_OBJECT', JsObject(var_name))
+        js_obj_type = self._prng.choice(self._js_objects.value_types)
+        return var_name + " = " + (self._prng.choice(self._js_objects[js_obj_type])).name + ";\n"
 
     def __get_js_dom_element_name(self):
         return "elem_" + str(len(self._js_objects['JS_DOM_ELEMENT']))
@@ -245,12 +286,8 @@ class JsFuzzer(Fuzzer):
         return "object_" + str(len(self._js_objects['JS_OBJECT']))
 
     def __get_an_js_object(self):
-        usable_object = self._js_objects.keys()
-        usable_object.remove('JS_OBJECT')
-        js_obj_type = 'JS_STRING' # random.choice(usable_object)
-        while not self._js_objects[js_obj_type]:
-            js_obj_type = random.choice(self._js_objects.keys())
-        js_obj = random.choice(self._js_objects[js_obj_type])
+        js_obj_type = 'JS_STRING' if self._js_objects['JS_STRING'] else self._prng.choice(self._js_objects.types)
+        js_obj = self._prng.choice(self._js_objects[js_obj_type])
         return js_obj
 
     @staticmethod
@@ -261,30 +298,29 @@ class JsFuzzer(Fuzzer):
         return False
     # endregion
 
-    def __build_function(self, func_type, length, func_name=None):
-        code = ""
+    def __build_function(self, code, func_type, length, func_name=None):
         func_end = ""
         block_length = length / 10
         if func_type == 'default':
             func_name = "func_" + str(len(self._js_default_functions))
             self._js_default_functions.append(func_name)
-            code += "function " + func_name + "() { \n"
+            code.emit("function " + func_name + "() { \n")
             func_end = "}\n"
         elif func_type == "array" or "event":
-            code += "function " + func_name + "(x) { \n"
+            code.emit("function " + func_name + "(x) { \n")
             func_end = "\treturn x;\n}\n" if func_type == "array" else "}\n"
         for i in range(length):
-            choice = random.randint(1, 20)
-            if choice <= 10:
-                code += "\t" + self.__build_assignment()
-            elif 10 < choice < 15:
-                code += self.__build_if_statement_block(block_length)
+            statement = self._choices.choice(self._prng, 'js_statement', self.STATEMENTS,
+                                             defaults=self.STATEMENT_WEIGHTS)
+            if statement == 'assignment':
+                code.emit("\t" + self.__build_assignment())
+            elif statement == 'if':
+                code.emit(self.__build_if_statement_block(block_length))
                 i += block_length
-            elif choice > 15:
-                code += self.__build_for_loop_block(block_length)
+            elif statement == 'for':
+                code.emit(self.__build_for_loop_block(block_length))
                 i += block_length
-        code += func_end
-        return code
+        code.emit(func_end)
 
     def __build_if_statement_block(self, length):
         code = "\tif " + self.__create_bool_expression() + "{ \n"
@@ -295,7 +331,7 @@ class JsFuzzer(Fuzzer):
 
     #  TODO: iterate over the array
     def __build_for_loop_block(self, length):
-        code = "\tfor (var i = 0; i < " + (random.choice(self._js_objects['JS_ARRAY'])).length() + ";i++) {\n"
+        code = "\tfor (var i = 0; i < " + (self._prng.choice(self._js_objects['JS_ARRAY'])).length() + ";i++) {\n"
         for i in range(length):
             code += "\t\t" + self.__build_assignment(False)
         code += "\t}\n"
@@ -305,9 +341,9 @@ class JsFuzzer(Fuzzer):
     #  TODO: also keep the JsDomElement functional (children and so on)
     def __build_assignment2(self, try_catch=True):
         code = ""
-        choice = random.randint(1, 20)
+        choice = self._prng.randint(1, 20)
         js_obj = self.__get_an_js_object()
-        js_method_name = random.choice(js_obj.methods_and_properties.keys())
+        js_method_name = self._prng.choice(js_obj.method_names)
         js_obj_method = js_obj.methods_and_properties[js_method_name]['method']
         js_method_ret_val = js_obj.methods_and_properties[js_method_name]['ret_val']
         js_method_parameters = js_obj.methods_and_properties[js_method_name]['parameters']
@@ -324,44 +360,45 @@ class JsFuzzer(Fuzzer):
             #  TODO: going deeper,
             #  TODO: e.g for strings call a method on a method call on method call and add it inside or outside
             if js_method_parameters is None or star_param:
-                code += js_obj_method()
+                code += js_obj_method(js_obj)
             else:
                 parameters = self.__get_params(js_obj, js_method_parameters)
-                code += js_obj_method(*parameters)
+                code += js_obj_method(js_obj, *parameters)
             js_method_ret_val = 'JS_NUMBER' if js_method_ret_val == "INT" or js_method_ret_val == "FLOAT" else js_method_ret_val
             if js_method_ret_val == "JS_DOM_ELEMENT":
-                new_js_obj = JsDomElement(self.__get_js_dom_element_name()) if choice < 10 else random.choice(self._js_objects['JS_DOM_ELEMENT'])
+                new_js_obj = JsDomElement(self.__get_js_dom_element_name()) if choice < 10 else self._prng.choice(self._js_objects['JS_DOM_ELEMENT'])
             # region JS_STRING
             elif js_method_ret_val == "JS_STRING":
-                new_js_obj = JsString(self.__get_js_string_name()) if choice < 10 else random.choice(self._js_objects['JS_STRING'])
+                new_js_obj = JsString(self.__get_js_string_name()) if choice < 10 else self._prng.choice(self._js_objects['JS_STRING'])
                 if choice > 15:
-                    add_js_str_obj = random.choice(self._js_objects['JS_STRING'])
+                    #  any live variable with a method returning a string can be the second operand
+                    add_js_str_obj, add_js_str_funcs = self._prng.choice(self._js_objects.providers('JS_STRING'))
                     second_obj_code = add_js_str_obj.name
                     for i in range(choice % 10):
-                        js_str_func = random.choice(js_obj.methods_and_properties_by_return_type['JS_STRING'])
-                        add_js_str_func = random.choice(add_js_str_obj.methods_and_properties_by_return_type['JS_STRING'])
+                        js_str_func = self._prng.choice(js_obj.methods_and_properties_by_return_type['JS_STRING'])
+                        add_js_str_func = self._prng.choice(add_js_str_funcs)
                         if js_str_func['parameters'] is not None and \
                                 not self.__check_params_for_optional(js_str_func['parameters']):
                             js_str_func_parameters = self.__get_params(js_obj, js_str_func['parameters'])
-                            code = "(" + code + ")" + (js_str_func['method'](*js_str_func_parameters)).replace(js_obj.name, "")
+                            code = "(" + code + ")" + (js_str_func['method'](js_obj, *js_str_func_parameters)).replace(js_obj.name, "")
                         else:
-                            code = "(" + code + ")" + (js_str_func['method']()).replace(js_obj.name, "")
+                            code = "(" + code + ")" + (js_str_func['method'](js_obj)).replace(js_obj.name, "")
                         if add_js_str_func['parameters'] is not None and \
                                 not self.__check_params_for_optional(add_js_str_func['parameters']):
                             add_js_str_func_parameters = self.__get_params(js_obj, add_js_str_func['parameters'])
-                            second_obj_code = "(" + second_obj_code + ")" + (add_js_str_func['method'](*add_js_str_func_parameters)).replace(add_js_str_obj.name, "")
+                            second_obj_code = "(" + second_obj_code + ")" + (add_js_str_func['method'](add_js_str_obj, *add_js_str_func_parameters)).replace(add_js_str_obj.name, "")
                         else:
-                            second_obj_code = "(" + second_obj_code + ")" + (add_js_str_func['method']()).replace(add_js_str_obj.name, "")
+                            second_obj_code = "(" + second_obj_code + ")" + (add_js_str_func['method'](add_js_str_obj)).replace(add_js_str_obj.name, "")
                     code = code + " + " + second_obj_code
             # endregion
             elif js_method_ret_val == "JS_NUMBER":
-                new_js_obj = JsNumber(self.__get_js_number_name()) if choice < 10 else random.choice(self._js_objects['JS_NUMBER'])
+                new_js_obj = JsNumber(self.__get_js_number_name()) if choice < 10 else self._prng.choice(self._js_objects['JS_NUMBER'])
                 pass
             elif js_method_ret_val == "JS_ARRAY":
-                new_js_obj = JsArray(self.__get_js_array_name()) if choice < 10 else random.choice(self._js_objects['JS_ARRAY'])
+                new_js_obj = JsArray(self.__get_js_array_name()) if choice < 10 else self._prng.choice(self._js_objects['JS_ARRAY'])
                 pass
             else:  # it's a js_object
-                new_js_obj = JsObject(self.__get_js_object_name()) if choice < 10 else random.choice(self._js_objects['JS_OBJECT'])
+                new_js_obj = JsObject(self.__get_js_object_name()) if choice < 10 else self._prng.choice(self._js_objects['JS_OBJECT'])
                 pass
             code = new_js_obj.name + " = " + code
         #  endregion
@@ -369,7 +406,7 @@ class JsFuzzer(Fuzzer):
         elif star_param and choice > 10:
             print("Star param")
             parameters = self.__get_params(js_obj, js_method_parameters)
-            code = js_obj_method(*parameters)
+            code = js_obj_method(js_obj, *parameters)
         # endregion
         # region JS_ARRAY or JS_DOM_CHILD_ELEMENT
         elif special_param[0]:
@@ -379,9 +416,10 @@ class JsFuzzer(Fuzzer):
         return code
 
     def __build_assignment(self, try_catch=True):
-        choice = random.randint(1, 20)
+        choice = self._prng.randint(1, 20)
         js_obj = self.__get_an_js_object()
-        js_function_name = random.choice(js_obj.methods_and_properties.keys())
+        js_function_name = self._choices.choice(self._prng, 'js_method', js_obj.method_names,
+                                                variant=js_obj.__class__.__name__)
         if js_function_name == "removeChild" or js_function_name == "replaceChild":
             children = js_obj.get_children()
             if not children:
@@ -399,37 +437,37 @@ class JsFuzzer(Fuzzer):
                         optional = True
         if parameters is not None:
             params = self.__get_params(js_obj, js_obj_function['parameters'])
-            code = js_obj_function['method'](*params)
+            code = js_obj_function['method'](js_obj, *params)
         else:
-            code = js_obj_function['method']()
+            code = js_obj_function['method'](js_obj)
         #  TODO: how to involve operators in numbers and strings ...
         if not optional:
             ret_val = "JS_STRING" if ret_val == "STRING" else ret_val
             ret_val = "JS_NUMBER" if ret_val == "INT" or ret_val == "EXP_FLOAT" or ret_val == "FLOAT" else ret_val
             if ret_val == "JS_DOM_ELEMENT":
-                new_js_obj = JsDomElement(self.__get_js_dom_element_name()) if choice < 10 else random.choice(self._js_objects['JS_DOM_ELEMENT'])
-                self._js_objects['JS_DOM_ELEMENT'].append(new_js_obj)
+                new_js_obj = JsDomElement(self.__get_js_dom_element_name()) if choice < 10 else self._prng.choice(self._js_objects['JS_DOM_ELEMENT'])
+                self._js_objects.add('JS_DOM_ELEMENT', new_js_obj)
             elif ret_val == "JS_STRING":
-                new_js_obj = JsString(self.__get_js_string_name()) if choice < 10 else random.choice(self._js_objects['JS_STRING'])
-                self._js_objects['JS_STRING'].append(new_js_obj)
+                new_js_obj = JsString(self.__get_js_string_name()) if choice < 10 else self._prng.choice(self._js_objects['JS_STRING'])
+                self._js_objects.add('JS_STRING', new_js_obj)
                 if choice >= 15:
-                    js_str = random.choice(self._js_objects['JS_STRING'])
-                    js_str_func = random.choice(js_str.methods_and_properties_by_return_type['JS_STRING'])
+                    js_str = self._prng.choice(self._js_objects['JS_STRING'])
+                    js_str_func = self._prng.choice(js_str.methods_and_properties_by_return_type['JS_STRING'])
                     js_str_func_params = self.__get_params(js_str, js_str_func['parameters']) if js_str_func['parameters'] is not None else None
-                    code += " + " + js_str_func['method'](*js_str_func_params) if js_str_func['parameters'] is not None else " + " + js_str_func['method']()
+                    code += " + " + js_str_func['method'](js_str, *js_str_func_params) if js_str_func['parameters'] is not None else " + " + js_str_func['method'](js_str)
             elif ret_val == "JS_NUMBER":
-                new_js_obj = JsNumber(self.__get_js_number_name()) if choice < 10 else random.choice(self._js_objects['JS_NUMBER'])
-                self._js_objects['JS_NUMBER'].append(new_js_obj)
+                new_js_obj = JsNumber(self.__get_js_number_name()) if choice < 10 else self._prng.choice(self._js_objects['JS_NUMBER'])
+                self._js_objects.add('JS_NUMBER', new_js_obj)
                 if choice >= 15:
-                    number_operator = random.choice(JsNumber.OPERATORS)
-                    js_number = random.choice(self._js_objects['JS_NUMBER'])
+                    number_operator = self._prng.choice(JsNumber.OPERATORS)
+                    js_number = self._prng.choice(self._js_objects['JS_NUMBER'])
                     code += " " + number_operator + " " + js_number.name
             elif ret_val == "JS_ARRAY":
-                new_js_obj = JsArray(self.__get_js_array_name()) if choice < 10 else random.choice(self._js_objects['JS_ARRAY'])
-                self._js_objects['JS_ARRAY'].append(new_js_obj)
+                new_js_obj = JsArray(self.__get_js_array_name()) if choice < 10 else self._prng.choice(self._js_objects['JS_ARRAY'])
+                self._js_objects.add('JS_ARRAY', new_js_obj)
             else:
-                new_js_obj = JsObject(self.__get_js_object_name()) if choice < 10 else random.choice(self._js_objects['JS_OBJECT'])
-                self._js_objects['JS_OBJECT'].append(new_js_obj)
+                new_js_obj = JsObject(self.__get_js_object_name()) if choice < 10 else self._prng.choice(self._js_objects['JS_OBJECT'])
+                self._js_objects.add('JS_OBJECT', new_js_obj)
             code = new_js_obj.name + " = " + code
         return JsGlobal.try_catch_block(code + "; ") if try_catch else code + ";\n"
 
@@ -437,105 +475,105 @@ class JsFuzzer(Fuzzer):
         ret_params = []
         for param in param_list:
             if param == 'BOOL':
-                switch = random.choice([0, 1])
+                switch = self._prng.choice([0, 1])
                 if switch == 0:
                     ret_params.append(self.__create_bool_expression())
                 elif switch == 1:
-                    ret_params.append(random.choice(FuzzValues.BOOL))
+                    ret_params.append(self._prng.choice(FuzzValues.BOOL))
             elif param == 'CLASS_NAME':
-                ret_params.append(random.choice(self._html_page.get_css_class_names()))
+                ret_params.append(self._prng.choice(self._html_page.get_css_class_names()))
             elif param == 'CSS_SELECTOR':  # Build a tag, tag, tag style selector
                 # TODO: Work through the CSS Selector reference
-                count = random.randint(1, 10)
+                count = self._prng.randint(1, 10)
                 css_selector = ""
                 for i in range(count):
-                    css_selector += random.choice(self._html_page.get_elements_by_html_tag().keys()) + ","
+                    css_selector += self._prng.choice(self._html_page.get_elements_by_html_tag().keys()) + ","
                 css_selector = css_selector[:-1]  # remove the comma
-                ret_params.append(random.choice(css_selector))
+                ret_params.append(self._prng.choice(css_selector))
             elif param == 'CSS_STYLE':
-                style = random.choice(CSS_STYLES)
+                style = self._choices.choice(self._prng, 'css_style', CSS_STYLES, FIRST)
                 ret_params.append(style[0])
-                ret_params.append(random.choice(style[1:]))
+                ret_params.append(self._prng.choice(style[1:]))
             elif param == 'EVENT':
-                ret_params.append(random.choice(DomObjectTypes.DOM_EVENTS))
+                ret_params.append(self._prng.choice(DomObjectTypes.DOM_EVENTS))
             elif param == 'HTML_ATTR':
-                html_attr = random.choice(HTML5_GLOBAL_ATTR.keys())
+                html_attr = self._prng.choice(HTML5_GLOBAL_ATTR.keys())
                 ret_params.append(html_attr)
                 if 'HTML_ATTR_VAL' in param_list:
                     if HTML5_GLOBAL_ATTR[html_attr] == "CSS_CLASS":
-                        ret_params.append(random.choice(self._html_page.get_css_class_names()))
+                        ret_params.append(self._prng.choice(self._html_page.get_css_class_names()))
                     elif html_attr == "style":
-                        style = random.choice(CSS_STYLES)
-                        ret_params.append(style[0] + " " + random.choice(style[1:]))
+                        style = self._choices.choice(self._prng, 'css_style', CSS_STYLES, FIRST)
+                        ret_params.append(style[0] + " " + self._prng.choice(style[1:]))
                     else:
-                        ret_params.append(random.choice(Html5Fuzzer.TYPES_DICT[HTML5_GLOBAL_ATTR[html_attr]]))
+                        ret_params.append(self._prng.choice(Html5Fuzzer.TYPES_DICT[HTML5_GLOBAL_ATTR[html_attr]]))
             elif param == 'HTML_ATTR_VAL':
                 continue
             elif param == 'HTML_CODE':
-                count = random.randint(1, 10)
+                count = self._prng.randint(1, 10)
                 ret_params.append(self._html_fuzzer.get_some_html_code(count))
             elif param == 'HTML_TAG':
-                ret_params.append(random.choice(HTML5_OBJECTS.keys()))
+                ret_params.append(self._prng.choice(Html5Fuzzer.TAGS))
             elif param == 'INT':
-                switch = random.choice([0, 1])
+                switch = self._prng.choice([0, 1])
                 if switch == 1:  # Get a JS_Number ID
-                    ret_params.append((random.choice(self._js_objects['JS_NUMBER'])).name)
+                    ret_params.append((self._prng.choice(self._js_objects['JS_NUMBER'])).name)
                 else:  # Get one from FuzzValues
-                    ret_params.append(random.choice(FuzzValues.PURE_INTS))
+                    ret_params.append(self._prng.choice(FuzzValues.PURE_INTS))
             elif param == 'JS_ARRAY':
-                ret_params.append(random.choice(self._js_objects['JS_ARRAY']))
+                ret_params.append(self._prng.choice(self._js_objects['JS_ARRAY']))
             elif param == 'JS_DOM_ELEMENT':
-                ret_params.append((random.choice(self._js_objects['JS_DOM_ELEMENT'])).name)
+                ret_params.append((self._prng.choice(self._js_objects['JS_DOM_ELEMENT'])).name)
             elif param == 'JS_DOM_CHILD_ELEMENT':
                 if not calling_obj.get_children():
-                    ret_params.append((random.choice(self._js_objects['JS_DOM_ELEMENT'])).name)
+                    ret_params.append((self._prng.choice(self._js_objects['JS_DOM_ELEMENT'])).name)
                 else:
-                    ret_params.append(random.choice(calling_obj.get_children()))
+                    ret_params.append(self._prng.choice(calling_obj.get_children()))
             elif param == 'JS_EVENT_LISTENER':
-                ret_params.append(random.choice(self._js_event_listener))
+                ret_params.append(self._prng.choice(self._js_event_listener))
             elif param == 'JS_ARRAY_FUNCTION':
-                ret_params.append(random.choice(self._js_array_functions))
+                ret_params.append(self._prng.choice(self._js_array_functions))
             elif param == 'JS_OBJECT':
-                obj_type = random.choice(self._js_objects.keys())
-                ret_params.append((random.choice(self._js_objects[obj_type])).name)
+                obj_type = self._prng.choice(self._js_objects.types)
+                ret_params.append((self._prng.choice(self._js_objects[obj_type])).name)
             elif param == 'LANG':
-                ret_params.append(random.choice(FuzzValues.LANG_CODES))
+                ret_params.append(self._prng.choice(FuzzValues.LANG_CODES))
             elif param == 'NAMESPACE_URI':
                 # TODO: think about namespace URIs
                 ret_params.append("localhost")
             elif param == 'NUMBER':
-                ret_params.append(random.choice(FuzzValues.INTS))
+                ret_params.append(self._choices.choice(self._prng, 'int', FuzzValues.INTS))
             elif param == 'REGEX':
                 # TODO: Build a regex builder method
                 ret_params.append("g/[*]+/")
             elif param == 'JS_STRING':
-                switch = random.choice([0, 1])
+                switch = self._prng.choice([0, 1])
                 if switch == 0:
-                    ret_params.append((random.choice(self._js_objects['JS_STRING'])).name)
+                    ret_params.append((self._prng.choice(self._js_objects['JS_STRING'])).name)
                 else:
-                    ret_params.append(random.choice(FuzzValues.STRINGS))
+                    ret_params.append(self._prng.choice(FuzzValues.STRINGS))
             elif param == 'TEXT_DIRECTION':
-                ret_params.append(random.choice(FuzzValues.TEXT_DIRECTION))
+                ret_params.append(self._prng.choice(FuzzValues.TEXT_DIRECTION))
             elif param == 'UNICODE_VALUE_LIST':
-                value = random.randint(0x0000, 0xFFFF)
+                value = self._prng.randint(0x0000, 0xFFFF)
                 ret_params.append(format(value, '04x'))
         return ret_params
 
     def __create_bool_expression(self):
         code = "("
-        operator = random.choice(JsGlobal.BOOL_OPERATORS)
-        operand_type = random.choice(self._js_objects.keys())
-        operand1 = random.choice(self._js_objects[operand_type])
-        operand2 = random.choice(self._js_objects[operand_type])
-        same_ret_val = [x for x in operand1.methods_and_properties_by_return_type.keys() if x in operand2.methods_and_properties_by_return_type.keys()]
-        ret_val = random.choice(same_ret_val)
-        operand1_func = random.choice(operand1.methods_and_properties_by_return_type[ret_val])
-        operand2_func = random.choice(operand2.methods_and_properties_by_return_type[ret_val])
+        operator = self._prng.choice(JsGlobal.BOOL_OPERATORS)
+        operand_type = self._prng.choice(self._js_objects.types)
+        operand1 = self._prng.choice(self._js_objects[operand_type])
+        operand2 = self._prng.choice(self._js_objects[operand_type])
+        #  both operands come from the same type list, so they have the same return types
+        ret_val = self._prng.choice(operand1.return_types)
+        operand1_func = self._prng.choice(operand1.methods_and_properties_by_return_type[ret_val])
+        operand2_func = self._prng.choice(operand2.methods_and_properties_by_return_type[ret_val])
         operand1_param = self.__get_params(operand1, operand1_func['parameters']) if operand1_func['parameters'] is not None and '*' not in ("" + x for x in operand1_func['parameters']) else None
         operand2_param = self.__get_params(operand2, operand2_func['parameters']) if operand2_func['parameters'] is not None and '*' not in ("" + x for x in operand2_func['parameters'])else None
-        code += operand1_func['method'](*operand1_param) if operand1_param is not None else operand1_func['method']()
+        code += operand1_func['method'](operand1, *operand1_param) if operand1_param is not None else operand1_func['method'](operand1)
         code += operator
-        code += operand2_func['method'](*operand2_param) if operand2_param is not None else operand2_func['method']()
+        code += operand2_func['method'](operand2, *operand2_param) if operand2_param is not None else operand2_func['method'](operand2)
         code += ")"
         return code
 
@@ -5,7 +5,7 @@ CSS_STYLES = [['align-content', 'stretch', 'center', 'flex-start', 'flex-end', '
                   ['align-self', 'stretch', 'center', 'flex-start', 'flex-end', 'space-between', 'space-around'],
                   ['background-attachment', 'fixed', 'scroll', 'local', 'initial', 'inherit'],
                   ['background-color', '#b0c4de', 'none', 'inherit', '#ff6600'],
-                  ['background-image', 'http://127.0.0.1:8080/pic.jpg', 'none', 'inherit'],
+                  ['background-image', '/pic.jpg', 'none', 'inherit'],
                   ['background-position', 'size', '50% 50%', '10 10', 'left top', 'right top' 'center top',
                    'left center', 'right center', 'left bottom', 'right bottom', 'center center', 'center bottom',
                    'inherit'],
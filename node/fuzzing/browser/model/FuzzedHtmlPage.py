@@ -6,15 +6,16 @@ from HtmlObjects import HTML5_OBJECTS
 class HtmlPage:
     def __init__(self):
         self._elements = {}
-        self._raw_html = ""
+        self._document = None
         self._css_class_names = []
         self._elements_by_tag = {}
 
-    def set_raw_html(self, html):
-        self._raw_html = html
+    def set_document(self, document):
+        #  CodeEmitter with the SCRIPT_BODY and TESTCASE slots
+        self._document = document
 
-    def get_raw_html(self):
-        return self._raw_html
+    def get_document(self):
+        return self._document
 
     def add_element(self, element_id, html_tag):
         self._elements[element_id] = html_tag
@@ -1,9 +1,84 @@
 # coding=utf8
-from JsObject import JsObject
+from JsObject import JsObject, method_tables
 
 
+@method_tables
 class JsDomElement(JsObject):
+    __slots__ = ['__registered_events', '__children', '__attributes', '__html_type']
     TYPE = "JsElement"
+    METHODS = {'addEventListener': {'ret_val': None, 'parameters': ['EVENT', 'JS_EVENT_LISTENER'], 'method': 'addEventListener'},
+               'appendChild': {'ret_val': None, 'parameters': ['JS_DOM_ELEMENT'], 'method': 'appendChild'},
+               'blur': {'ret_val': None, 'parameters': None, 'method': 'blur'},
+               'click': {'ret_val': None, 'parameters': None, 'method': 'click'},
+               'cloneNode': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': ['BOOL'], 'method': 'cloneNode'}, #  TODO: parameters
+               'compareDocumentPosition': {'ret_val': 'INT', 'parameters': ['JS_DOM_ELEMENT'], 'method': 'compareDocumentPosition'},
+               'focus': {'ret_val': None, 'parameters': None, 'method': 'focus'},
+               'getAttribute': {'ret_val': 'JS_STRING', 'parameters': ['HTML_ATTR'], 'method': 'getAttribute'},
+               'getAttributeNode': {'ret_val': 'JS_ATTR', 'parameters': ['HTML_ATTR'], 'method': 'getAttributeNode'},
+               'getElementsByClassName': {'ret_val': 'JS_NODE_LIST', 'parameters': ['CLASS_NAME'], 'method': 'getElementsByClassName'},
+               'getElementsByTagName': {'ret_val': 'JS_NODE_LIST', 'parameters': ['HTML_TAG'], 'method': 'getElementsByTagName'},
+               #'getFeature': {'ret_val': 0, 'parameters': None, 'method': 'getFeature'},
+               #'getUserData': {'ret_val': 0, 'parameters': None, 'method': 'getUserData'},
+               'hasAttribute': {'ret_val': 'BOOL', 'parameters': ['HTML_ATTR'], 'method': 'hasAttribute'},
+               'hasAttributes': {'ret_val': 'BOOL', 'parameters': None, 'method': 'hasAttributes'},
+               'hasChildNodes': {'ret_val': 'BOOL', 'parameters': None, 'method': 'hasChildNodes'},
+               'insertBefore': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': ['JS_DOM_ELEMENT', 'JS_DOM_ELEMENT'], 'method': 'insertBefore'},
+               'isDefaultNamespace': {'ret_val': 'BOOL', 'parameters': None, 'method': 'isDefaultNamespace'},
+               'isEqualNode': {'ret_val': 'BOOL', 'parameters': ['JS_DOM_ELEMENT'], 'method': 'isEqualNode'},
+               'isSameNode': {'ret_val': 'BOOL', 'parameters': ['JS_DOM_ELEMENT'], 'method': 'isSameNode'},
+               #'isSupported': {'ret_val': 0, 'parameters': 0, 'method': 'isSupported'},
+               'normalize': {'ret_val': None, 'parameters': None, 'method': 'normalize'},
+               'querySelector': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': ['CSS_SELECTOR'], 'method': 'querySelector'},
+               'querySelectorAll': {'ret_val': 'JS_NODE_LIST', 'parameters': ['CSS_SELECTOR'], 'method': 'querySelectorAll'},
+               'removeAttribute': {'ret_val': None, 'parameters': ['HTML_ATTR'], 'method': 'removeAttribute'},
+               'removeChild': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': ['JS_DOM_CHILD_ELEMENT'], 'method': 'removeChild'},
+               'replaceChild': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': ['JS_DOM_ELEMENT', 'JS_DOM_CHILD_ELEMENT'], 'method': 'replaceChild'},
+               'removeEventListener': {'ret_val': None, 'parameters': ['EVENT', 'JS_EVENT_LISTENER'], 'method': 'removeEventListener'},
+               'select': {'ret_val': None, 'parameters': None, 'method': 'select'},
+               'setAttribute': {'ret_val': None, 'parameters': ['HTML_ATTR', 'HTML_ATTR_VAL'], 'method': 'setAttribute'},
+               #'setUserData': {'ret_val': 0, 'parameters': 0, 'method': 'setUserData'},
+               #'item': {'ret_val': 0, 'parameters': 0, 'method': 'item'},
+               # -------------------------- PROPERTIES -----------------------------------
+               #  TODO: think about how to change PROPERTIES ....
+               # -------------------------------------------------------------------------
+               'accessKey': {'ret_val': 'JS_STRING', 'parameters': None, 'method': 'accessKey'},
+               'attributes_prop': {'ret_val': 'JS_NODE_MAP', 'parameters': None, 'method': 'attributes_prop'},
+               'childNodes': {'ret_val': 'JS_NODE_LIST', 'parameters': None, 'method': 'childNodes'},
+               'className': {'ret_val': 'JS_STRING', 'parameters': ['JS_STRING*'], 'method': 'className'},
+               'clientHeight': {'ret_val': 'INT', 'parameters': None, 'method': 'clientHeight'},
+               'clientWidth': {'ret_val': 'INT', 'parameters': None, 'method': 'clientWidth'},
+               'contentEditable': {'ret_val': 'BOOL', 'parameters': None, 'method': 'contentEditable'},
+               'dir': {'ret_val': 'TEXT_DIRECTION', 'parameters': ['TEXT_DIRECTION*'], 'method': 'dir'},
+               'firstChild': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': None, 'method': 'firstChild'},
+               'id': {'ret_val': 'JS_IDENTIFIER', 'parameters': None, 'method': 'id'},
+               'innerHtml': {'ret_val': 'HTML_CODE', 'parameters': ['HTML_CODE*'], 'method': 'innerHtml'},
+               'isContentEditable': {'ret_val': 'BOOL', 'parameters': None, 'method': 'isContentEditable'},
+               'lang': {'ret_val': 'LANG', 'parameters': ['LANG_CODE*'], 'method': 'lang'},
+               'lastChild': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': None, 'method': 'lastChild'},
+               'namespaceURI': {'ret_val': 'NAMESPACE_URI', 'parameters': None, 'method': 'namespaceURI'},
+               'nodeName': {'ret_val': 'JS_STRING', 'parameters': None, 'method': 'nodeName'},
+               'nextSibling': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': None, 'method': 'nextSibling'},
+               'nodeType': {'ret_val': 'INT', 'parameters': None, 'method': 'nodeType'},
+               'nodeValue': {'ret_val': 'JS_STRING', 'parameters': ['JS_STRING*'], 'method': 'nodeValue'},
+               'offsetHeight': {'ret_val': 'INT', 'parameters': None, 'method': 'offsetHeight'},
+               'offsetWidth': {'ret_val': 'INT', 'parameters': None, 'method': 'offsetWidth'},
+               'offsetLeft': {'ret_val': 'INT', 'parameters': None, 'method': 'offsetLeft'},
+               'offsetParent': {'ret_val': 'INT', 'parameters': None, 'method': 'offsetParent'},
+               'offsetTop': {'ret_val': 'INT', 'parameters': None, 'method': 'offsetTop'},
+               #'ownerDocument': {'ret_val': 'JS_DOCUMENT', 'parameters': None, 'method': 'ownerDocument'},
+               'parentNode': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': None, 'method': 'parentNode'},
+               'previousSibling': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': None, 'method': 'previousSibling'},
+               'scrollHeight': {'ret_val': 'INT', 'parameters': None, 'method': 'scrollHeight'},
+               'scrollLeft': {'ret_val': 'INT', 'parameters': None, 'method': 'scrollLeft'},
+               'scrollTop': {'ret_val': 'INT', 'parameters': None, 'method': 'scrollTop'},
+               'scrollWidth': {'ret_val': 'INT', 'parameters': None, 'method': 'scrollWidth'},
+               'style': {'ret_val': 'CSS_STYLE', 'parameters': ['CSS_STYLE*'], 'method': 'style'},
+               'tabIndex': {'ret_val': 'INT', 'parameters': ['INT*'], 'method': 'tabIndex'},
+               'tagName': {'ret_val': 'HTML_TAG', 'parameters': None, 'method': 'tagName'},
+               'textContent': {'ret_val': 'JS_STRING', 'parameters': ['JS_STRING*'], 'method': 'textContent'},
+               'title': {'ret_val': 'JS_STRING', 'parameters': ['JS_STRING*'], 'method': 'title'},
+
+               }
 
     def __init__(self, var_name, html_type=None):
         JsObject.__init__(self, var_name)
@@ -11,80 +86,6 @@ class JsDomElement(JsObject):
         self.__children = []
         self.__attributes = {}
         self.__html_type = html_type
-        js_element_methods_and_properties = {'addEventListener': {'ret_val': None, 'parameters': ['EVENT', 'JS_EVENT_LISTENER'], 'method': self.addEventListener},
-                                             'appendChild': {'ret_val': None, 'parameters': ['JS_DOM_ELEMENT'], 'method': self.appendChild},
-                                             'blur': {'ret_val': None, 'parameters': None, 'method': self.blur},
-                                             'click': {'ret_val': None, 'parameters': None, 'method': self.click},
-                                             'cloneNode': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': ['BOOL'], 'method': self.cloneNode}, #  TODO: parameters
-                                             'compareDocumentPosition': {'ret_val': 'INT', 'parameters': ['JS_DOM_ELEMENT'], 'method': self.compareDocumentPosition},
-                                             'focus': {'ret_val': None, 'parameters': None, 'method': self.focus},
-                                             'getAttribute': {'ret_val': 'JS_STRING', 'parameters': ['HTML_ATTR'], 'method': self.getAttribute},
-                                             'getAttributeNode': {'ret_val': 'JS_ATTR', 'parameters': ['HTML_ATTR'], 'method': self.getAttributeNode},
-                                             'getElementsByClassName': {'ret_val': 'JS_NODE_LIST', 'parameters': ['CLASS_NAME'], 'method': self.getElementsByClassName},
-                                             'getElementsByTagName': {'ret_val': 'JS_NODE_LIST', 'parameters': ['HTML_TAG'], 'method': self.getElementsByTagName},
-                                             #'getFeature': {'ret_val': 0, 'parameters': None, 'method': self.getFeature},
-                                             #'getUserData': {'ret_val': 0, 'parameters': None, 'method': self.getUserData},
-                                             'hasAttribute': {'ret_val': 'BOOL', 'parameters': ['HTML_ATTR'], 'method': self.hasAttribute},
-                                             'hasAttributes': {'ret_val': 'BOOL', 'parameters': None, 'method': self.hasAttributes},
-                                             'hasChildNodes': {'ret_val': 'BOOL', 'parameters': None, 'method': self.hasChildNodes},
-                                             'insertBefore': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': ['JS_DOM_ELEMENT', 'JS_DOM_ELEMENT'], 'method': self.insertBefore},
-                                             'isDefaultNamespace': {'ret_val': 'BOOL', 'parameters': None, 'method': self.isDefaultNamespace},
-                                             'isEqualNode': {'ret_val': 'BOOL', 'parameters': ['JS_DOM_ELEMENT'], 'method': self.isEqualNode},
-                                             'isSameNode': {'ret_val': 'BOOL', 'parameters': ['JS_DOM_ELEMENT'], 'method': self.isSameNode},
-                                             #'isSupported': {'ret_val': 0, 'parameters': 0, 'method': self.isSupported},
-                                             'normalize': {'ret_val': None, 'parameters': None, 'method': self.normalize},
-                                             'querySelector': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': ['CSS_SELECTOR'], 'method': self.querySelector},
-                                             'querySelectorAll': {'ret_val': 'JS_NODE_LIST', 'parameters': ['CSS_SELECTOR'], 'method': self.querySelectorAll},
-                                             'removeAttribute': {'ret_val': None, 'parameters': ['HTML_ATTR'], 'method': self.removeAttribute},
-                                             'removeChild': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': ['JS_DOM_CHILD_ELEMENT'], 'method': self.removeChild},
-                                             'replaceChild': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': ['JS_DOM_ELEMENT', 'JS_DOM_CHILD_ELEMENT'], 'method': self.replaceChild},
-                                             'removeEventListener': {'ret_val': None, 'parameters': ['EVENT', 'JS_EVENT_LISTENER'], 'method': self.removeEventListener},
-                                             'select': {'ret_val': None, 'parameters': None, 'method': self.select},
-                                             'setAttribute': {'ret_val': None, 'parameters': ['HTML_ATTR', 'HTML_ATTR_VAL'], 'method': self.setAttribute},
-                                             #'setUserData': {'ret_val': 0, 'parameters': 0, 'method': self.setUserData},
-                                             #'item': {'ret_val': 0, 'parameters': 0, 'method': self.item},
-                                             # -------------------------- PROPERTIES -----------------------------------
-                                             #  TODO: think about how to change PROPERTIES ....
-                                             # -------------------------------------------------------------------------
-                                             'accessKey': {'ret_val': 'JS_STRING', 'parameters': None, 'method': self.accessKey},
-                                             'attributes_prop': {'ret_val': 'JS_NODE_MAP', 'parameters': None, 'method': self.attributes_prop},
-                                             'childNodes': {'ret_val': 'JS_NODE_LIST', 'parameters': None, 'method': self.childNodes},
-                                             'className': {'ret_val': 'JS_STRING', 'parameters': ['JS_STRING*'], 'method': self.className},
-                                             'clientHeight': {'ret_val': 'INT', 'parameters': None, 'method': self.clientHeight},
-                                             'clientWidth': {'ret_val': 'INT', 'parameters': None, 'method': self.clientWidth},
-                                             'contentEditable': {'ret_val': 'BOOL', 'parameters': None, 'method': self.contentEditable},
-                                             'dir': {'ret_val': 'TEXT_DIRECTION', 'parameters': ['TEXT_DIRECTION*'], 'method': self.dir},
-                                             'firstChild': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': None, 'method': self.firstChild},
-                                             'id': {'ret_val': 'JS_IDENTIFIER', 'parameters': None, 'method': self.id},
-                                             'innerHtml': {'ret_val': 'HTML_CODE', 'parameters': ['HTML_CODE*'], 'method': self.innerHtml},
-                                             'isContentEditable': {'ret_val': 'BOOL', 'parameters': None, 'method': self.isContentEditable},
-                                             'lang': {'ret_val': 'LANG', 'parameters': ['LANG_CODE*'], 'method': self.lang},
-                                             'lastChild': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': None, 'method': self.lastChild},
-                                             'namespaceURI': {'ret_val': 'NAMESPACE_URI', 'parameters': None, 'method': self.namespaceURI},
-                                             'nodeName': {'ret_val': 'JS_STRING', 'parameters': None, 'method': self.nodeName},
-                                             'nextSibling': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': None, 'method': self.nextSibling},
-                                             'nodeType': {'ret_val': 'INT', 'parameters': None, 'method': self.nodeType},
-                                             'nodeValue': {'ret_val': 'JS_STRING', 'parameters': ['JS_STRING*'], 'method': self.nodeValue},
-                                             'offsetHeight': {'ret_val': 'INT', 'parameters': None, 'method': self.offsetHeight},
-                                             'offsetWidth': {'ret_val': 'INT', 'parameters': None, 'method': self.offsetWidth},
-                                             'offsetLeft': {'ret_val': 'INT', 'parameters': None, 'method': self.offsetLeft},
-                                             'offsetParent': {'ret_val': 'INT', 'parameters': None, 'method': self.offsetParent},
-                                             'offsetTop': {'ret_val': 'INT', 'parameters': None, 'method': self.offsetTop},
-                                             #'ownerDocument': {'ret_val': 'JS_DOCUMENT', 'parameters': None, 'method': self.ownerDocument},
-                                             'parentNode': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': None, 'method': self.parentNode},
-                                             'previousSibling': {'ret_val': 'JS_DOM_ELEMENT', 'parameters': None, 'method': self.previousSibling},
-                                             'scrollHeight': {'ret_val': 'INT', 'parameters': None, 'method': self.scrollHeight},
-                                             'scrollLeft': {'ret_val': 'INT', 'parameters': None, 'method': self.scrollLeft},
-                                             'scrollTop': {'ret_val': 'INT', 'parameters': None, 'method': self.scrollTop},
-                                             'scrollWidth': {'ret_val': 'INT', 'parameters': None, 'method': self.scrollWidth},
-                                             'style': {'ret_val': 'CSS_STYLE', 'parameters': ['CSS_STYLE*'], 'method': self.style},
-                                             'tabIndex': {'ret_val': 'INT', 'parameters': ['INT*'], 'method': self.tabIndex},
-                                             'tagName': {'ret_val': 'HTML_TAG', 'parameters': None, 'method': self.tagName},
-                                             'textContent': {'ret_val': 'JS_STRING', 'parameters': ['JS_STRING*'], 'method': self.textContent},
-                                             'title': {'ret_val': 'JS_STRING', 'parameters': ['JS_STRING*'], 'method': self.title},
-
-                                             }
-        self._methods_and_properties.update(js_element_methods_and_properties)
 
     @property
     def registered_events(self):
@@ -1,15 +1,52 @@
 __author__ = 'susperius'
 
+"""
+The method tables of the JS object model belong to the classes, not to the objects: every class lists its own methods
+and properties in METHODS ('method' is the name of the python method), method_tables() merges them with the ones of
+the base classes once at import and indexes them by name, return type and parameter type. In the tables 'method' is
+the plain function, it is called with the object as first argument.
+The merge replays the updates of the base tables in the same order as before, so the choices of the fuzzers (and the
+testcases of a seed) don't change.
+"""
+
 JS_OBJECTS = ['JS_OBJECT', 'JS_STRING', 'JS_NUMBER', 'JS_ARRAY', 'JS_DOM_ELEMENT']  # 'JS_DATE',
 
 
-class JsObject:
+def method_tables(cls):
+    table = {}
+    for klass in reversed(cls.__mro__):
+        if 'METHODS' in klass.__dict__:
+            table.update(klass.__dict__['METHODS'])
+            for name, entry in klass.__dict__['METHODS'].items():
+                table[name] = {'ret_val': entry['ret_val'], 'parameters': entry['parameters'],
+                               'method': getattr(cls, entry['method']).im_func}
+    by_return_type = {}
+    by_parameters = {}
+    for name in table.keys():
+        entry = table[name]
+        by_return_type.setdefault(entry['ret_val'], []).append(entry)
+        for param in entry['parameters'] or []:
+            by_parameters.setdefault(param, []).append(entry)
+    for index in (by_return_type, by_parameters):
+        for key in index.keys():
+            index[key] = tuple(index[key])
+    cls.METHODS_AND_PROPERTIES = table
+    cls.METHOD_NAMES = tuple(table.keys())
+    cls.BY_RETURN_TYPE = by_return_type
+    cls.RETURN_TYPES = tuple(by_return_type.keys())
+    cls.BY_PARAMETERS = by_parameters
+    return cls
+
+
+@method_tables
+class JsObject(object):
+    __slots__ = ['_name']
     TYPE = "JsObject"
     OPERATORS = []
+    METHODS = {'toString': {'ret_val': 'JS_STRING', 'parameters': None, 'method': 'toString'}}
 
     def __init__(self, name):
         self._name = name
-        self._methods_and_properties = {'toString': {'ret_val': 'JS_STRING', 'parameters': None, 'method': self.toString}}
 
     @property
     def name(self):
@@ -17,62 +54,54 @@ class JsObject:
 
     @property
     def methods_and_properties(self):
-        return self._methods_and_properties
+        return self.METHODS_AND_PROPERTIES
+
+    @property
+    def method_names(self):
+        return self.METHOD_NAMES
 
     @property
     def methods_and_properties_by_return_type(self):
-        ret_val = {}
-        for key in self._methods_and_properties.keys():
-            if self._methods_and_properties[key]['ret_val'] not in ret_val.keys():
-                ret_val[self._methods_and_properties[key]['ret_val']] = [{'parameters': self._methods_and_properties[key]['parameters'], 'method': self._methods_and_properties[key]['method']}]
-            else:
-                ret_val[self._methods_and_properties[key]['ret_val']].append({'parameters': self._methods_and_properties[key]['parameters'], 'method': self._methods_and_properties[key]['method']})
-        return ret_val
+        return self.BY_RETURN_TYPE
+
+    @property
+    def return_types(self):
+        return self.RETURN_TYPES
 
     @property
     def methods_and_properties_by_parameters(self):
-        ret_val = {}
-        for key in self._methods_and_properties.keys():
-            if self._methods_and_properties[key]['parameters'] is not None:
-                for param in self._methods_and_properties[key]['parameters']:
-                    if param not in ret_val.keys():
-                        ret_val[param] = [{'ret_val': self._methods_and_properties[key]['ret_val'], 'parameters': self._methods_and_properties[key]['parameters'], 'method': self._methods_and_properties[key]['method']}]
-                    else:
-                        ret_val[param].append({'ret_val': self._methods_and_properties[key]['ret_val'], 'parameters': self._methods_and_properties[key]['parameters'], 'method': self._methods_and_properties[key]['method']})
-        return ret_val
+        return self.BY_PARAMETERS
 
     def toString(self):
         return self._name + ".toString()"
 
 
+@method_tables
 class JsString(JsObject):
+    __slots__ = []
     TYPE = "JsString"
     OPERATORS = ['+']
-
-    def __init__(self, name):
-        JsObject.__init__(self, name)
-        js_string_methods = {'charAt': {'ret_val': 'JS_STRING', 'parameters': ['INT'], 'method': self.charAt},
-                             'charCodeAt': {'ret_val': 'INT', 'parameters': ['INT'], 'method': self.charCodeAt},
-                             'concat': {'ret_val': 'JS_STRING', 'parameters': ['JS_STRING'], 'method': self.concat},
-                             'fromCharCode': {'ret_val': 'JS_STRING', 'parameters': ['UNICODE_VALUE_LIST'], 'method': self.fromCharCode},
-                             'indexOf': {'ret_val': 'INT', 'parameters': ['JS_STRING'], 'method': self.indexOf},
-                             'lastIndexOf': {'ret_val': 'INT', 'parameters': ['JS_STRING'], 'method': self.lastIndexOf},
-                             'localeCompare': {'ret_val': 'INT', 'parameters': ['JS_STRING'], 'method': self.localeCompare},
-                             'match': {'ret_val': 'JS_STRING', 'parameters': ['REGEX'], 'method': self.match},
-                             'replace': {'ret_val': 'JS_STRING' ,'parameters': ['JS_STRING', 'JS_STRING'], 'method': self.replace},
-                             'slice': {'ret_val': 'JS_STRING','parameters': ['INT', 'INT'], 'method': self.slice},
-                             'split': {'ret_val': 'JS_STRING', 'parameters': ['JS_STRING'], 'method': self.split},
-                             'substr': {'ret_val': 'JS_STRING', 'parameters': ['INT', 'INT'], 'method': self.substr},
-                             'substring': {'ret_val': 'JS_STRING', 'parameters': ['INT', 'INT'], 'method': self.substring},
-                             'toLocaleLowerCase': {'ret_val': 'JS_STRING', 'parameters': None, 'method': self.toLocaleLowerCase},
-                             'toLowerCase': {'ret_val': 'JS_STRING', 'parameters': None, 'method': self.toLowerCase},
-                             'toLocaleUpperCase': {'ret_val': 'JS_STRING', 'parameters': None, 'method': self.toLocaleUpperCase},
-                             'toUpperCase': {'ret_val': 'JS_STRING', 'parameters': None, 'method': self.toUpperCase},
-                             'trim': {'ret_val': 'JS_STRING', 'parameters': None, 'method': self.trim},
-                             'valueOf': {'ret_val': 'JS_STRING', 'parameters': None, 'method': self.valueOf},
-                             'length': {'ret_val': 'INT', 'parameters': None, 'method': self.length}
-                             }
-        self._methods_and_properties.update(js_string_methods)
+    METHODS = {'charAt': {'ret_val': 'JS_STRING', 'parameters': ['INT'], 'method': 'charAt'},
+               'charCodeAt': {'ret_val': 'INT', 'parameters': ['INT'], 'method': 'charCodeAt'},
+               'concat': {'ret_val': 'JS_STRING', 'parameters': ['JS_STRING'], 'method': 'concat'},
+               'fromCharCode': {'ret_val': 'JS_STRING', 'parameters': ['UNICODE_VALUE_LIST'], 'method': 'fromCharCode'},
+               'indexOf': {'ret_val': 'INT', 'parameters': ['JS_STRING'], 'method': 'indexOf'},
+               'lastIndexOf': {'ret_val': 'INT', 'parameters': ['JS_STRING'], 'method': 'lastIndexOf'},
+               'localeCompare': {'ret_val': 'INT', 'parameters': ['JS_STRING'], 'method': 'localeCompare'},
+               'match': {'ret_val': 'JS_STRING', 'parameters': ['REGEX'], 'method': 'match'},
+               'replace': {'ret_val': 'JS_STRING' ,'parameters': ['JS_STRING', 'JS_STRING'], 'method': 'replace'},
+               'slice': {'ret_val': 'JS_STRING','parameters': ['INT', 'INT'], 'method': 'slice'},
+               'split': {'ret_val': 'JS_STRING', 'parameters': ['JS_STRING'], 'method': 'split'},
+               'substr': {'ret_val': 'JS_STRING', 'parameters': ['INT', 'INT'], 'method': 'substr'},
+               'substring': {'ret_val': 'JS_STRING', 'parameters': ['INT', 'INT'], 'method': 'substring'},
+               'toLocaleLowerCase': {'ret_val': 'JS_STRING', 'parameters': None, 'method': 'toLocaleLowerCase'},
+               'toLowerCase': {'ret_val': 'JS_STRING', 'parameters': None, 'method': 'toLowerCase'},
+               'toLocaleUpperCase': {'ret_val': 'JS_STRING', 'parameters': None, 'method': 'toLocaleUpperCase'},
+               'toUpperCase': {'ret_val': 'JS_STRING', 'parameters': None, 'method': 'toUpperCase'},
+               'trim': {'ret_val': 'JS_STRING', 'parameters': None, 'method': 'trim'},
+               'valueOf': {'ret_val': 'JS_STRING', 'parameters': None, 'method': 'valueOf'},
+               'length': {'ret_val': 'INT', 'parameters': None, 'method': 'length'}
+               }
 
     def newString(self, value):
         return self._name + " = \"" + str(value) + "\""
@@ -145,18 +174,16 @@ class JsString(JsObject):
         return self._name + ".length"
 
 
+@method_tables
 class JsNumber(JsObject):
+    __slots__ = []
     TYPE = "JsNumber"
     OPERATORS = ['+', '-', '*', '/', '%']
-
-    def __init__(self, name):
-        JsObject.__init__(self, name)
-        js_number_methods = {'toExponential': {'ret_val': 'EXP_FLOAT', 'parameters': ['NUMBER'], 'method': self.toExponential},
-                             'toFixed': {'ret_val': 'JS_STRING', 'parameters': ['INT'], 'method': self.toFixed},
-                             'toPrecision': {'ret_val': 'FLOAT', 'parameters': ['INT'], 'method': self.toPrecision},
-                             'valueOf': {'ret_val': 'INT', 'parameters': None, 'method': self.valueOf}
-                             }
-        self._methods_and_properties.update(js_number_methods)
+    METHODS = {'toExponential': {'ret_val': 'EXP_FLOAT', 'parameters': ['NUMBER'], 'method': 'toExponential'},
+               'toFixed': {'ret_val': 'JS_STRING', 'parameters': ['INT'], 'method': 'toFixed'},
+               'toPrecision': {'ret_val': 'FLOAT', 'parameters': ['INT'], 'method': 'toPrecision'},
+               'valueOf': {'ret_val': 'INT', 'parameters': None, 'method': 'valueOf'}
+               }
 
     def newNumber(self, value):
         return self._name + " = " + str(value)
@@ -176,8 +203,22 @@ class JsNumber(JsObject):
     # TODO: Add properties
 
 
+@method_tables
 class JsArray(JsObject):
+    __slots__ = ['_array_elements']
     TYPE = "JsArray"
+    METHODS = {'concat': {'ret_val': 'JS_ARRAY', 'parameters': ['JS_ARRAY'], 'method': 'concat'},
+               'every': {'ret_val': 'BOOL', 'parameters': ['JS_ARRAY_FUNCTION'], 'method': 'every'},
+               'filter': {'ret_val': 'JS_ARRAY', 'parameters': ['JS_ARRAY_FUNCTION'], 'method': 'filter'},
+               'indexOf': {'ret_val': 'INT', 'parameters': ['JS_OBJECT'], 'method': 'indexOf'},
+               'join': {'ret_val': 'JS_STRING', 'parameters': None, 'method': 'join'},
+               'lastIndexOf': {'ret_val': 'INT', 'parameters': ['JS_OBJECT'], 'method': 'lastIndexOf'},
+               'map': {'ret_val': 'JS_ARRAY', 'parameters': ['JS_ARRAY_FUNCTION'], 'method': 'map'},
+               'pop': {'ret_val': 'JS_OBJECT', 'parameters': None, 'method': 'pop'},
+               'push': {'ret_val': 'JS_ARRAY', 'parameters': ['JS_OBJECT'], 'method': 'push'},
+               'reverse': {'ret_val': 'JS_ARRAY', 'parameters': None, 'method': 'reverse'},
+               'shift': {'ret_val': 'JS_ARRAY', 'parameters': None, 'method': 'shift'}
+               }
 
     def __init__(self, name, array_elements=None):
         JsObject.__init__(self, name)
@@ -186,19 +227,6 @@ class JsArray(JsObject):
             self._array_elements = array_elements
         else:
             self._array_elements = []
-        self._js_array_methods_and_properties = {'concat': {'ret_val': 'JS_ARRAY', 'parameters': ['JS_ARRAY'], 'method': self.concat},
-                                                 'every': {'ret_val': 'BOOL', 'parameters': ['JS_ARRAY_FUNCTION'], 'method': self.every},
-                                                 'filter': {'ret_val': 'JS_ARRAY', 'parameters': ['JS_ARRAY_FUNCTION'], 'method': self.filter},
-                                                 'indexOf': {'ret_val': 'INT', 'parameters': ['JS_OBJECT'], 'method': self.indexOf},
-                                                 'join': {'ret_val': 'JS_STRING', 'parameters': None, 'method': self.join},
-                                                 'lastIndexOf': {'ret_val': 'INT', 'parameters': ['JS_OBJECT'], 'method': self.lastIndexOf},
-                                                 'map': {'ret_val': 'JS_ARRAY', 'parameters': ['JS_ARRAY_FUNCTION'], 'method': self.map},
-                                                 'pop': {'ret_val': 'JS_OBJECT', 'parameters': None, 'method': self.pop},
-                                                 'push': {'ret_val': 'JS_ARRAY', 'parameters': ['JS_OBJECT'], 'method': self.push},
-                                                 'reverse': {'ret_val': 'JS_ARRAY', 'parameters': None, 'method': self.reverse},
-                                                 'shift': {'ret_val': 'JS_ARRAY', 'parameters': None, 'method': self.shift}
-                                                 }
-        self._methods_and_properties.update(self._js_array_methods_and_properties)
 
     @property
     def array_elements(self):
@@ -257,22 +285,21 @@ class JsArray(JsObject):
         return self._name + ".length"
 
 
+@method_tables
 class JsDate(JsObject):
+    __slots__ = []
     TYPE = "JsDate"
-
-    def __init__(self, name):
-        JsObject.__init__(self, name)
-        self._js_date_methods_and_properties = {'getDate': {'ret_val': 'INT', 'parameters': None, 'method': self.getDate},
-                                                'getDay': {'ret_val': 'INT', 'parameters': None, 'method': self.getDay},
-                                                'getFullYear': {'ret_val': 'INT', 'parameters': None, 'method': self.getFullYear},
-                                                'getHours': {'ret_val': 'INT', 'parameters': None, 'method': self.getHours},
-                                                'getMilliseconds': {'ret_val': 'INT', 'parameters': None, 'method': self.getMilliseconds},
-                                                'getMinutes': {'ret_val': 'INT', 'parameters': None, 'method': self.getMinutes},
-                                                'getMonth': {'ret_val': 'INT', 'parameters': None, 'method': self.getMonth},
-                                                'getSeconds': {'ret_val': 'INT', 'parameters': None, 'method': self.getSeconds},
-                                                'getTime': {'ret_val': 'INT', 'parameters': None, 'method': self.getTime},
-                                                'getTimezoneOffset': {'ret_val': 'INT', 'parameters': None, 'method': self.getTimezoneOffset},
-                                                }
+    METHODS = {'getDate': {'ret_val': 'INT', 'parameters': None, 'method': 'getDate'},
+               'getDay': {'ret_val': 'INT', 'parameters': None, 'method': 'getDay'},
+               'getFullYear': {'ret_val': 'INT', 'parameters': None, 'method': 'getFullYear'},
+               'getHours': {'ret_val': 'INT', 'parameters': None, 'method': 'getHours'},
+               'getMilliseconds': {'ret_val': 'INT', 'parameters': None, 'method': 'getMilliseconds'},
+               'getMinutes': {'ret_val': 'INT', 'parameters': None, 'method': 'getMinutes'},
+               'getMonth': {'ret_val': 'INT', 'parameters': None, 'method': 'getMonth'},
+               'getSeconds': {'ret_val': 'INT', 'parameters': None, 'method': 'getSeconds'},
+               'getTime': {'ret_val': 'INT', 'parameters': None, 'method': 'getTime'},
+               'getTimezoneOffset': {'ret_val': 'INT', 'parameters': None, 'method': 'getTimezoneOffset'},
+               }
 
     def newDate(self, value):
         return self.name + " = " + "new Date()"
@@ -331,4 +358,4 @@ class JsDate(JsObject):
     def getUTCSeconds(self):
         return self._name + ".getUTCSeconds()"
 
-#  Go on ....
\ No newline at end of file
+#  Go on ....
@@ -0,0 +1,57 @@
+__author__ = 'susperius'
+
+from JsObject import JS_OBJECTS
+
+"""
+The live JS variables of a generated page, indexed by their type and by the return types their methods provide. The type
+index is updated on every declaration (add), so the fuzzer draws a valid candidate with a single choice instead of
+retrying on empty types. The provider index is only brought up to date when it is asked for, from the class tables of
+the variables declared since then; a variable is indexed once however often it is assigned again. The types keep the
+order of the former _js_objects dict keys, a choice over them draws the same type as before for the same PRNG state.
+"""
+
+
+class JsVariables:
+    TYPES = tuple(dict.fromkeys(JS_OBJECTS).keys())
+
+    def __init__(self):
+        self._by_type = {}
+        for js_obj_type in self.TYPES:
+            self._by_type[js_obj_type] = []
+        self._types = ()
+        self._value_types = ()
+        self._providers = {}
+        self._declared = []  # every variable once, in the order of its first declaration
+        self._known = set()
+        self._indexed = 0  # _declared[:_indexed] are in _providers
+
+    def __getitem__(self, js_obj_type):
+        return self._by_type[js_obj_type]
+
+    @property
+    def types(self):
+        # the types with at least one variable
+        return self._types
+
+    @property
+    def value_types(self):
+        # the same without JS_OBJECT
+        return self._value_types
+
+    def add(self, js_obj_type, js_obj):
+        variables = self._by_type[js_obj_type]
+        variables.append(js_obj)
+        if len(variables) == 1:
+            self._types = tuple(x for x in self.TYPES if self._by_type[x])
+            self._value_types = tuple(x for x in self._types if x != 'JS_OBJECT')
+        if js_obj not in self._known:
+            self._known.add(js_obj)
+            self._declared.append(js_obj)
+
+    def providers(self, ret_val):
+        # (variable, methods) pairs, every method of the tuple returns ret_val
+        for js_obj in self._declared[self._indexed:]:
+            for provided, methods in js_obj.methods_and_properties_by_return_type.items():
+                self._providers.setdefault(provided, []).append((js_obj, methods))
+        self._indexed = len(self._declared)
+        return self._providers.get(ret_val, [])
@@ -1,8 +1,19 @@
 __author__ = 'susperius'
 
+COMPLETION_PATH = "__done"  # below the root of the testcase server, see communication/testcaseserver.py
+
 
 class JsWindow:
 
     @staticmethod
     def setTimeout(function, timeout):
         return "window.setTimeout(function () { " + function + " }, " + str(timeout) + ");"
+
+    @staticmethod
+    def completionBeacon(testcase, delay=0, then=""):
+        #  Synchronous request to the testcase server of the node, so it arrives even if the page reloads right after.
+        #  With a delay it is sent by a timer which runs after all timers of the page with the same or a lower delay,
+        #  then is code to run after the beacon (e.g. the reload of the page).
+        beacon = "try { var beacon = new XMLHttpRequest(); beacon.open(\"GET\", \"/" + COMPLETION_PATH + "?" + \
+                 testcase + "\", false); beacon.send(); } catch(ex) { }" + (" " + then if then else "")
+        return JsWindow.setTimeout(beacon, delay) if delay else beacon
@@ -2,66 +2,174 @@ __author__ = 'susperius'
 
 import random
 
-import helper
 import fuzzer
+from corpus import Corpus
+from helper import derive_seed, campaign_seed
+from mutationbuffer import MutationBuffer
+from patch import SeedPatch
+from testcase import Testcase
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class ByteMutation(fuzzer.Fuzzer):
     NAME = "bytemutation"
     CONFIG_PARAMS = ["fuzz_file", "min_change", "max_change", "seed", "file_type"]
+    BATCH_MEMORY = 64 * 1024 * 1024  # upper bound the callers of fuzz_batch keep its mutant matrix under
 
-    def __init__(self, fuzz_file, min_change=1, max_change=1, seed=31337, file_type="png"):
+    def __init__(self, fuzz_file, min_change=1, max_change=1, seed=31337, file_type="png", prng=None, corpus=None):
+        #  fuzz_file: a seed file or a directory of seeds; an embedding fuzzer may hand over its loaded corpus instead
         self._fuzz_file = fuzz_file
-        self._data = ""
-        self._count = 0
-        self.__load_fuzz_file()
-        self._seed = int(seed)
+        self._corpus = corpus if corpus is not None else Corpus.load(fuzz_file)
+        self._entry = self._corpus.entries[0]
+        self._buffer = MutationBuffer(self._entry.data)
+        self._seed_digest = self._entry.digest
+        self._seed = campaign_seed(seed)
+        self._batch = 0
+        #  Embedded instances share the stream of the fuzzer which owns them
+        self._prng = prng if prng is not None else random.Random(self._seed)
         self._min_change = int(min_change)
         self._max_change = int(max_change)
         self._file_type = file_type
-        if seed == 0:
-            random.seed()
-        else:
-            random.seed(self._seed)
 
     @classmethod
     def from_list(cls, params):
         return cls(params[0], params[1], params[2], params[3], params[4])
 
-    def __load_fuzz_file(self):
-        with open(self._fuzz_file, "rb") as fd:
-            self._data = fd.read()
-        self._count = 0
+    def __use_entry(self, entry):
+        if entry is not self._entry:
+            self._entry = entry
+            self._buffer = MutationBuffer(entry.data)
+            self._seed_digest = entry.digest
 
     @property
     def file_type(self):
         return self._file_type
 
+    @property
+    def seed_digest(self):
+        return self._seed_digest
+
+    @property
+    def corpus(self):
+        return self._corpus
+
+    @property
+    def entry(self):
+        #  The corpus entry the actual batch is drawn from
+        return self._entry
+
+    @property
+    def regenerable(self):
+        #  regenerate.py always starts from the first seed, it doesn't know the choices of the power schedule
+        return self._entry is self._corpus.entries[0]
+
+    @property
+    def seed_data(self):
+        self._buffer.reset()
+        return self._buffer.tostring()
+
     @property
     def prng_state(self):
-        return random.getstate()
+        return self._seed, self._batch
 
     def set_state(self, state):
-        random.setstate(state)
+        self._seed, self._batch = state
 
     def set_seed(self, seed=0):
-        random.seed(seed)
+        self._seed = campaign_seed(seed)
+        self._batch = 0
 
     def create_testcases(self, count, directory):
+        #  Always from the in place buffer, it beats the batch matrix of fuzz_batch at every seed size
+        #  (bench_bytemutation.py)
         self.clear_folder(directory)
         for i in range(count):
-            file_name = "test_0" + str(i) + "." + self.file_type if i < 10 else "test_" + str(i) + "." + self.file_type
-            with open(directory + "/" + file_name, 'wb+') as fd:
-                fd.write(self.fuzz())
+            self.__write_testcase(self._batch, i, directory)
+        self._batch += 1
+
+    def testcases(self, count):
+        batch = self._batch
+        self._batch += 1
+        for i in range(count):
+            self.__seed_testcase(batch, i)
+            self.__mutate()
+            yield Testcase(self.__testcase_name(i), self._buffer.tostring(), testcase_id=(self._seed, batch, i))
+        self._buffer.reset()
+
+    def regenerate(self, batch, index, directory):
+        self.__write_testcase(batch, index, directory)
+
+    def create_patches(self, count):
+        #  Nothing is written to disk, every mutant is a patch of the pristine seed, the seed of a batch is drawn from
+        #  the corpus by its power schedule
+        self.__use_entry(self._corpus.choose(self._prng))
+        patches = []
+        for i in range(count):
+            self.__seed_testcase(self._batch, i)
+            self.__mutate()
+            patches.append((self.__testcase_name(i), SeedPatch(self._seed_digest, self._buffer.diff())))
+        self._buffer.reset()
+        self._batch += 1
+        return patches
+
+    def __write_testcase(self, batch, index, directory):
+        self.__seed_testcase(batch, index)
+        self.__mutate()
+        with open(directory + "/" + self.__testcase_name(index), 'wb+') as fd:
+            self._buffer.write_to(fd)
+
+    def __seed_testcase(self, batch, index):
+        self._prng.seed(derive_seed(self._seed, batch, index))
+
+    def __testcase_name(self, i):
+        return "test_0" + str(i) + "." + self.file_type if i < 10 else "test_" + str(i) + "." + self.file_type
 
     def fuzz(self):
-        data_length = len(self._data)
-        changes = min(random.randint(self._min_change, self._max_change), data_length)
-        for i in range(changes):
-            num = random.randint(0, data_length)
-            fuzz_byte = random.choice(helper.BYTE_MATRIX)
-            self._data = self._data[:num-1] + fuzz_byte + self._data[num+1:]
-        self._count += 1
-        if self._count > len(self._data) / 2:
-            self.__load_fuzz_file()
-        return self._data
+        self.__mutate()
+        return self._buffer.tostring()
+
+    def fuzz_batch(self, count, batch=None, first_index=0):
+        #  Builds the mutants first_index .. first_index + count - 1 of a batch at once: the changes of every mutant
+        #  are drawn from its own sub-seed and scattered into a (count x seed length) matrix, every row is one
+        #  mutant. Without NumPy it falls back to a list of strings. Only for callers which need all mutants in
+        #  memory at once, every row is a full copy of the seed, so writing testcases one by one is faster.
+        batch = self._batch if batch is None else batch
+        self._buffer.reset()
+        if numpy is None:
+            mutants = []
+            for i in range(count):
+                self.__seed_testcase(batch, first_index + i)
+                self.__mutate()
+                mutants.append(self._buffer.tostring())
+            self._buffer.reset()
+            return mutants
+        rows, offsets, values = [], [], []
+        for i in range(count):
+            self.__seed_testcase(batch, first_index + i)
+            for offset, value in self.__draw_changes():
+                rows.append(i)
+                offsets.append(offset)
+                values.append(value)
+        seed = numpy.frombuffer(self._buffer.data, dtype=numpy.uint8)
+        mutants = numpy.tile(seed, (count, 1))
+        if rows:
+            mutants[rows, offsets] = numpy.array(values, dtype=numpy.uint8)
+        return mutants
+
+    def __draw_changes(self):
+        data_length = len(self._buffer)
+        if data_length == 0:
+            return []
+        randint = self._prng.randint
+        changes = min(randint(self._min_change, self._max_change), data_length)
+        return [(randint(0, data_length - 1), randint(0, 0xFF)) for i in range(changes)]
+
+    def __mutate(self):
+        #  Every mutant starts from the pristine seed, so it only depends on the actual state of the stream
+        self._buffer.reset()
+        mutate = self._buffer.mutate
+        for offset, value in self.__draw_changes():
+            mutate(offset, value)
@@ -0,0 +1,88 @@
+from operator import itemgetter
+
+__author__ = 'susperius'
+
+"""
+Weighted choice points of the generating fuzzers.
+A choice point is a named decision of a fuzzer (e.g. css_style, the CSS property of a style statement), its items are
+the entries of a list and are weighted by a key (the property name, the method name, the value ...). Weights come from
+the weight elements of the fuzzer in the node config and can be changed at runtime with set_weights(), items without a
+weight keep the default weight 1. Every weighted point gets an alias table (Vose), so a draw costs two random numbers
+whatever the number of items. The tables are cached by the name of the point (and of the item list, if the point
+draws from several ones). Points without weights are drawn with a plain prng.choice(), like before.
+"""
+
+FIRST = itemgetter(0)  # key of items which are lists like the entries of CSS_STYLES
+
+
+class AliasTable:
+    def __init__(self, items, weights):
+        count = len(items)
+        total = float(sum(weights))
+        if count == 0 or total <= 0:
+            raise ValueError("A weighted choice needs at least one item with a positive weight")
+        self._items = list(items)
+        self._probability = [0.0] * count
+        self._alias = [0] * count
+        scaled = [weight * count / total for weight in weights]
+        small = [i for i in range(count) if scaled[i] < 1.0]
+        large = [i for i in range(count) if scaled[i] >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self._probability[less] = scaled[less]
+            self._alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+        for i in small + large:  # only rounding errors are left
+            self._probability[i] = 1.0
+            self._alias[i] = i
+
+    def draw(self, prng):
+        column = int(prng.random() * len(self._items))
+        return self._items[column] if prng.random() < self._probability[column] else \
+            self._items[self._alias[column]]
+
+
+class Choices:
+    def __init__(self, weights=None):
+        self._weights = {}
+        #  point or (point, variant) -> AliasTable
+        self._tables = {}
+        for point, point_weights in (weights or {}).items():
+            self.set_weights(point, point_weights)
+
+    @property
+    def weights(self):
+        return self._weights
+
+    def set_weights(self, point, weights):
+        #  weights: {item key: weight}, None or {} turns the point back into a plain uniform choice
+        if weights:
+            self._weights[point] = dict((str(key), float(weight)) for key, weight in weights.items())
+        elif point in self._weights:
+            del self._weights[point]
+        for table_key in self._tables.keys():
+            if table_key == point or isinstance(table_key, tuple) and table_key[0] == point:
+                del self._tables[table_key]
+
+    def choice(self, prng, point, items, key=str, defaults=None, variant=None):
+        #  defaults: default weights in the order of items, the configured weights are applied on top of them
+        #  variant: name of the item list if a point draws from several ones, e.g. the class of the object
+        if defaults is None and point not in self._weights:
+            return prng.choice(items)
+        table_key = point if variant is None else (point, variant)
+        table = self._tables.get(table_key)
+        if table is None:
+            table = self._tables[table_key] = self.__build_table(point, items, key, defaults)
+        return table.draw(prng)
+
+    def __build_table(self, point, items, key, defaults):
+        point_weights = self._weights.get(point)
+        weights = list(defaults) if defaults is not None else [1.0] * len(items)
+        if point_weights is not None:
+            for i in range(len(items)):
+                weights[i] = point_weights.get(key(items[i]), weights[i])
+        return AliasTable(items, weights)
@@ -0,0 +1,221 @@
+import bisect
+import hashlib
+import os
+
+__author__ = 'susperius'
+
+"""
+Coverage guided corpus of the byte level fuzzers.
+The executors hand over the edge map of a run (AFL layout: MAP_SIZE hit counters, see executing/forkserver.py). The
+hit counts are put into buckets first, every bucket is a single bit, so the map of a run can be checked against all
+maps seen so far with a few big integer operations. Most runs give a bucketed map which was there before, those are
+recognized by the hash of the map alone. An input which reaches a new edge or a new bucket of an edge
+becomes a corpus entry and is used as seed from then on.
+The seeds are loaded once from a file or a whole directory and stay in memory, every entry counts its executions,
+crashes, unique crashes and the entries found from it.
+Every batch is drawn from one entry by a power schedule: the energy of an entry is its productivity (entries and
+unique crashes found per batch of executions, new entries get a bonus) times the speed, coverage and depth of the
+entry compared to the others, each factor within 1 / MAX_FACTOR .. MAX_FACTOR.
+"""
+
+MAP_SIZE = 1 << 16
+NEW_ENTRY_BONUS = 4.0
+MAX_FACTOR = 4.0
+UNIQUE_CRASH_WEIGHT = 4  # a unique crash counts as much as this many new entries
+EXECUTIONS_UNIT = 100  # productivity is measured per this many executions
+MAX_KNOWN_MAPS = 1 << 20
+
+
+def _bucket(count):
+    for limit, bucket in ((0, 0), (1, 1), (2, 2), (3, 4), (7, 8), (15, 16), (31, 32), (127, 64)):
+        if count <= limit:
+            return bucket
+    return 128
+
+
+BUCKETS = "".join(chr(_bucket(i)) for i in range(256))
+
+
+def coverage_bits(buckets):
+    #  The bucketed map as one integer, bit 8 * i + b is bucket b of edge i
+    return int(buckets.encode("hex"), 16)
+
+
+class CorpusEntry:
+    def __init__(self, data, edges=0, duration=0.0, depth=0, name=None):
+        self._data = data
+        self._digest = hashlib.md5(data).hexdigest()
+        self._name = name
+        self._edges = edges
+        self._duration = duration
+        self._depth = depth
+        self._fuzzed = 0
+        self._executions = 0
+        self._crashes = 0
+        self._unique_crashes = 0
+        self._found = 0
+
+    @property
+    def data(self):
+        return self._data
+
+    @property
+    def name(self):
+        #  File name of a seed, None for found entries
+        return self._name
+
+    @property
+    def digest(self):
+        return self._digest
+
+    @property
+    def edges(self):
+        return self._edges
+
+    @property
+    def duration(self):
+        return self._duration
+
+    @property
+    def depth(self):
+        return self._depth
+
+    @property
+    def fuzzed(self):
+        #  Number of batches drawn from this entry
+        return self._fuzzed
+
+    @property
+    def executions(self):
+        return self._executions
+
+    @property
+    def crashes(self):
+        return self._crashes
+
+    @property
+    def unique_crashes(self):
+        return self._unique_crashes
+
+    @property
+    def found(self):
+        #  Number of corpus entries found by mutating this one
+        return self._found
+
+    def mark_fuzzed(self):
+        self._fuzzed += 1
+
+    def record(self, crashed=False, unique=False):
+        self._executions += 1
+        if crashed:
+            self._crashes += 1
+        if unique:
+            self._unique_crashes += 1
+
+    def mark_found(self):
+        self._found += 1
+
+
+class Corpus:
+    def __init__(self, entries):
+        self._entries = list(entries)
+        self._digests = set(entry.digest for entry in self._entries)
+        self._coverage = 0
+        self._known_maps = set()
+        self._total_edges = 0
+        self._total_duration = 0.0
+        self._measured = 0
+
+    @classmethod
+    def load(cls, path):
+        #  A single seed file or every file of a seed directory, read once
+        if not os.path.isdir(path):
+            file_names = [os.path.basename(path)]
+            path = os.path.dirname(path)
+        else:
+            file_names = sorted(file_name for file_name in os.listdir(path)
+                                if os.path.isfile(os.path.join(path, file_name)) and not file_name.startswith("."))
+            if not file_names:
+                raise ValueError("The seed directory " + path + " (fuzz_file) holds no seeds")
+        entries = []
+        for file_name in file_names:
+            with open(os.path.join(path, file_name), "rb") as fd:
+                entries.append(CorpusEntry(fd.read(), name=file_name))
+        return cls(entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        return "entries: %d edges: %d executions: %d crashes: %d unique crashes: %d" % (
+            len(self._entries), self.edges, sum(entry.executions for entry in self._entries),
+            sum(entry.crashes for entry in self._entries), sum(entry.unique_crashes for entry in self._entries))
+
+    @property
+    def entries(self):
+        return self._entries
+
+    @property
+    def edges(self):
+        #  Edges reached by any run so far
+        return MAP_SIZE - ("%0*x" % (2 * MAP_SIZE, self._coverage)).decode("hex").count("\x00")
+
+    def new_coverage(self, trace):
+        #  True if the run reached an edge or a bucket of an edge no run before reached, the map is merged
+        buckets = trace.translate(BUCKETS)
+        key = hash(buckets)
+        if key in self._known_maps:
+            return False
+        if len(self._known_maps) >= MAX_KNOWN_MAPS:
+            self._known_maps.clear()
+        self._known_maps.add(key)
+        bits = coverage_bits(buckets)
+        if bits & ~self._coverage:
+            self._coverage |= bits
+            return True
+        return False
+
+    def add(self, data, trace, duration, parent=None):
+        #  Returns the new entry, None if the data is already in the corpus
+        digest = hashlib.md5(data).hexdigest()
+        if digest in self._digests:
+            return None
+        entry = CorpusEntry(data, MAP_SIZE - trace.count("\x00"), duration,
+                            parent.depth + 1 if parent is not None else 0)
+        self._entries.append(entry)
+        self._digests.add(digest)
+        if parent is not None:
+            parent.mark_found()
+        self._total_edges += entry.edges
+        self._total_duration += duration
+        self._measured += 1
+        return entry
+
+    def energy(self, entry):
+        if entry.fuzzed == 0:
+            energy = NEW_ENTRY_BONUS
+        else:
+            productivity = (1.0 + entry.found + UNIQUE_CRASH_WEIGHT * entry.unique_crashes) / \
+                (1.0 + float(entry.executions) / EXECUTIONS_UNIT)
+            energy = min(MAX_FACTOR, max(1.0 / MAX_FACTOR, productivity))
+        if self._measured and entry.duration > 0:
+            average_duration = self._total_duration / self._measured
+            energy *= min(MAX_FACTOR, max(1.0 / MAX_FACTOR, average_duration / entry.duration))
+        if self._measured and entry.edges > 0:
+            average_edges = float(self._total_edges) / self._measured
+            energy *= min(MAX_FACTOR, max(1.0 / MAX_FACTOR, entry.edges / average_edges))
+        return energy * min(MAX_FACTOR, 1.0 + entry.depth / 4.0)
+
+    def choose(self, prng):
+        #  A single entry doesn't touch the prng, so the stream of a fuzzer with a single seed stays the same
+        if len(self._entries) == 1:
+            entry = self._entries[0]
+        else:
+            weights = []
+            total = 0.0
+            for candidate in self._entries:
+                total += self.energy(candidate)
+                weights.append(total)
+            entry = self._entries[min(len(weights) - 1, bisect.bisect(weights, prng.random() * total))]
+        entry.mark_fuzzed()
+        return entry
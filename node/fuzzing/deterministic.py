@@ -0,0 +1,284 @@
+__author__ = 'susperius'
+
+import hashlib
+import logging
+import struct
+from collections import deque
+
+import fuzzer
+from mutationbuffer import MutationBuffer
+
+"""
+Deterministic mutation stages like AFL runs them on every new seed:
+walking bit flips (1, 2, 4 bits), byte flips (8, 16, 32 bits), arithmetic +/- 1 to ARITH_MAX on 8, 16 and 32 bit
+values and insertion of interesting 8, 16 and 32 bit values, the wider ones in little and big endian.
+Mutations which would just repeat the result of an earlier stage are skipped, so every testcase is new.
+The whole progress is a small cursor (stage, offset, step) which is used as the PRNG state of this fuzzer and so it
+survives the reboot of the node.
+"""
+
+ARITH_MAX = 35
+INTERESTING_8 = [-128, -1, 0, 1, 16, 32, 64, 100, 127]
+INTERESTING_16 = INTERESTING_8 + [-32768, -129, 128, 255, 256, 512, 1000, 1024, 4096, 32767]
+INTERESTING_32 = INTERESTING_16 + [-2147483648, -100663046, -32769, 32768, 65535, 65536, 100663045, 2147483647]
+
+STAGES = ["flip1", "flip2", "flip4", "flip8", "flip16", "flip32", "arith8", "arith16", "arith32",
+          "interest8", "interest16", "interest32"]
+BIT_FLIPS = {"flip1": 1, "flip2": 2, "flip4": 4}
+#  Width in bytes of the value a stage works on
+WIDTHS = {"flip1": 1, "flip2": 1, "flip4": 1, "flip8": 1, "flip16": 2, "flip32": 4, "arith8": 1, "arith16": 2,
+          "arith32": 4, "interest8": 1, "interest16": 2, "interest32": 4}
+INTERESTING = {1: INTERESTING_8, 2: INTERESTING_16, 4: INTERESTING_32}
+RECENT_MUTANTS = 1024  # enough to cover the steps of all offsets a 32 bit value overlaps
+FORMATS = {1: "B", 2: "H", 4: "I"}
+MASKS = {1: 0xFF, 2: 0xFFFF, 4: 0xFFFFFFFF}
+
+
+def swap16(value):
+    return ((value << 8) | (value >> 8)) & 0xFFFF
+
+
+def swap32(value):
+    return ((value << 24) | ((value << 8) & 0x00FF0000) | ((value >> 8) & 0x0000FF00) | (value >> 24)) & 0xFFFFFFFF
+
+
+def could_be_bitflip(xor_val, length=1):
+    #  The bit walk goes msb first through every byte, so the check is done on the positions of the flipped bits in
+    #  walk order and not on the (little endian) integer value
+    if not xor_val:
+        return True
+    bits = [i * 8 + k for i in range(length) for k in range(8) if (xor_val >> (8 * i)) & (128 >> k)]
+    contiguous = bits[-1] - bits[0] == len(bits) - 1
+    if len(bits) in (1, 2, 4) and contiguous:
+        return True
+    return len(bits) in (8, 16, 32) and contiguous and bits[0] % 8 == 0
+
+
+def could_be_arith(old_val, new_val, length):
+    if old_val == new_val:
+        return True
+    diffs = 0
+    ov = nv = 0
+    for i in range(length):
+        a = (old_val >> (8 * i)) & 0xFF
+        b = (new_val >> (8 * i)) & 0xFF
+        if a != b:
+            diffs += 1
+            ov, nv = a, b
+    if diffs == 1 and ((ov - nv) & 0xFF <= ARITH_MAX or (nv - ov) & 0xFF <= ARITH_MAX):
+        return True
+    if length == 1:
+        return False
+    diffs = 0
+    for i in range(length / 2):
+        a = (old_val >> (16 * i)) & 0xFFFF
+        b = (new_val >> (16 * i)) & 0xFFFF
+        if a != b:
+            diffs += 1
+            ov, nv = a, b
+    if diffs == 1:
+        if (ov - nv) & 0xFFFF <= ARITH_MAX or (nv - ov) & 0xFFFF <= ARITH_MAX:
+            return True
+        ov, nv = swap16(ov), swap16(nv)
+        if (ov - nv) & 0xFFFF <= ARITH_MAX or (nv - ov) & 0xFFFF <= ARITH_MAX:
+            return True
+    if length == 4:
+        if (old_val - new_val) & 0xFFFFFFFF <= ARITH_MAX or (new_val - old_val) & 0xFFFFFFFF <= ARITH_MAX:
+            return True
+        old_val, new_val = swap32(old_val), swap32(new_val)
+        if (old_val - new_val) & 0xFFFFFFFF <= ARITH_MAX or (new_val - old_val) & 0xFFFFFFFF <= ARITH_MAX:
+            return True
+    return False
+
+
+def could_be_interest(old_val, new_val, length, check_le):
+    if old_val == new_val:
+        return True
+    for i in range(length):
+        for value in INTERESTING_8:
+            if new_val == (old_val & ~(0xFF << (i * 8))) | ((value & 0xFF) << (i * 8)):
+                return True
+    if length == 2 and not check_le:
+        return False
+    for i in range(length - 1):
+        for value in INTERESTING_16:
+            if new_val == (old_val & ~(0xFFFF << (i * 8))) | ((value & 0xFFFF) << (i * 8)):
+                return True
+            if length > 2 and new_val == (old_val & ~(0xFFFF << (i * 8))) | (swap16(value & 0xFFFF) << (i * 8)):
+                return True
+    if length == 4 and check_le:
+        for value in INTERESTING_32:
+            if new_val == value & 0xFFFFFFFF:
+                return True
+    return False
+
+
+class DeterministicMutation(fuzzer.Fuzzer):
+    NAME = "deterministic"
+    CONFIG_PARAMS = ["fuzz_file", "file_type"]
+
+    def __init__(self, fuzz_file, file_type="png"):
+        self._logger = logging.getLogger(__name__)
+        self._fuzz_file = fuzz_file
+        self._file_type = file_type
+        with open(self._fuzz_file, "rb") as fd:
+            data = fd.read()
+        self._digest = hashlib.md5(data).hexdigest()
+        self._buffer = MutationBuffer(data)
+        self._stage = 0
+        self._offset = 0
+        self._step = 0
+        self._recent = deque()
+        self._recent_keys = set()
+        self.__skip_empty_stages()
+
+    @classmethod
+    def from_list(cls, params):
+        return cls(params[0], params[1])
+
+    @property
+    def file_type(self):
+        return self._file_type
+
+    @property
+    def finished(self):
+        return self._stage >= len(STAGES)
+
+    @property
+    def prng_state(self):
+        return self._digest, self._stage, self._offset, self._step
+
+    def set_state(self, state):
+        digest, stage, offset, step = state
+        if digest != self._digest:
+            self._logger.info("Seed file changed, starting the deterministic stages from the beginning")
+            self.set_seed()
+            return
+        self._stage, self._offset, self._step = stage, offset, step
+
+    def set_seed(self, seed=0):
+        self._stage, self._offset, self._step = 0, 0, 0
+        self.__skip_empty_stages()
+
+    def create_testcases(self, count, directory):
+        self.clear_folder(directory)
+        for i in range(count):
+            if not self.__next_mutant():
+                self._logger.info("All deterministic stages are done for " + self._fuzz_file)
+                break
+            file_name = "test_0" + str(i) + "." + self.file_type if i < 10 else "test_" + str(i) + "." + self.file_type
+            with open(directory + "/" + file_name, 'wb+') as fd:
+                self._buffer.write_to(fd)
+            self._buffer.reset()
+
+    def fuzz(self):
+        if not self.__next_mutant():
+            return None
+        data = self._buffer.tostring()
+        self._buffer.reset()
+        return data
+
+    def __next_mutant(self):
+        #  Walks the cursor until a mutation is found which no earlier stage has produced, applies it to the buffer
+        while not self.finished:
+            changes = self.__mutation(STAGES[self._stage], self._offset, self._step)
+            self.__advance()
+            if changes is not None and not self.__is_repeated(changes[0], changes[1]):
+                self._buffer.mutate_bytes(changes[0], changes[1])
+                return True
+        return False
+
+    def __is_repeated(self, offset, value):
+        #  Wide values written at neighbouring offsets can give the same file, so the diffs of the last mutants
+        #  are remembered
+        data = self._buffer.data
+        key = tuple((offset + i, value[i]) for i in range(len(value)) if value[i] != data[offset + i])
+        if key in self._recent_keys:
+            return True
+        self._recent.append(key)
+        self._recent_keys.add(key)
+        if len(self._recent) > RECENT_MUTANTS:
+            self._recent_keys.discard(self._recent.popleft())
+        return False
+
+    def __advance(self):
+        self._step += 1
+        if self._step < self.__steps(STAGES[self._stage]):
+            return
+        self._step = 0
+        self._offset += 1
+        if self._offset < self.__positions(STAGES[self._stage]):
+            return
+        self._offset = 0
+        self._stage += 1
+        self.__skip_empty_stages()
+
+    def __skip_empty_stages(self):
+        #  Seeds shorter than the value width have nothing to do in a stage
+        while not self.finished and self.__positions(STAGES[self._stage]) <= 0:
+            self._stage += 1
+
+    def __positions(self, stage):
+        if stage in BIT_FLIPS:
+            return len(self._buffer) * 8 - BIT_FLIPS[stage] + 1
+        return len(self._buffer) - WIDTHS[stage] + 1
+
+    @staticmethod
+    def __steps(stage):
+        endians = 1 if WIDTHS[stage] == 1 else 2
+        if stage.startswith("arith"):
+            return ARITH_MAX * 2 * endians
+        elif stage.startswith("interest"):
+            return len(INTERESTING[WIDTHS[stage]]) * endians
+        return 1
+
+    def __read(self, offset, width):
+        return struct.unpack_from("<" + FORMATS[width], self._buffer.data, offset)[0]
+
+    @staticmethod
+    def __pack(value, width):
+        return bytearray(struct.pack("<" + FORMATS[width], value & MASKS[width]))
+
+    def __mutation(self, stage, offset, step):
+        #  Returns (byte offset, new bytes) or None if the mutation is redundant
+        if stage in BIT_FLIPS:
+            bits = BIT_FLIPS[stage]
+            first, last = offset >> 3, (offset + bits - 1) >> 3
+            value = bytearray(self._buffer.data[first:last + 1])
+            for bit in range(offset, offset + bits):
+                value[(bit >> 3) - first] ^= 128 >> (bit & 7)
+            return first, value
+        width = WIDTHS[stage]
+        old_val = self.__read(offset, width)
+        if stage.startswith("flip"):
+            return offset, self.__pack(old_val ^ MASKS[width], width)
+        elif stage.startswith("arith"):
+            delta = step / (2 * (1 if width == 1 else 2)) + 1
+            subtract = step & 1
+            big_endian = width > 1 and (step >> 1) & 1
+            value = old_val
+            if big_endian:
+                value = swap16(value) if width == 2 else swap32(value)
+            low = value & (0xFF if width <= 2 else 0xFFFF)
+            if width > 1 and ((not subtract and low + delta <= MASKS[width / 2]) or (subtract and low >= delta)):
+                return None  # no carry into the next byte/word, the smaller arith stage did this already
+            value = (value - delta if subtract else value + delta) & MASKS[width]
+            if big_endian:
+                value = swap16(value) if width == 2 else swap32(value)
+            if could_be_bitflip(old_val ^ value, width):
+                return None
+            return offset, self.__pack(value, width)
+        else:
+            values = INTERESTING[width]
+            big_endian = width > 1 and step & 1
+            value = values[step >> 1 if width > 1 else step] & MASKS[width]
+            if big_endian:
+                swapped = swap16(value) if width == 2 else swap32(value)
+                if swapped == value:
+                    return None
+                value = swapped
+            if could_be_bitflip(old_val ^ value, width) or could_be_arith(old_val, value, width):
+                return None
+            if width > 1 and could_be_interest(old_val, value, width, big_endian):
+                return None
+            return offset, self.__pack(value, width)
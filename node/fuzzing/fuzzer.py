@@ -31,6 +31,10 @@ class Fuzzer:
     def create_testcases(self, count, directory):
         raise NotImplementedError("ABSTRACT METHOD")
 
+    def testcases(self, count):
+        #  Generator of count Testcase objects, nothing is written to disk
+        raise NotImplementedError("ABSTRACT METHOD")
+
     @property
     def file_type(self):
         raise NotImplementedError("ABSTRACT METHOD")
@@ -3,6 +3,7 @@ __author__ = 'susperius'
 import browser.javascript as javascript
 from browser.javascript_ng import JsFuzzer
 import bytemutation
+import deterministic
 
 """
 If you want to implement a new fuzzer just inherit from the Fuzzer Class and implement the abstract methods.
@@ -13,6 +14,8 @@ parameters as first value and a reference to your fuzzers class as the second va
 #  FUZZERS = {FuzzerName: (CONFIG_PARAMS, CONSTRUCTOR())}
 FUZZERS = {bytemutation.ByteMutation.NAME: (bytemutation.ByteMutation.CONFIG_PARAMS, bytemutation.ByteMutation),
            javascript.JsDomFuzzer.NAME: (javascript.JsDomFuzzer.CONFIG_PARAMS, javascript.JsDomFuzzer),
-           JsFuzzer.NAME: (JsFuzzer.CONFIG_PARAMS, JsFuzzer)
+           JsFuzzer.NAME: (JsFuzzer.CONFIG_PARAMS, JsFuzzer),
+           deterministic.DeterministicMutation.NAME: (deterministic.DeterministicMutation.CONFIG_PARAMS,
+                                                      deterministic.DeterministicMutation)
            }
 
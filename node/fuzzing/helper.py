@@ -1,5 +1,20 @@
+import random
+from hashlib import md5
+
 __author__ = 'susperius'
 
+
+def derive_seed(campaign_seed, batch, index):
+    #  Every testcase gets its own sub-seed, so it can be regenerated from (campaign seed, batch, index) alone
+    return int(md5("%d:%d:%d" % (campaign_seed, batch, index)).hexdigest()[:16], 16)
+
+
+def campaign_seed(seed):
+    #  0 means choose one, the chosen seed is part of the saved fuzzer state so the campaign stays reproducible
+    seed = int(seed)
+    return seed if seed != 0 else random.SystemRandom().randint(1, 0xFFFFFFFF)
+
+
 BYTE_MATRIX = ['\x00', '\x01', '\x02', '\x03', '\x04', '\x05', '\x06', '\x07', '\x08', '\x09', '\x0a',
                '\x0b', '\x0c', '\x0d', '\x0e', '\x0f', '\x10', '\x11', '\x12', '\x13', '\x14',
                '\x15', '\x16', '\x17', '\x18', '\x19', '\x1a', '\x1b', '\x1c', '\x1d', '\x1e',
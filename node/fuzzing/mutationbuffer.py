@@ -0,0 +1,63 @@
+__author__ = 'susperius'
+
+"""
+In place mutation buffer for the byte level fuzzers.
+The seed is kept once in a bytearray, every change is written directly into it and the original byte is
+remembered in an undo log. Going back to the pristine seed only costs O(changes) instead of rebuilding the whole
+string or re-reading the seed file.
+"""
+
+
+class MutationBuffer:
+    def __init__(self, data):
+        self._data = bytearray(data)
+        self._view = memoryview(self._data)
+        self._undo_log = []
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def data(self):
+        return self._data
+
+    @property
+    def view(self):
+        return self._view
+
+    @property
+    def changes(self):
+        return len(self._undo_log)
+
+    @property
+    def undo_log(self):
+        return self._undo_log
+
+    def mutate(self, offset, value):
+        self._undo_log.append((offset, self._data[offset]))
+        self._data[offset] = value
+
+    def mutate_bytes(self, offset, values):
+        for i in range(len(values)):
+            self.mutate(offset + i, values[i])
+
+    def diff(self):
+        #  [(offset, byte), ...] of all bytes which differ from the pristine seed
+        original = {}
+        for offset, value in self._undo_log:
+            if offset not in original:
+                original[offset] = value
+        return [(offset, self._data[offset]) for offset in sorted(original) if self._data[offset] != original[offset]]
+
+    def reset(self):
+        data = self._data
+        undo_log = self._undo_log
+        while undo_log:
+            offset, value = undo_log.pop()
+            data[offset] = value
+
+    def tostring(self):
+        return str(self._data)
+
+    def write_to(self, fd):
+        fd.write(self._view)
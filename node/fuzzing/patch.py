@@ -0,0 +1,81 @@
+__author__ = 'susperius'
+
+"""
+Seed plus patch representation of byte level testcases.
+A mutant only differs in a handful of bytes from its seed, so it is kept as (seed digest, [(offset, byte), ...])
+and only written out when a target really needs the file.
+"""
+
+
+class SeedPatch:
+    def __init__(self, seed_digest, patches):
+        self._seed_digest = seed_digest
+        self._patches = patches
+
+    @property
+    def seed_digest(self):
+        return self._seed_digest
+
+    @property
+    def patches(self):
+        return self._patches
+
+    def apply(self, seed_data):
+        data = bytearray(seed_data)
+        for offset, value in self._patches:
+            data[offset] = value
+        return str(data)
+
+    def dumps(self):
+        lines = ["seed " + self._seed_digest]
+        for offset, value in self._patches:
+            lines.append("%x %02x" % (offset, value))
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def loads(cls, text):
+        lines = text.splitlines()
+        seed_digest = lines[0].split(" ")[1]
+        patches = []
+        for line in lines[1:]:
+            if line:
+                offset, value = line.split(" ")
+                patches.append((int(offset, 16), int(value, 16)))
+        return cls(seed_digest, patches)
+
+
+class PatchedFile:
+    """
+    A file on disk which is kept equal to seed + actual patch.
+    Switching to the next patch only rewrites the bytes of the old and the new patch.
+    """
+    def __init__(self, path, seed_data):
+        self._path = path
+        self._seed_data = seed_data
+        self._applied = None
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def seed_data(self):
+        return self._seed_data
+
+    def apply(self, patch):
+        try:
+            fd = open(self._path, "r+b") if self._applied is not None else None
+        except IOError:  # someone cleaned the folder
+            fd = None
+        if fd is None:
+            fd = open(self._path, "wb+")
+            fd.write(self._seed_data)
+            self._applied = []
+        with fd:
+            for offset, value in self._applied:
+                fd.seek(offset)
+                fd.write(self._seed_data[offset])
+            for offset, value in patch.patches:
+                fd.seek(offset)
+                fd.write(chr(value))
+        self._applied = patch.patches
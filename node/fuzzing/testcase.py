@@ -0,0 +1,45 @@
+import os
+
+__author__ = 'susperius'
+
+"""
+A single generated testcase: the primary file plus its companion files (css, embedded media, ...).
+Everything is kept in memory, files are only written if a consumer asks for it.
+"""
+
+
+class Testcase:
+    def __init__(self, name, data, companions=None, testcase_id=None):
+        self._name = name
+        self._data = data
+        self._companions = companions if companions is not None else []
+        self._testcase_id = testcase_id
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def data(self):
+        return self._data
+
+    @property
+    def companions(self):
+        return self._companions
+
+    @property
+    def files(self):
+        return [(self._name, self._data)] + self._companions
+
+    @property
+    def testcase_id(self):
+        #  (campaign seed, batch, index) for fuzzers which can regenerate their testcases, else None
+        return self._testcase_id
+
+    def add_companion(self, name, data):
+        self._companions.append((name, data))
+
+    def write_to(self, directory):
+        for name, data in self.files:
+            with open(os.path.join(directory, name), 'wb+') as fd:
+                fd.write(data)
@@ -20,13 +20,14 @@ except ImportError:
     pass
 
 
-PROGRAM_ATTRIBUTES = ["path", "dbg_child", "name", "use_http", "sleep_time"]
+PROGRAM_ATTRIBUTES = ["path", "dbg_child", "name", "use_http", "sleep_time", "session_size", "executor", "coverage"]
 
 
 class ConfigParser:
     def __init__(self, config_filename, from_string=False):
         self._logger = logging.getLogger(__name__)
         self._programs = []
+        self._fuzzer_weights = {}
         try:
             if not from_string:
                 self._tree = ET.parse(config_filename)
@@ -37,6 +38,8 @@ class ConfigParser:
             self._node_net_mode = self._root.attrib['net_mode']
             self._node_op_mode = self._root.attrib['op_mode']
             self._reboot_time = int(self._root.attrib['reboot_time'])
+            self._generators = int(self._root.attrib.get('generators', 0))
+            self._slots = int(self._root.attrib.get('slots', 1))
             if self._node_net_mode == "net":
                 beacon = self._root.find("beacon")
                 reporting = self._root.find("reporting")
@@ -66,6 +69,9 @@ class ConfigParser:
                 for elem in FUZZERS[self._fuzzer_type][0]:
                     self._fuzz_config.append(fuzzer.attrib[elem])
                 self._file_type = fuzzer.attrib['file_type']
+                for weight in fuzzer.findall("weight"):
+                    point_weights = self._fuzzer_weights.setdefault(weight.attrib['point'], {})
+                    point_weights[weight.attrib['item']] = float(weight.attrib['value'])
             elif self._node_op_mode == 'reducing':
                 reducer = self._root.find('reducer')
                 self._reducer_type = reducer.attrib['type']
@@ -97,6 +103,14 @@ class ConfigParser:
     def reboot_time(self):
         return self._reboot_time
 
+    @property
+    def generators(self):
+        return self._generators
+
+    @property
+    def slots(self):
+        return self._slots
+
     @property
     def beacon_config(self):
         return self._beacon_server, self._beacon_port, self._beacon_interval if self._node_net_mode == "net" else None
@@ -129,6 +143,10 @@ class ConfigParser:
     def fuzzer_config(self):
         return self._fuzz_config
 
+    @property
+    def fuzzer_weights(self):
+        return self._fuzzer_weights
+
     @property
     def reducer_type(self):
         return self._reducer_type
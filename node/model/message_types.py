@@ -1,4 +1,4 @@
 __author__ = 'susperius'
 
 MESSAGE_TYPES = {"BEACON": 0x01, "SET_CONFIG": 0x02, "GET_CONFIG": 0x03, "OK": 0x04, "RESET": 0x05,
-                 "UNKNOWN": 0xFE, "CRASH": 0xFF}
+                 "SEED": 0xFD, "UNKNOWN": 0xFE, "CRASH": 0xFF}
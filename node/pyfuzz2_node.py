@@ -52,7 +52,8 @@ class PyFuzz2Node:
                 except Exception as ex:
                     self._logger.error("Error while restoring the PRNG state -> " + ex.message)
                     self._fuzzer.set_seed(0)
-            self._operation_worker = FuzzingWorker(self._node_config.programs, self._fuzzer, self._reporter_queue,)
+            self._operation_worker = FuzzingWorker(self._node_config.programs, self._fuzzer, self._reporter_queue,
+                                                   self._node_config.generators, self._node_config.slots)
         elif self._node_config.node_op_mode == 'reducing':
             self._reducer = self.__choose_reducer()
             self._operation_worker = ReducingWorker(self._reducer, self._node_config.programs, self._reporter_queue)
@@ -60,7 +61,11 @@ class PyFuzz2Node:
             raise ValueError('Unsupported operation mode!')
 
     def __choose_fuzzer(self):
-        return FUZZERS[self._node_config.fuzzer_type][1].from_list(self._node_config.fuzzer_config)
+        fuzzer = FUZZERS[self._node_config.fuzzer_type][1].from_list(self._node_config.fuzzer_config)
+        if hasattr(fuzzer, "choices"):
+            for point, weights in self._node_config.fuzzer_weights.items():
+                fuzzer.choices.set_weights(point, weights)
+        return fuzzer
 
     def __choose_reducer(self):
         return REDUCERS[self._node_config.reducer_type][1].from_list(self._node_config.reducer_config)
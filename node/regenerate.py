@@ -0,0 +1,43 @@
+import os
+import sys
+from model.config import ConfigParser
+from fuzzing.fuzzers import FUZZERS
+
+__author__ = 'susperius'
+
+"""
+Regenerates a single testcase of a campaign from its id (campaign seed, batch, index), e.g. the content of the
+testcase_id.txt of a crash. The fuzzer is configured like the node with node_config.xml.
+With a range of indices (first-last) it is also used by the GenerationWorker to build a part of a batch.
+Usage: python regenerate.py <seed> <batch> <index>|<first>-<last> [directory] (from the node directory)
+"""
+
+CONFIG_FILENAME = "node_config.xml"
+
+
+def main(argv):
+    if len(argv) < 4:
+        print "Usage: python regenerate.py <seed> <batch> <index>|<first>-<last> [directory]"
+        return 1
+    seed, batch = int(argv[1]), int(argv[2])
+    first, last = (argv[3].split("-") + [argv[3]])[:2]
+    directory = argv[4] if len(argv) > 4 else "regenerated"
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    config = ConfigParser(CONFIG_FILENAME)
+    fuzzer = FUZZERS[config.fuzzer_type][1].from_list(config.fuzzer_config)
+    if not hasattr(fuzzer, "regenerate"):
+        print "The fuzzer " + config.fuzzer_type + " can't regenerate single testcases"
+        return 1
+    if hasattr(fuzzer, "choices"):
+        for point, weights in config.fuzzer_weights.items():
+            fuzzer.choices.set_weights(point, weights)
+    fuzzer.set_seed(seed)
+    for index in range(int(first), int(last) + 1):
+        fuzzer.regenerate(batch, index, directory)
+    print "Testcases " + first + " to " + last + " of batch " + str(batch) + " written to " + directory
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
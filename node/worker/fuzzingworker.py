@@ -1,134 +1,427 @@
 import gevent
 import os
-import psutil
-import subprocess
 import logging
-import debugging.PyFuzzDbg as PyFuzzDbg
+import multiprocessing
+from gevent.queue import JoinableQueue
+from communication.testcaseserver import TestcaseServer, BrowserSession, SESSION_PATH
+from executing.executor import COMPLETION_GRACE, OUTCOME_OK, OUTCOME_TIMEOUT
+from executing.executors import EXECUTORS, DEFAULT_EXECUTOR
+from executing.signatures import SignatureCache
+from executing.timeout import AdaptiveTimeout
+from fuzzing.patch import PatchedFile
+from model.message_types import MESSAGE_TYPES
 from worker import Worker
+from generationworker import GenerationWorker
+from reportworker import ReportWorker
 
 __author__ = 'susperius'
 
-INTERESTING_EXCEPTIONS = {0x80000001: "GUARD_PAGE_VIOLATION",
-                          0x80000005: "BUFFER_OVERFLOW",
-                          0xC0000005: "ACCESS_VIOLATION",
-                          0xC000001D: "ILLEGAL_INSTRUCTION",
-                          0xC0000144: "UNHANDLED_EXCEPTION",
-                          0xC0000409: "STACK_BUFFER_OVERRUN",
-                          0xC0000602: "UNKNOWN_EXCEPTION",
-                          0xC00000FD: "STACK_OVERFLOW",
-                          0XC000009D: "PRIVILEGED_INSTRUCTION"}
+MEDIA_DIRECTORY = "media"  # shared files the testcases can load, served with caching headers
+FIRST_PORT = 8080  # testcase server of slot i: FIRST_PORT + i
+
+TEST = 0
+SESSION = 1
+
+
+class Slot:
+    """
+    One execution slot: its own directory, testcase server port and executor per program. Several slots run their
+    program instances side by side, a crash always stays with the slot it happened in.
+    """
+    def __init__(self, index, programs, need_web_server):
+        self._index = index
+        self._directory = os.path.join("testcases", "slot_" + str(index))
+        if not os.path.exists(self._directory):
+            os.makedirs(self._directory)
+        self._port = FIRST_PORT + index
+        self._web_server = None
+        if need_web_server:
+            self._web_server = TestcaseServer(self._port)
+            if os.path.isdir(MEDIA_DIRECTORY):
+                self._web_server.load_directory(MEDIA_DIRECTORY, shared=True)
+        self._executors = {}
+        for prog in programs:
+            self._executors[prog['name']] = EXECUTORS[prog.get('executor', DEFAULT_EXECUTOR)](
+                prog, os.path.abspath(self._directory))
+        self._patched_file = None
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def directory(self):
+        #  Absolute with a trailing separator, like the batch directories
+        return os.path.join(os.path.abspath(self._directory), "")
+
+    @property
+    def base_url(self):
+        return "http://127.0.0.1:" + str(self._port) + "/"
+
+    @property
+    def web_server(self):
+        return self._web_server
+
+    @property
+    def executors(self):
+        return self._executors
+
+    def patched_file(self, seed_data, file_type):
+        #  A new seed (e.g. a corpus entry) means the file is written from scratch
+        if self._patched_file is None or self._patched_file.seed_data is not seed_data:
+            self._patched_file = PatchedFile(os.path.join(self._directory, "patched." + file_type), seed_data)
+        return self._patched_file
 
 
 class FuzzingWorker(Worker):
-    def __init__(self, programs, fuzzer, report_queue):
+    def __init__(self, programs, fuzzer, report_queue, generators=0, slots=1):
         self._logger = logging.getLogger(__name__)
         self._greenlet = None
-        self._processes = []
-        self._web_process = None
+        self._slot_greenlets = []
         self._running = False
         self._programs = programs
         self._need_web_server = False
+        self._need_files = False
+        #  Known crashes of all slots, a crash with a known signature is mostly not triaged again
+        self._signatures = SignatureCache()
+        #  Major hashes of the crashes reported since the start, a crash with a new one counts as unique for its seed
+        self._major_hashes = set()
+        #  Learned from the runs of all slots: {prog['name']: AdaptiveTimeout}
+        self._timeouts = {}
         for prog in programs:
-            if "True" == prog['use_http']:
+            self._timeouts[prog['name']] = AdaptiveTimeout(int(prog['sleep_time']))
+            prog['use_http'] = prog['use_http'] in (True, "True")
+            if prog['use_http']:
                 self._need_web_server = True
-        self._testcase = ""
-        self._crash_report = ""
+            else:
+                self._need_files = True
+        self._slots = [Slot(i, programs, self._need_web_server) for i in range(max(1, slots))]
+        #  The slots take their work from here: (TEST, filename, count) or (SESSION, prog, testcases, count)
+        self._work = JoinableQueue(len(self._slots))
         self._fuzzer = fuzzer
+        self._patches = {}
+        self._seed_data = None
+        self._seed_digest = None
+        self._seeds_reported = set()
+        self._fuzz_state = None
+        self._generation_worker = None
+        self._testcase_stream = None
+        self._testcases = {}
+        # The batch the slots are working on
+        self._batch_dir = ""
+        self._testcase_dir = ""
+        self._dir_listing = []
+        self._session_programs = []
+        if hasattr(fuzzer, "regenerate") and not hasattr(fuzzer, "create_patches"):
+            #  Fuzzers which can build any testcase by its index get the generation processes, one core is left for
+            #  the program under test. On a single core the testcases are streamed out of the node process instead.
+            generators = generators if generators > 0 else multiprocessing.cpu_count() - 1
+            if generators > 0:
+                self._generation_worker = GenerationWorker(fuzzer, generators)
+            else:
+                self._testcase_stream = iter([])
         self._report_queue = report_queue
-        self._DEVNULL = os.open(os.devnull, os.O_RDWR)
 
     def __worker_green(self):
         count = 0
         while self._running:
-            self._logger.info("Creating Testcases...\r\n\tnumber: " + str(count) + " to " + str(count + 100))
-            self.__create_testcases()
+            batch_dir = self.__next_batch(count)
             self._logger.info("Start testing...")
-            dir_listing = os.listdir("testcases/")
-            if self._need_web_server:
-                self._web_process = subprocess.Popen("python -m SimpleHTTPServer 8080", stdout=self._DEVNULL,
-                                                     stderr=self._DEVNULL, cwd="testcases/")
+            if self._patches:
+                dir_listing = sorted(self._patches.keys())
+            elif self._testcase_stream is not None:
+                dir_listing = self.__stream_testcases()
+            else:
+                dir_listing = os.listdir("testcases/" + batch_dir)
+                if self._need_web_server:
+                    for slot in self._slots:
+                        slot.web_server.clear()
+                        slot.web_server.load_directory("testcases/" + batch_dir, batch_dir)
+            self._batch_dir = batch_dir
+            self._testcase_dir = os.path.join(os.getcwd(), "testcases", batch_dir.replace("/", os.sep))
+            self._dir_listing = dir_listing
+            #  The whole batch has to be there for a session, streamed and patched testcases are tested one by one
+            if self._patches or self._testcase_stream is not None:
+                self._session_programs = []
+            else:
+                self._session_programs = [prog for prog in self._programs if prog['use_http'] and
+                                          int(prog.get('session_size', 1)) > 1]
+            tested = 0
             for filename in dir_listing:
+                if not self._running:
+                    break
                 if self._fuzzer.file_type not in filename:
                         continue
                 count += 1
-                for prog in self._programs:
-                    prog['use_http'] = "True" == prog['use_http']
-                    pyfuzzdbg = PyFuzzDbg.Debugger(int(prog['sleep_time']))
-                    if not self._running:
-                        break
-                    testcase_dir = os.getcwd() + "\\testcases\\"
-                    #  --------------------------------------------------------------------------------------------
-                    # For pure testing if a tool is crashing with given input, just use a small c++ extension to
-                    # start a program with DEBUG_PROCESS and return 0 if nothing happens else the exception code
-                    self._logger.debug("Test starting...\r\n\tprogram: " + prog['name'] + " testcase: " + filename +
-                                       " #testcases: " + str(count))
-                    if prog['use_http']:
-                        pyfuzzdbg.set_app_name(unicode(prog['path'] + " \"http://127.0.0.1:8080/" + filename +
-                                                       "\"\x00\x00"))
-                        return_code = pyfuzzdbg.start_test()
-                    else:
-                        pyfuzzdbg.set_app_name(unicode(prog['path'] + " \"" + testcase_dir + filename + "\"\x00\x00"))
-                        return_code = pyfuzzdbg.start_test()
-                    gevent.sleep(1)
-                    #  --------------------------------------------------------------------------------------------
-                    #  Just involve the whole Windows Debug Engine if a crash appeared else just save the resources
-                    if return_code in INTERESTING_EXCEPTIONS.keys():
-                        if prog['use_http']:
-                            self._processes.append(subprocess.Popen(
-                                "python debugging\\windbg.py -p \"" + prog['path']
-                                + "\" -t \"http://127.0.0.1:8080/" + filename + "\" -c True -X", stdout=self._DEVNULL,
-                                stderr=self._DEVNULL))
-                        else:
-                            self._processes.append(subprocess.Popen(
-                                "python debugging\\windbg.py -p \"" + prog['path']
-                                + "\" -t \"" + testcase_dir + filename + "\" -c True -X", stdout=self._DEVNULL,
-                                stderr=self._DEVNULL))
-                        self._logger.debug("Test verification started...\r\n\tprogram: " + prog['name'] + " testcase: " + filename +
-                                       " #testcases: " + str(count))
-                        gevent.sleep(int(prog['sleep_time']) / 2)
-                        if not os.path.isfile("tmp_crash_report"):
-                            gevent.sleep(int(prog['sleep_time']) / 2)
-                        self.__kill_processes()
-                        self._processes = []
-                        if os.path.isfile("tmp_crash_report"):
-                            with open("tmp_crash_report", "rb") as fd:
-                                crash_report = fd.read()
-                            os.remove("tmp_crash_report")
-                            testcases = self.__bundle_testcase(testcase_dir, filename, dir_listing)
-                            # Structure crash message (0xFF, (prog['name'], crash_report, testcases[]))
-                            self._report_queue.put((0xFF, (prog['name'], crash_report, testcases)))
-                        #  --------------------------------------------------------------------------------------------
-                        #else: Do not save unknowns ...
-                        #    testcases = self.__bundle_testcase(testcase_dir, filename, dir_listing)
-                        #    self._report_queue.put((0xFE, (prog['name'], testcases)))
-                    gevent.sleep(1)
+                tested += 1
+                self._work.put((TEST, filename, count))
+            for prog in self._session_programs:
+                testcases = [filename for filename in dir_listing if self._fuzzer.file_type in filename]
+                session_size = int(prog['session_size'])
+                for i in range(0, len(testcases), session_size):
+                    self._work.put((SESSION, prog, testcases[i:i + session_size], count))
+            self._work.join()
+            if self._need_web_server:
+                for slot in self._slots:
+                    self._logger.debug("Testcase server stats slot " + str(slot.index) + ": " +
+                                       str(slot.web_server.stats))
+            for prog in self._programs:
+                self._logger.debug("Runs of " + prog['name'] + ": " + str(self._timeouts[prog['name']]))
+            self._logger.debug("Known crash signatures: " + str(len(self._signatures)) + " triages skipped: " +
+                               str(self._signatures.skipped) + " duplicates: " + str(self._signatures.duplicates))
+            if self._patches:
+                self._logger.debug("Corpus: " + str(self._fuzzer.corpus))
+            if self._generation_worker is not None:
+                self._generation_worker.release_batch(batch_dir.rstrip("/"))
+            if not tested and self._generation_worker is not None:
+                #  The generation processes never run out of testcases, they failed (see their logged errors)
+                self._logger.error("The batch " + batch_dir + " has no testcases, going on with the next one...")
+            elif not tested:
+                self._logger.info("The fuzzer has no testcases left, stopping...")
+                self._running = False
+
+    def __slot_green(self, slot):
+        while self._running:
+            work = self._work.get()
+            try:
+                if work[0] == SESSION:
+                    self.__run_sessions(slot, work[1], work[2], work[3])
+                else:
+                    self.__test_testcase(slot, work[1], work[2])
+            except Exception as ex:
+                self._logger.error("Slot " + str(slot.index) + " failed on " + str(work[1]) + " -> " + str(ex))
+            finally:
+                self._work.task_done()
+
+    def __test_testcase(self, slot, filename, count):
+        #  Brings the testcase into the slot (if it isn't in the batch directory) and runs every program on it
+        target_name = self._batch_dir + filename
+        testcase_dir = self._testcase_dir
+        if self._patches:
+            patched_file = slot.patched_file(self._seed_data, self._fuzzer.file_type)
+            patched_file.apply(self._patches[filename])
+            target_name = os.path.basename(patched_file.path)
+            testcase_dir = slot.directory
             if self._need_web_server:
-                self._web_process.kill()
+                slot.web_server.add(target_name, self._patches[filename].apply(self._seed_data))
+        elif self._testcase_stream is not None:
+            testcase = self._testcases[filename]
+            testcase_dir = slot.directory
+            if self._need_files:
+                testcase.write_to(testcase_dir)
+            if self._need_web_server:
+                slot.web_server.clear()
+                slot.web_server.add_files(testcase.files)
+        for prog in self._programs:
+            if not self._running:
+                break
+            if prog not in self._session_programs:
+                self.__test(slot, prog, filename, target_name, testcase_dir, count)
+        if self._testcase_stream is not None:
+            del self._testcases[filename]
+
+    def __test(self, slot, prog, filename, target_name, testcase_dir, count):
+        #  Returns True if a crash was verified and reported or is a known one
+        executor = slot.executors[prog['name']]
+        self._logger.debug("Test starting...\r\n\tslot: " + str(slot.index) + " program: " + prog['name'] +
+                           " testcase: " + filename + " #testcases: " + str(count))
+        if prog['use_http']:
+            target = slot.base_url + target_name
+            completion = slot.web_server.expect_completion(filename.split(".")[0])
+        else:
+            target = testcase_dir + os.path.basename(target_name)
+            completion = None
+        result = executor.execute(target, self._timeouts[prog['name']].timeout, completion)
+        self._timeouts[prog['name']].record(result.outcome, result.duration)
+        if result.coverage is not None and self._patches and result.outcome == OUTCOME_OK:
+            self.__feedback(filename, result)
+        if not result.completed:
+            gevent.sleep(executor.COOL_DOWN)
+        reported = False
+        major_hash = None
+        #  --------------------------------------------------------------------------------------------
+        #  Only a crash is run again under full triage, else just save the resources. A crash with a complete
+        #  (sanitizer) report has nothing to save and is always reported, a known one is only verified at the sample
+        #  rate of the signature cache, the others are kept as duplicates in the log and the cache stats
+        if result.crashed and not result.report and not self._signatures.needs_triage(prog['name'], result.signature):
+            major_hash = self._signatures.lookup(prog['name'], result.signature)
+            self._logger.info("Known crash, verification skipped...\r\n\tslot: " + str(slot.index) + " program: " +
+                              prog['name'] + " testcase: " + self.__testcase_label(filename) + " signature: " +
+                              result.signature + " hash: " + major_hash + " duplicates: " +
+                              str(self._signatures.duplicates[(prog['name'], major_hash)]))
+            reported = True
+        elif result.crashed:
+            #  A sanitizer report of the run itself is complete, there is nothing to verify
+            crash_report = result.report
+            if not crash_report:
+                self._logger.debug("Test verification started...\r\n\tslot: " + str(slot.index) + " program: " +
+                                   prog['name'] + " testcase: " + filename + " #testcases: " + str(count))
+                crash_report = executor.verify(target, int(prog['sleep_time']))
+            if crash_report:
+                if self._patches:
+                    testcases = self.__bundle_patch(filename)
+                elif self._testcase_stream is not None:
+                    testcases = self._testcases[filename].files
+                else:
+                    testcases = self.__bundle_testcase(testcase_dir, filename, self._dir_listing)
+                if self._fuzz_state is not None:
+                    testcases.append(self.__testcase_id(filename))
+                # Structure crash message (0xFF, (prog['name'], crash_report, testcases[]))
+                self._report_queue.put((0xFF, (prog['name'], crash_report, testcases)))
+                major_hash = ReportWorker.parse_string_report(crash_report, "(Hash=", ")").split(".")[0]
+                self._signatures.learn(prog['name'], result.signature, major_hash)
+                reported = True
+            #  --------------------------------------------------------------------------------------------
+            #else: Do not save unknowns ...
+            #    testcases = self.__bundle_testcase(testcase_dir, filename, dir_listing)
+            #    self._report_queue.put((0xFE, (prog['name'], testcases)))
+        if self._patches:
+            #  Stats of the seed the batch is drawn from, they drive its energy in the power schedule
+            unique = major_hash is not None and major_hash not in self._major_hashes
+            self._fuzzer.entry.record(result.crashed, unique)
+        if major_hash is not None:
+            self._major_hashes.add(major_hash)
+        if not result.completed:
+            gevent.sleep(executor.COOL_DOWN)
+        return reported
+
+    def __run_sessions(self, slot, prog, testcases, count):
+        #  Up to session_size testcases run in one browser instance, the driver page loads them one after another.
+        #  After a crash the active testcase (or the one before, the crash may come while it is unloaded) is
+        #  verified alone and the session goes on with the testcases behind it in a fresh browser.
+        executor = slot.executors[prog['name']]
+        batch_dir = self._batch_dir
+        session_size = int(prog['session_size'])
+        sleep_time = int(prog['sleep_time'])
+        timeout = self._timeouts[prog['name']]
+        pending = list(testcases)
+        while pending and self._running:
+            chunk, pending = pending[:session_size], pending[session_size:]
+            session = BrowserSession(slot.web_server, [batch_dir + filename for filename in chunk], timeout.timeout,
+                                     COMPLETION_GRACE)
+            slot.web_server.set_session(session)
+            self._logger.debug("Session starting...\r\n\tslot: " + str(slot.index) + " program: " + prog['name'] +
+                               " testcases: " + str(len(chunk)) + " #testcases: " + str(count))
+            result = executor.execute(slot.base_url + SESSION_PATH, sleep_time * len(chunk), session.finished, 0)
+            slot.web_server.set_session(None)
+            for completed, seconds in session.runs:
+                timeout.record(OUTCOME_OK if completed else OUTCOME_TIMEOUT, seconds)
+            left = [target_name[len(batch_dir):] for target_name in session.pending]
+            if len(left) == len(chunk):
+                self._logger.error("Session of " + prog['name'] + " didn't load any testcase, skipping " +
+                                   str(len(chunk)) + " testcases")
+            elif result.crashed:
+                suspects = [target_name for target_name in (session.active, session.previous) if target_name]
+                self._logger.info("Crash in session, verifying alone: " + ", ".join(suspects))
+                for target_name in suspects:
+                    if self.__test(slot, prog, target_name[len(batch_dir):], target_name, self._testcase_dir,
+                                   count):
+                        break
+                pending = left + pending
+            elif not session.finished.is_set():
+                pending = left + pending  # the program went away during the session, go on with a fresh one
+            gevent.sleep(executor.COOL_DOWN)
+
+    def __feedback(self, filename, result):
+        #  A testcase which reached new edges becomes a corpus entry of the fuzzer
+        corpus = self._fuzzer.corpus
+        if corpus.new_coverage(result.coverage):
+            entry = corpus.add(self._patches[filename].apply(self._seed_data), result.coverage, result.duration,
+                               self._fuzzer.entry)
+            if entry is not None:
+                self._logger.info("New coverage -> corpus entries: " + str(len(corpus)) + " edges: " +
+                                  str(corpus.edges) + " depth: " + str(entry.depth))
+
+    def __next_batch(self, count):
+        #  Returns the directory of the batch below testcases/ ("" if the testcases are created right here)
+        if self._testcase_stream is not None:
+            self._logger.info("Streaming Testcases...\r\n\tnumber: " + str(count) + " to " + str(count + 100))
+            self._fuzz_state = self._fuzzer.prng_state
+            for slot in self._slots:
+                self._fuzzer.clear_folder(slot.directory)
+            self._testcase_stream = self._fuzzer.testcases(100)
+            return ""
+        if self._generation_worker is None:
+            self._logger.info("Creating Testcases...\r\n\tnumber: " + str(count) + " to " + str(count + 100))
+            self.__create_testcases()
+            return ""
+        self._logger.info("Waiting for the next batch of testcases...\r\n\tnumber: " + str(count) + " to " +
+                          str(count + 100))
+        batch_dir, self._fuzz_state = self._generation_worker.next_batch()
+        return batch_dir + "/"
+
+    def __stream_testcases(self):
+        #  Every testcase is generated right before a slot takes it, the rest of the batch isn't generated yet
+        for testcase in self._testcase_stream:
+            self._testcases[testcase.name] = testcase
+            yield testcase.name
 
     def __create_testcases(self):
-        self._fuzzer.create_testcases(100, "testcases")
+        if hasattr(self._fuzzer, "regenerate"):
+            self._fuzz_state = self._fuzzer.prng_state  # (campaign seed, batch) of the testcases created now
+        if hasattr(self._fuzzer, "create_patches"):
+            #  Seed + patch testcases: just one file per slot, which is patched in place right before every run.
+            #  With coverage feedback the seed can change from batch to batch.
+            if self._seed_data is None:
+                self._fuzzer.clear_folder("testcases")
+            self._patches = dict(self._fuzzer.create_patches(100))
+            if self._seed_data is None or self._fuzzer.seed_digest != self._seed_digest:
+                self._seed_data = self._fuzzer.seed_data
+                self._seed_digest = self._fuzzer.seed_digest
+            if not getattr(self._fuzzer, "regenerable", True):
+                self._fuzz_state = None
+        else:
+            self._fuzzer.create_testcases(100, "testcases")
 
     def start_worker(self):
         if self._greenlet is None:
             self._running = True
+            #  Every slot may wait for its debugger in the threadpool
+            threadpool = gevent.get_hub().threadpool
+            threadpool.maxsize = max(threadpool.maxsize, len(self._slots) + 1)
+            for slot in self._slots:
+                if slot.web_server is not None:
+                    slot.web_server.serve()
+                self._slot_greenlets.append(gevent.spawn(self.__slot_green, slot))
+            if self._generation_worker is not None:
+                self._generation_worker.start_worker()
             self._greenlet = gevent.spawn(self.__worker_green)
 
     def stop_worker(self):
         if self._greenlet is not None:
             self._running = False
             gevent.kill(self._greenlet)
-            try:
-                self.__kill_processes()
-                os.close(self._DEVNULL)
-            except Exception as ex:
-                self._logger.debug("Exception occured while killing Debugger: " + ex.message)
+            gevent.killall(self._slot_greenlets)
+            if self._generation_worker is not None:
+                self._generation_worker.stop_worker()
+            for slot in self._slots:
+                if slot.web_server is not None:
+                    slot.web_server.stop()
+                for executor in slot.executors.values():
+                    try:
+                        executor.kill()
+                        executor.close()
+                    except Exception as ex:
+                        self._logger.debug("Exception occured while stopping the executor: " + str(ex))
 
-    def __kill_processes(self):
-        for proc in self._processes:
-            try:
-                proc.kill()
-            except psutil.NoSuchProcess:
-                pass
+    def __testcase_id(self, filename):
+        #  Enough to regenerate the testcase with regenerate.py: campaign seed, batch and index
+        index = int("".join(c for c in filename.split(".")[0] if c.isdigit()))
+        return "testcase_id.txt", "%d %d %d\n" % (self._fuzz_state[0], self._fuzz_state[1], index)
+
+    def __testcase_label(self, filename):
+        #  Name of the testcase plus its id if it can be regenerated, so a crash which is only logged can be rebuilt
+        if self._fuzz_state is None:
+            return filename
+        return filename + " (testcase_id " + self.__testcase_id(filename)[1].strip() + ")"
+
+    def __bundle_patch(self, filename):
+        patch = self._patches[filename]
+        if patch.seed_digest not in self._seeds_reported:
+            # Structure seed message (0xFD, (seed_digest, seed_data)), afterwards the crashes only carry the patch
+            self._report_queue.put((MESSAGE_TYPES['SEED'], (patch.seed_digest, self._seed_data)))
+            self._seeds_reported.add(patch.seed_digest)
+        return [(filename + ".patch", patch.dumps())]
 
     @staticmethod
     def __bundle_testcase(testcase_dir, filename, dir_listing):
@@ -0,0 +1,107 @@
+import gevent
+import gevent.subprocess
+import logging
+import multiprocessing
+import os
+import sys
+from gevent.queue import Queue
+from worker import Worker
+
+__author__ = 'susperius'
+
+"""
+Generation stage for fuzzers which can regenerate testcases by (campaign seed, batch, index).
+The indices of a batch are split over several regenerate.py processes, so all cores are used, and the next batch is
+generated while the FuzzingWorker executes the current one. The batches are written into a fixed set of buffer
+directories below the testcase directory; a buffer is only reused after the FuzzingWorker released it.
+The index ranges of failed processes are generated again up to RETRIES times, their stderr is logged.
+"""
+
+BATCH_SIZE = 100
+BUFFERS = 2
+RETRIES = 2
+RETRY_DELAY = 5  # seconds
+MAX_ERROR_OUTPUT = 2000  # last characters of the stderr output of a failed process which are logged
+
+
+class GenerationWorker(Worker):
+    def __init__(self, fuzzer, processes=0, directory="testcases"):
+        self._logger = logging.getLogger(__name__)
+        self._greenlet = None
+        self._running = False
+        self._fuzzer = fuzzer
+        #  One core is left for the program under test
+        self._processes_count = processes if processes > 0 else max(1, multiprocessing.cpu_count() - 1)
+        self._directory = directory
+        self._processes = []
+        self._free_buffers = Queue()
+        for i in range(BUFFERS):
+            self._free_buffers.put("batch_" + str(i))
+        self._ready_batches = Queue(BUFFERS)
+        self._DEVNULL = os.open(os.devnull, os.O_RDWR)
+
+    def __worker_green(self):
+        while self._running:
+            buffer_dir = self._free_buffers.get()
+            path = self._directory + "/" + buffer_dir
+            if not os.path.exists(path):
+                os.makedirs(path)
+            self._fuzzer.clear_folder(path)
+            seed, batch = self._fuzzer.prng_state
+            self._fuzzer.set_state((seed, batch + 1))
+            self.__generate(seed, batch, path)
+            # Structure of a ready batch (buffer_dir, (campaign seed, batch))
+            self._ready_batches.put((buffer_dir, (seed, batch)))
+
+    def __generate(self, seed, batch, path):
+        share = (BATCH_SIZE + self._processes_count - 1) / self._processes_count
+        ranges = [(first, min(first + share, BATCH_SIZE) - 1) for first in range(0, BATCH_SIZE, share)]
+        for attempt in range(RETRIES + 1):
+            if attempt > 0:
+                self._logger.info("Generating " + str(len(ranges)) + " failed parts of batch " + str(batch) +
+                                  " again...")
+                gevent.sleep(RETRY_DELAY)
+            ranges = self.__generate_ranges(seed, batch, path, ranges)
+            if not ranges:
+                return
+        self._logger.error("Batch " + str(batch) + " is incomplete, generation failed for the indices " +
+                           ", ".join([str(first) + "-" + str(last) for first, last in ranges]))
+
+    def __generate_ranges(self, seed, batch, path, ranges):
+        #  Returns the ranges whose process failed
+        for first, last in ranges:
+            self._processes.append(gevent.subprocess.Popen(
+                [sys.executable, "regenerate.py", str(seed), str(batch), str(first) + "-" + str(last), path],
+                stdout=self._DEVNULL, stderr=gevent.subprocess.PIPE))
+        failed = []
+        for (first, last), proc in zip(ranges, self._processes):
+            error_output = proc.communicate()[1]
+            if proc.returncode != 0:
+                self._logger.error("Generation process failed for batch " + str(batch) + " indices " + str(first) +
+                                   "-" + str(last) + " -> return code " + str(proc.returncode) + "\r\n" +
+                                   error_output[-MAX_ERROR_OUTPUT:])
+                failed.append((first, last))
+        self._processes = []
+        return failed
+
+    def next_batch(self):
+        return self._ready_batches.get()
+
+    def release_batch(self, buffer_dir):
+        self._free_buffers.put(buffer_dir)
+
+    def start_worker(self):
+        if self._greenlet is None:
+            self._running = True
+            self._greenlet = gevent.spawn(self.__worker_green)
+
+    def stop_worker(self):
+        if self._greenlet is not None:
+            self._running = False
+            gevent.kill(self._greenlet)
+            for proc in self._processes:
+                try:
+                    proc.kill()
+                except OSError:
+                    pass
+            os.close(self._DEVNULL)
@@ -1,11 +1,10 @@
 from worker import Worker
 import gevent
 import logging
-import subprocess
-import psutil
 import os
 import re
-import debugging.PyFuzzDbg as PyFuzzDbg
+from communication.testcaseserver import TestcaseServer
+from executing.executors import EXECUTORS, DEFAULT_EXECUTOR
 from reportworker import ReportWorker
 
 
@@ -21,10 +20,12 @@ class ReducingWorker(Worker):
         self._greenlet = None
         self._logger = logging.getLogger(__name__)
         self._reducer = reducer
-        self._processes = []
+        self._executors = {}
+        for prog in programs:
+            self._executors[prog['name']] = EXECUTORS[prog.get('executor', DEFAULT_EXECUTOR)](prog)
         self._report_queue = report_queue
         self._actual_file = {}
-        self._DEVNULL = os.open(os.devnull, os.O_RDWR)
+        self._web_server = TestcaseServer(8080)
 
     def __worker_green_old(self):
         results = self.__get_all_crash_results()
@@ -38,13 +39,11 @@ class ReducingWorker(Worker):
             if program is None:
                 continue
             if bool(program['use_http']):
-                self._web_process = subprocess.Popen("python -m SimpleHTTPServer 8080", stdout=self._DEVNULL,
-                                                     stderr=self._DEVNULL, cwd=crash['directory'])
+                self.__serve_crash_directory(crash['directory'])
             crashed = False
             for i in range(3):
                 crashed = self.__check_for_crash(crash['crash_file'], crash, program)
                 if crashed:
-                    os.remove("tmp_crash_report")
                     self._logger.info("Crash file verified")
                     break
             if not crashed:
@@ -64,10 +63,8 @@ class ReducingWorker(Worker):
             self._logger.info("Starting test case reduction ...")
             while reduced_case is not None:
                 self.__write_reduced_case(crash['directory'] + "/", reduced_case)
-                if self.__check_for_crash("reduced." + self._reducer.file_type, crash, program):
-                    with open("tmp_crash_report") as fd:
-                        reduced_case_report = fd.read()
-                    os.remove("tmp_crash_report")
+                reduced_case_report = self.__check_for_crash("reduced." + self._reducer.file_type, crash, program)
+                if reduced_case_report:
                     reduced_maj_hash, reduced_min_hash = self.__get_report_hashes(reduced_case_report)
                     if reduced_maj_hash == original_maj_hash:  # The same crash
                         self._logger.debug("Reducing crash!")
@@ -96,8 +93,7 @@ class ReducingWorker(Worker):
         for crash in results:
             reduced_case = None
             program = None
-            return_code = 0
-            self.__kill_processes()
+            crashed = False
             for prog in self._programs:
                 if prog['name'] == crash['program_name']:
                     program = prog
@@ -105,33 +101,28 @@ class ReducingWorker(Worker):
             if program is None:
                 continue
             if bool(program['use_http']):
-                self._processes.append(subprocess.Popen("python -m SimpleHTTPServer 8080", stdout=self._DEVNULL,
-                                                        stderr=self._DEVNULL, cwd=crash['directory']))
+                self.__serve_crash_directory(crash['directory'])
             self._reducer.set_case(crash['directory'], crash['crash_file'])
+            executor = self._executors[program['name']]
             for i in range(5):
-                pyfuzzdbg = PyFuzzDbg.Debugger(int(program['sleep_time']))
                 if program['use_http']:
-                    pyfuzzdbg.set_app_name(unicode(program['path'] + " \"http://127.0.0.1:8080/" +
-                                                   crash['crash_file'] + "\"\x00\x00"))
-                    return_code = pyfuzzdbg.start_test()
-                    if return_code != 0:
+                    crashed = executor.execute("http://127.0.0.1:8080/" + crash['crash_file'],
+                                               int(program['sleep_time'])).crashed
+                    if crashed:
                         self._logger.info("Verified the crash...")
                         break
-                    gevent.sleep(1)
+                    gevent.sleep(executor.COOL_DOWN)
                 else:
                     pass
-            if return_code == 0:
+            if not crashed:
                 self._logger.info("Case seems to be a false positive...")
                 continue
             test_case = self._reducer.reduce()
             while test_case is not None:
                 self.__write_reduced_case(crash['directory'], test_case, crash)
                 if program['use_http']:
-                    pyfuzzdbg = PyFuzzDbg.Debugger(int(program['sleep_time']))
-                    pyfuzzdbg.set_app_name(unicode(program['path'] + " \"http://127.0.0.1:8080/reduced." +
-                                                   self._reducer.file_type + "\"\x00\x00"))
-                    return_code = pyfuzzdbg.start_test()
-                    if return_code != 0:
+                    if executor.execute("http://127.0.0.1:8080/reduced." + self._reducer.file_type,
+                                        int(program['sleep_time'])).crashed:
                         self._logger.debug("Crashed!")
                         reduced_case = test_case
                         self._reducer.crashed(True)
@@ -140,7 +131,7 @@ class ReducingWorker(Worker):
                 else:
                     pass
                 test_case = self._reducer.reduce()
-                gevent.sleep(1)
+                gevent.sleep(executor.COOL_DOWN)
             if reduced_case is not None:
                 new_directory = crash['directory'].replace("results", "reduced")
                 os.makedirs(new_directory)
@@ -159,32 +150,17 @@ class ReducingWorker(Worker):
         quit()
 
     def __check_for_crash(self, filename, crash, program):
-        if not crash['report']:
-            pyfuzzdbg = PyFuzzDbg.Debugger(int(program['sleep_time']))
-            if bool(program['use_http']):
-                pyfuzzdbg.set_app_name(unicode(program['path'] + " \"http://127.0.0.1:8080/" + filename +
-                                       "\"\x00\x00"))
-                return_code = pyfuzzdbg.start_test()
-            else:
-                pyfuzzdbg.set_app_name(unicode(program['path'] + "\"" + program['path'] + filename + "\"\x00\x00"))
-                return_code = pyfuzzdbg.start_test()
+        #  Returns the crash report of filename, "" if it didn't crash
+        executor = self._executors[program['name']]
+        if bool(program['use_http']):
+            target = "http://127.0.0.1:8080/" + filename
         else:
-            if bool(program['use_http']):
-                self._processes.append(subprocess.Popen(
-                        "python debugging\\windbg.py -p \"" + program['path']
-                        + "\" -t \"http://127.0.0.1:8080/" + filename + "\" -X",
-                        stdout=self._DEVNULL, stderr=self._DEVNULL))
-            else:
-                self._processes.append(subprocess.Popen(
-                        "python debugging\\windbg.py -p \"" + program['path']
-                        + "\" -t \"" + os.getcwd() + crash['directory'] + filename +
-                        "\" -X", stdout=self._DEVNULL, stderr=self._DEVNULL))
-            gevent.sleep(int(program['sleep_time']))
-            self.__kill_processes()
-            self._processes = []
-            if os.path.isfile("tmp_crash_report"):
-                return True
-        return False
+            target = os.path.join(os.getcwd(), crash['directory'], filename)
+        return executor.verify(target, int(program['sleep_time']))
+
+    def __serve_crash_directory(self, directory):
+        self._web_server.clear()
+        self._web_server.load_directory(directory)
 
     def __write_reduced_case(self, directory, reduced_case, crash):
         if not self._reducer.reduce_add_file[0]:
@@ -192,6 +168,7 @@ class ReducingWorker(Worker):
                 os.remove(directory + "reduced." + self._reducer.file_type)
             with open(directory + "reduced." + self._reducer.file_type, 'wb+') as fd:
                 fd.write(reduced_case)
+            self._web_server.add("reduced." + self._reducer.file_type, reduced_case)
         else:
             reducer_file_name = ""
             for file_name in crash['additional_files']:
@@ -203,6 +180,7 @@ class ReducingWorker(Worker):
                 os.remove(directory + reducer_file_name)
             with open(directory + reducer_file_name, 'wb+') as fd:
                 fd.write(reduced_case)
+            self._web_server.add(reducer_file_name, reduced_case)
 
     def __get_all_crash_results(self):
         results = []
@@ -236,18 +214,14 @@ class ReducingWorker(Worker):
                 add_files.append((f_name, add_fd.read()))
         return crash_file, report, add_files
 
-    def __kill_processes(self):
-        for proc in self._processes:
-            try:
-                proc.kill()
-            except psutil.NoSuchProcess:
-                pass
-        self._processes = []
-
     def stop_worker(self):
         if self._running:
             self._running = False
             gevent.kill(self._greenlet)
+            self._web_server.stop()
+            for executor in self._executors.values():
+                executor.kill()
+                executor.close()
             try:
                 with open(self._reducer.path + self._actual_file['origin'][0], 'wb+') as case_fd, open(
                             self._reducer.path + self._actual_file['origin'][1], 'w+') as report_fd:
@@ -259,6 +233,7 @@ class ReducingWorker(Worker):
     def start_worker(self):
         if not self._running:
             self._running = True
+            self._web_server.serve()
             self._greenlet = gevent.spawn(self.__worker_green)
 
     @staticmethod
@@ -6,10 +6,13 @@ from hashlib import md5
 from communication.reportclient import ReportClient
 from worker import Worker
 from model.message_types import MESSAGE_TYPES
+from fuzzing.patch import SeedPatch
 
 
 __author__ = 'susperius'
 
+SEED_DIR = "crash_seeds/"  # outside of results, the crash directories are walked by the reducer
+
 
 class ReportWorker(Worker):
     def __init__(self, net_mode, report_queue, file_type, program, report_server="", report_server_port=0):
@@ -43,6 +46,12 @@ class ReportWorker(Worker):
                 if self._net_mode:
                     data = pickle.dumps((msg_type, msg), -1)
                     self._client.send(data)
+            elif MESSAGE_TYPES['SEED'] == msg_type:
+                # Structure seed message (0xFD, (seed_digest, seed_data))
+                self.store_seed(msg)
+                if self._net_mode:
+                    data = pickle.dumps((msg_type, msg), -1)
+                    self._client.send(data)
             gevent.sleep(0)
 
     def start_worker(self):
@@ -63,6 +72,29 @@ class ReportWorker(Worker):
             end = crash.find("\n", start)
         return crash[start:end]
 
+    @staticmethod
+    def store_seed(msg):
+        seed_digest, seed_data = msg
+        if not os.path.exists(SEED_DIR):
+            os.makedirs(SEED_DIR)
+        if not os.path.exists(SEED_DIR + seed_digest):
+            with open(SEED_DIR + seed_digest, 'wb+') as fd:
+                fd.write(seed_data)
+
+    @staticmethod
+    def write_testcases(directory, testcases):
+        #  Patches are saved as they are and additionally applied to their seed, so the crash dir has the real file
+        for name, data in testcases:
+            with open(directory + "/" + name, 'wb+') as fd_case:
+                fd_case.write(data)
+            if name.endswith(".patch"):
+                patch = SeedPatch.loads(data)
+                if os.path.exists(SEED_DIR + patch.seed_digest):
+                    with open(SEED_DIR + patch.seed_digest, 'rb') as fd_seed:
+                        seed_data = fd_seed.read()
+                    with open(directory + "/" + name[:-len(".patch")], 'wb+') as fd_case:
+                        fd_case.write(patch.apply(seed_data))
+
     def __report_crash_local(self, msg):
         prog_name, crash_report, testcases = msg
         description = self.parse_string_report(crash_report, "Short Description: ")
@@ -76,9 +108,7 @@ class ReportWorker(Worker):
                               " \r\n\tShort Description = " + description +
                               " \r\n\tsaved in " + directory)
             os.makedirs(directory)
-            for testcase in testcases:
-                with open(directory + "/" + testcase[0], 'wb+') as fd_case:
-                    fd_case.write(testcase[1])
+            self.write_testcases(directory, testcases)
             with open(directory + "/crash_report.txt", 'wb+') as fd_rep:
                 fd_rep.write(crash_report)
 
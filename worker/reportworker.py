@@ -5,11 +5,14 @@ import os
 from worker import Worker
 from databaseworker import DB_TYPES, SEPARATOR
 from node.model.message_types import MESSAGE_TYPES
+from node.fuzzing.patch import SeedPatch
 from model.crash import Crash
 from hashlib import md5
 
 __author__ = 'susperius'
 
+SEED_DIR = "crash_seeds/"  # outside of results, the crash directories are walked by the reducer
+
 
 class ReportWorker(Worker):
     def __init__(self, report_queue, db_queue, node_dict, crash_dict=None):
@@ -35,6 +38,9 @@ class ReportWorker(Worker):
             elif MESSAGE_TYPES['UNKNOWN'] == msg_type:
                 # Structure unknown crash message (0xFE, (prog['name'], testcases))
                 self.__report_unknown(address, msg)
+            elif MESSAGE_TYPES['SEED'] == msg_type:
+                # Structure seed message (0xFD, (seed_digest, seed_data))
+                self.store_seed(msg)
             gevent.sleep(0)
             gevent.sleep(1)
 
@@ -59,6 +65,29 @@ class ReportWorker(Worker):
             end = crash.find("\n", start)
         return crash[start:end]
 
+    @staticmethod
+    def store_seed(msg):
+        seed_digest, seed_data = msg
+        if not os.path.exists(SEED_DIR):
+            os.makedirs(SEED_DIR)
+        if not os.path.exists(SEED_DIR + seed_digest):
+            with open(SEED_DIR + seed_digest, 'wb+') as fd:
+                fd.write(seed_data)
+
+    @staticmethod
+    def write_testcases(directory, testcases):
+        #  Patches are saved as they are and additionally applied to their seed, so the crash dir has the real file
+        for name, data in testcases:
+            with open(directory + "/" + name, 'wb+') as fd_case:
+                fd_case.write(data)
+            if name.endswith(".patch"):
+                patch = SeedPatch.loads(data)
+                if os.path.exists(SEED_DIR + patch.seed_digest):
+                    with open(SEED_DIR + patch.seed_digest, 'rb') as fd_seed:
+                        seed_data = fd_seed.read()
+                    with open(directory + "/" + name[:-len(".patch")], 'wb+') as fd_case:
+                        fd_case.write(patch.apply(seed_data))
+
     def __report_crash_local(self, node_address, msg):
         prog_name, crash_report, testcases = msg
         classification = self.__parse_string_report(crash_report, "Exploitability Classification: ")
@@ -81,9 +110,7 @@ class ReportWorker(Worker):
                               " \r\n\tShort Description = " + description +
                               " \r\n\tsaved in " + directory)
             os.makedirs(directory)
-            for testcase in testcases:
-                with open(directory + "/" + testcase[0], 'wb+') as fd_case:
-                    fd_case.write(testcase[1])
+            self.write_testcases(directory, testcases)
             with open(directory + "/crash_report.txt", 'wb+') as fd_rep:
                 fd_rep.write(crash_report)
 